@@ -0,0 +1,131 @@
+# acquisition.py
+# 센서 허브 구성, LED 출력, 로거처럼 하드웨어를 직접 다루는 쪽을 한 곳에 모읍니다.
+import time
+
+from config import (LED_PINS, ALERT_THRESHOLD, SENSOR_POLL_INTERVAL, DISTANCE_POLL_INTERVAL,
+                    TOUCH_POLL_INTERVAL, DHT_SAMPLE_INTERVAL, DHT_MAX_AGE, DHT_READ_TIMEOUT,
+                    DISTANCE_READ_TIMEOUT, HISTORY_CAPACITY, HISTORY_SENSORS, MAINTENANCE_INTERVAL,
+                    SPOOL_REPLAY_INTERVAL)
+from sensor_utils import *
+from sensor_hub import SensorHub
+from snapshot import SnapshotStore
+from timeseries import RingBuffer
+from db import prepare_db, save_to_db, close_db, run_maintenance, replay_spool
+from metrics import REGISTRY
+
+
+class LocalSensors:
+    """센서 허브와 LED 를 현재 프로세스 안에서 소유합니다.
+
+    ACQUISITION_MODE = 'thread' 이면 웹 서버가 직접 만들고, 'process' 이면 센서 프로세스가
+    공유 메모리에 쓰는 store/history 를 넘겨서 만듭니다.
+    """
+
+    def __init__(self, store=None, history=None):
+        GPIO.setup(LED_PINS, GPIO.OUT)
+        # 현재 센서 값/장치 상태는 모두 이 스냅샷 하나로 공유
+        self.store = store or SnapshotStore()
+        # 최근 기록은 센서별 링 버퍼에서 바로 조회 (DB 왕복 없음)
+        self.history = history or {name: RingBuffer(HISTORY_CAPACITY) for name in HISTORY_SENSORS}
+
+        # 모든 센서 읽기는 허브 하나가 주기별로 담당
+        self.hub = SensorHub()
+        self.hub.schedule('distance', get_distance_async, DISTANCE_POLL_INTERVAL,
+                          timeout=DISTANCE_READ_TIMEOUT)
+        self.hub.schedule('climate', dht_sampler.sample, max(DHT_SAMPLE_INTERVAL, DHT_MIN_INTERVAL),
+                          timeout=DHT_READ_TIMEOUT)
+        self.hub.schedule('touch', touch_monitor.state, TOUCH_POLL_INTERVAL, blocking=False)
+        self.hub.schedule('logger', self.log_readings, SENSOR_POLL_INTERVAL)
+        # 보관 기간이 지난 기록 파티션 삭제 (DB 를 쓰는 쪽인 센서 소유 프로세스에서만 실행)
+        self.hub.schedule('maintenance', run_maintenance, MAINTENANCE_INTERVAL)
+        # DB 가 꺼져 있던 동안 스풀에 남긴 기록을 DB 가 돌아오면 옮김
+        self.hub.schedule('spool', replay_spool, SPOOL_REPLAY_INTERVAL)
+        self.hub.subscribe(self.on_reading, ['distance', 'climate', 'touch'])
+        # 센서 작업이 모두 멈춘 뒤에 LED 를 끄고 GPIO 를 정리
+        self.hub.add_shutdown_hook(self.cleanup_resources)
+        # 로거가 멈춘 뒤 저장 큐에 남은 기록을 DB 에 모두 씀
+        self.hub.add_shutdown_hook(close_db)
+
+    def start(self):
+        # 마이그레이션은 저장 큐가 아니라 여기서 한 번 적용 (실패하면 스풀 재저장 작업이 다시 시도)
+        prepare_db()
+        self.hub.start()
+
+    def stop(self):
+        self.hub.stop()
+
+    def stats(self):
+        return self.hub.stats()
+
+    def metrics(self):
+        """이 프로세스의 지표 (metrics.Registry.collect() 형식)."""
+        return REGISTRY.collect()
+
+    def read_stats(self):
+        """장치별 single-flight 통계 (실제 읽기, 합류, 재사용 횟수)."""
+        return hardware_reads.stats()
+
+    def on_reading(self, name, value):
+        if name == 'distance':
+            alert = value != -1 and value <= ALERT_THRESHOLD
+            self.store.update(distance=value, proximity_alert=alert)
+            if value != -1:
+                self.history['distance'].append(value)
+        elif name == 'climate':
+            humidity, temperature = value
+            self.store.update(humidity=humidity, temperature=temperature,
+                              climate_read_at=time.monotonic())
+            self.history['humidity'].append(humidity)
+            self.history['temperature'].append(temperature)
+        elif name == 'touch':
+            touched, count, last_touch = value
+            self.store.update(touched=touched, touch_count=count, last_touch=last_touch)
+
+    def log_readings(self):
+        # 하드웨어를 다시 읽지 않고 허브가 발행한 값만 저장
+        snap = self.store.get()
+        age = snap.climate_age()
+        if age is None or age > DHT_MAX_AGE:
+            temperature, humidity = None, None
+        else:
+            temperature, humidity = snap.temperature, snap.humidity
+        save_to_db(temperature, humidity, snap.distance, snap.touched)
+
+    def set_leds(self, changes):
+        """{LED 번호: 0/1} 을 적용하고 (seq, leds) 를 반환합니다. 바뀐 핀만 한 번에 씁니다."""
+        def apply(current):
+            states = list(current.leds)
+            pins, values = [], []
+            for index, state in changes.items():
+                if 0 <= index < len(LED_PINS) and states[index] != state:
+                    states[index] = state
+                    pins.append(LED_PINS[index])
+                    values.append(state)
+            if pins:
+                # 스냅샷 쓰기 Lock 안에서 핀을 바꿔서 핀 상태와 스냅샷 순서가 어긋나지 않게 함
+                GPIO.output(pins, values)
+            return {'leds': tuple(states)}
+
+        snap = self.store.modify(apply)
+        return snap.seq, snap.leds
+
+    def handle_command(self, cmd, *args):
+        """다른 프로세스에서 보낸 명령을 처리합니다."""
+        if cmd == 'set_leds':
+            return self.set_leds(*args)
+        if cmd == 'stats':
+            return self.stats()
+        if cmd == 'read_stats':
+            return self.read_stats()
+        if cmd == 'metrics':
+            return self.metrics()
+        raise ValueError(f"알 수 없는 명령: {cmd}")
+
+    def cleanup_resources(self):
+        print("리소스 정리 시작...")
+        for pin in LED_PINS:
+            try:
+                GPIO.output(pin, GPIO.LOW)
+            except Exception as e:
+                print(f"LED {pin} 정리 중 오류: {e}")
+        cleanup_gpio()
@@ -1,149 +1,338 @@
 # app.py
-from flask import Flask, render_template, redirect, jsonify
-import mariadb
+from flask import Flask, render_template, redirect, jsonify, request, Response, g
+from collections import OrderedDict
+from datetime import datetime
+import hashlib
+import json
+import os
+import signal
 import threading
 import time
-import signal
-import sys
-import atexit
-
-from config import DB_CONFIG, ALERT_THRESHOLD, SENSOR_POLL_INTERVAL
-from sensor_utils import *
-
-# LED GPIO
-leds = [17, 22, 27]
-ledStates = [0, 0, 0]
-GPIO.setup(leds, GPIO.OUT)
-
-distance_cm = -1
-proximity_alert = False
-
-def DistanceMonitorTask():
-    global distance_cm, proximity_alert
-    while True:
-        dist = get_distance()
-        distance_cm = dist
-        if dist != -1:
-            proximity_alert = dist <= ALERT_THRESHOLD
-        else:
-            proximity_alert = False
-        time.sleep(0.5)
+
+from config import (LED_PINS, DHT_MAX_AGE, HISTORY_PAGE_SIZE, ACQUISITION_MODE, SENSOR_CPU,
+                    STREAM_POLL_INTERVAL, STREAM_KEEPALIVE)
+from db import load_history_from_db, load_history_range
+from iotcommon.rollup import parse_range, summarize
+from control_channel import ControlChannel
+from iotcommon.assets import StaticAssets
+from metrics import REGISTRY, merge, render, with_labels
+
+# 센서/LED 는 이 프로세스(thread 모드) 또는 별도 센서 프로세스(process 모드)가 소유
+if ACQUISITION_MODE == 'process':
+    from sensor_process import SensorProcess
+    sensors = SensorProcess(cpu=SENSOR_CPU)
+elif ACQUISITION_MODE == 'client':
+    # serve.py 의 HTTP 워커: 센서는 별도 소유 프로세스가 가지고 있음
+    from sensor_process import SensorClient
+    sensors = SensorClient()
+else:
+    from acquisition import LocalSensors
+    sensors = LocalSensors()
+
+# 기록 페이지의 기간 선택 링크 (?range=)
+HISTORY_RANGES = (('1h', '1시간'), ('24h', '24시간'), ('7d', '7일'), ('30d', '30일'))
+
+HISTORY_INFO = {
+    'temperature': ('온도', '°C'),
+    'humidity': ('습도', '%'),
+    'distance': ('주변 침입자 거리', 'cm'),
+}
 
 app = Flask(__name__)
+# 정적 파일: 해시 이름 + gzip + immutable 캐시 (url_for('static', ...) 가 자동으로 해시 이름을 씀)
+StaticAssets(app)
 
-def updateLeds():
-    for num, value in enumerate(ledStates):
-        GPIO.output(leds[num], value)
+HTTP_REQUEST_SECONDS = REGISTRY.histogram('http_request_duration_seconds', '라우트별 요청 처리 시간',
+                                          ('route', 'method', 'status'))
 
-def cleanup_resources(led_pins):
-    print("리소스 정리 시작...")
-    for pin in led_pins:
-        try:
-            GPIO.output(pin, GPIO.LOW)
-        except Exception as e:
-            print(f"LED {pin} 정리 중 오류: {e}")
-    cleanup_gpio()
+@app.before_request
+def start_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request(response):
+    # 라벨은 실제 경로가 아니라 라우트 규칙으로 기록 (/history/<sensor_type> 등)
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    HTTP_REQUEST_SECONDS.observe(time.perf_counter() - g.request_started,
+                                 route=route, method=request.method, status=response.status_code)
+    return response
+
+def snapshot_payload(snap):
+    """스냅샷을 화면에 필요한 값들의 dict 로 바꿉니다. 오래된 온습도 값은 None."""
+    age = snap.climate_age()
+    climate_ok = snap.temperature is not None and age is not None and age <= DHT_MAX_AGE
+    return {
+        'temperature': round(snap.temperature, 1) if climate_ok else None,
+        'humidity': round(snap.humidity, 1) if climate_ok else None,
+        'distance': snap.distance,
+        'alert': snap.proximity_alert,
+        'touched': snap.touched,
+        'touch_count': snap.touch_count,
+        'leds': list(snap.leds),
+    }
+
+def snapshot_document(snap):
+    """/api/v1/snapshot 응답 본문: 모든 센서 값, 장치 상태, 모드를 한 번에 담습니다."""
+    document = snapshot_payload(snap)
+    age = snap.climate_age()
+    document.update(seq=snap.seq, timestamp=snap.timestamp,
+                    climate_age=round(age, 1) if document['temperature'] is not None else None,
+                    last_touch=snap.last_touch,
+                    mode='manual' if snap.touched else 'auto')
+    return document
+
+SNAPSHOT_FIELDS = frozenset(snapshot_document(sensors.store.get()))
+# 재시작하면 seq 가 0 부터 다시 시작하므로 ETag 에 서버 시작 시각을 붙여 구분
+BOOT_ID = format(int(time.time()), 'x')
+
+# 대시보드 렌더 캐시: 화면에 보이는 값이 같으면 이전에 만든 HTML 을 그대로 보냄
+INDEX_CACHE_SIZE = 32
+index_cache = OrderedDict()  # 화면 상태 튜플 -> (렌더된 HTML(bytes), ETag)
+index_cache_lock = threading.Lock()
+
+def index_view(snap):
+    """첫 화면에 그릴 값. 템플릿에 보이는 형식(정수 cm, 소수 한 자리)으로 맞춰서 캐시 키로도 씀."""
+    payload = snapshot_payload(snap)
+    return (
+        ('leds', tuple(payload['leds'])),
+        ('manual', payload['touched']),
+        ('alert', payload['alert']),
+        ('distance', round(payload['distance']) if payload['distance'] != -1 else -1),
+        ('temperature', payload['temperature']),
+        ('humidity', payload['humidity']),
+    )
 
 @app.route('/')
 def index():
-    return render_template('index.html')
+    view = index_view(sensors.store.get())
+    with index_cache_lock:
+        cached = index_cache.get(view)
+        if cached is not None:
+            index_cache.move_to_end(view)
+    if cached is None:
+        html = render_template('index.html', view=dict(view)).encode()
+        cached = (html, hashlib.md5(html).hexdigest())
+        with index_cache_lock:
+            index_cache[view] = cached
+            if len(index_cache) > INDEX_CACHE_SIZE:
+                index_cache.popitem(last=False)
+    html, etag = cached
+    response = Response(html, mimetype='text/html')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    # 브라우저가 같은 페이지를 가지고 있으면 본문 없이 304
+    return response.make_conditional(request)
 
 @app.route('/history/<string:sensor_type>')
 def history(sensor_type):
-    if sensor_type == 'temperature':
-        column, title, unit = 'temperature', '온도', '°C'
-    elif sensor_type == 'humidity':
-        column, title, unit = 'humidity', '습도', '%'
-    elif sensor_type == 'distance':
-        column, title, unit = 'distance', '주변 침입자 거리', 'cm'
-    else:
+    if sensor_type not in HISTORY_INFO:
         return "Not Found", 404
-    
-    conn = None
-    cursor = None
-    logs = []
+    title, unit = HISTORY_INFO[sensor_type]
+
+    # ?range=24h 처럼 기간을 주면 DB 에서 기간에 맞는 해상도(원본/1분/1시간)로 가져옴
+    span = parse_range(request.args.get('range'))
+    if span is not None:
+        resolution, points = load_history_range(sensor_type, span)
+        logs = [(when, avg) for when, avg, *_ in reversed(points)]
+        return render_template('history.html', logs=logs, title=title, unit=unit,
+                               ranges=HISTORY_RANGES, selected=request.args['range'],
+                               resolution=resolution, table_size=HISTORY_PAGE_SIZE)
+
+    points = sensors.history[sensor_type].recent(HISTORY_PAGE_SIZE)
+    if points:
+        logs = [(datetime.fromtimestamp(ts), value) for ts, value in points]
+    else:
+        # 재시작 직후처럼 버퍼가 비어 있을 때만 DB 에서 가져옴
+        logs = load_history_from_db(sensor_type)
+
+    return render_template('history.html', logs=logs, title=title, unit=unit,
+                           ranges=HISTORY_RANGES, selected=None, resolution='raw',
+                           table_size=HISTORY_PAGE_SIZE)
+
+@app.route('/gethistory/<string:sensor_type>')
+def gethistory_api(sensor_type):
+    if sensor_type not in sensors.history:
+        return jsonify(status="error", message="알 수 없는 센서"), 404
+    if 'range' in request.args:
+        # 긴 기간은 DB 롤업 테이블에서 해상도를 골라 조회
+        span = parse_range(request.args['range'])
+        if span is None:
+            return jsonify(status="error", message="range 는 90m, 24h, 30d 형식이어야 합니다"), 400
+        resolution, rows = load_history_range(sensor_type, span)
+        points = [(when.timestamp(), avg, low, high, count) for when, avg, low, high, count in rows]
+        return jsonify(status="success", resolution=resolution, points=points, stats=summarize(rows))
+    buffer = sensors.history[sensor_type]
+    seconds = request.args.get('seconds', type=float)
+    if seconds is not None:
+        points = buffer.since(seconds)
+        stats = buffer.stats(seconds=seconds)
+    else:
+        n = request.args.get('n', HISTORY_PAGE_SIZE, type=int)
+        points = buffer.recent(n)
+        stats = buffer.stats(n=n)
+    return jsonify(status="success", points=points, stats=stats)
+
+# LED 상태가 바뀌면 WebSocket 으로 연결된 모든 대시보드에 알림
+channel = ControlChannel()
+
+def parse_led_changes(raw):
+    """{"LED 번호": 0/1} (일부) 또는 [0/1, ...] (전체) 를 검사해서 {int: int} 로 바꿉니다."""
+    if isinstance(raw, list):
+        if len(raw) != len(LED_PINS):
+            raise ValueError(f"전체 상태는 LED {len(LED_PINS)}개 값이어야 합니다")
+        raw = dict(enumerate(raw))
+    if not isinstance(raw, dict) or not raw:
+        raise ValueError("leds 는 비어 있지 않은 객체 또는 목록이어야 합니다")
+    changes = {}
+    for key, state in raw.items():
+        try:
+            index = int(key)
+        except (TypeError, ValueError):
+            raise ValueError(f"잘못된 LED 번호: {key}")
+        if not 0 <= index < len(LED_PINS):
+            raise ValueError(f"잘못된 LED 번호: {key}")
+        if not isinstance(state, int) or state not in (0, 1):
+            raise ValueError(f"잘못된 LED 상태: {state}")
+        changes[index] = int(state)
+    return changes
+
+def on_ws_command(cmd):
+    seq, leds = sensors.set_leds(parse_led_changes(cmd.get('leds')))
+    return {'seq': seq, 'leds': list(leds)}
+
+channel.register(app, on_ws_command)
+
+@app.route('/api/v1/leds', methods=['POST'])
+def leds_api():
+    """여러 LED 를 한 번에 바꿉니다. {"leds": {"0": 1, "2": 0}} 또는 {"leds": [1, 0, 1]}."""
+    body = request.get_json(silent=True)
     try:
-        conn = mariadb.connect(**DB_CONFIG)
-        cursor = conn.cursor()
-        # 'log_time' 컬럼을 사용하도록 수정
-        query = f"SELECT log_time, {column} FROM Controller3 WHERE {column} IS NOT NULL ORDER BY log_time DESC LIMIT 10"
-        cursor.execute(query)
-        logs = cursor.fetchall()
-    except mariadb.Error as e:
-        print(f"DB 조회 오류: {e}")
-    finally:
-        if cursor: cursor.close()
-        if conn: conn.close()
-        
-    return render_template('history.html', logs=logs, title=title, unit=unit)
+        changes = parse_led_changes(body.get('leds') if isinstance(body, dict) else None)
+    except ValueError as e:
+        return jsonify(status="error", message=str(e)), 400
+    seq, leds = sensors.set_leds(changes)
+    channel.broadcast({'type': 'state', 'seq': seq, 'leds': list(leds)})
+    return jsonify(status="success", seq=seq, leds=list(leds))
 
 @app.route('/<int:LEDn>/<int:state>')
 def ledswitch(LEDn, state):
-    if 0 <= LEDn < len(leds):
-        ledStates[LEDn] = state
-        updateLeds()
+    if 0 <= LEDn < len(LED_PINS):
+        seq, leds = sensors.set_leds({LEDn: state})
+        channel.broadcast({'type': 'state', 'seq': seq, 'leds': list(leds)})
     return redirect('/')
 
 @app.route('/getdistance')
 def getdistance_api():
-    if distance_cm == -1:
-        return jsonify(value="Out of Range", alert=proximity_alert)
-    return jsonify(value=distance_cm, alert=proximity_alert)
+    snap = sensors.store.get()
+    if snap.distance == -1:
+        return jsonify(value="Out of Range", alert=snap.proximity_alert)
+    return jsonify(value=snap.distance, alert=snap.proximity_alert)
 
 @app.route('/gettouch')
 def gettouch_api():
-    touch_status = get_touch()
-    return jsonify(touched=touch_status, current_state=GPIO.input(TOUCH_PIN))
+    snap = sensors.store.get()
+    return jsonify(touched=snap.touched, current_state=int(snap.touched),
+                   count=snap.touch_count, last_touch=snap.last_touch)
+
+@app.route('/stream')
+def stream():
+    """Server-Sent Events: 스냅샷에서 바뀐 값만 밀어 줍니다. 이벤트 id 는 스냅샷 seq."""
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+
+    def events():
+        # 재접속 시 브라우저가 이미 받은 seq 가 최신이면 처음 전체 전송을 생략
+        snap = sensors.store.get()
+        sent = snapshot_payload(snap) if last_event_id == snap.seq else {}
+        yield "retry: 3000\n\n"
+        last_sent_at = time.monotonic()
+        while True:
+            snap = sensors.store.get()
+            payload = snapshot_payload(snap)
+            changed = {key: value for key, value in payload.items() if sent.get(key, ...) != value}
+            now = time.monotonic()
+            if changed:
+                sent = payload
+                last_sent_at = now
+                yield f"id: {snap.seq}\nevent: reading\ndata: {json.dumps(changed)}\n\n"
+            elif now - last_sent_at >= STREAM_KEEPALIVE:
+                last_sent_at = now
+                yield ": keepalive\n\n"
+            time.sleep(STREAM_POLL_INTERVAL)
+
+    return Response(events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/v1/snapshot')
+def snapshot_api():
+    """전체 상태 한 번에 조회. ETag 는 스냅샷 seq 로 만들고 바뀐 게 없으면 본문 없이 304.
+
+    본문의 climate_age 는 요청마다 달라지므로 ETag 는 약한(weak) 태그입니다: 같은 seq 면
+    값은 같고 나이만 다른 "의미상 같은" 응답이라는 뜻입니다.
+    """
+    fields = request.args.get('fields')
+    if fields:
+        fields = sorted(set(fields.split(',')))
+        unknown = [name for name in fields if name not in SNAPSHOT_FIELDS]
+        if unknown:
+            return jsonify(status="error", message=f"알 수 없는 필드: {', '.join(unknown)}"), 400
+
+    snap = sensors.store.get()
+    age = snap.climate_age()
+    # 온습도는 시간이 지나면 seq 변화 없이도 만료되므로 만료 여부도 태그에 포함
+    stale = snap.temperature is None or age is None or age > DHT_MAX_AGE
+    etag = f"{BOOT_ID}-{snap.seq}{'-stale' if stale else ''}{'-' + '.'.join(fields) if fields else ''}"
+
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        document = snapshot_document(snap)
+        if fields:
+            document = {name: document[name] for name in fields}
+        response = jsonify(document)
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route('/gethubstats')
+def gethubstats_api():
+    return jsonify(sensors.stats())
+
+@app.route('/getreadstats')
+def getreadstats_api():
+    return jsonify(sensors.read_stats())
+
+@app.route('/metrics')
+def metrics_api():
+    """Prometheus 텍스트 형식 지표. process/client 모드면 센서 프로세스의 지표도 합쳐서 보여줍니다."""
+    families = REGISTRY.collect()
+    if ACQUISITION_MODE != 'thread':
+        web = 'web' if ACQUISITION_MODE == 'process' else f'web-{os.getpid()}'
+        families = merge(with_labels(families, process=web),
+                         with_labels(sensors.metrics(), process='sensor'))
+    return Response(render(families), mimetype='text/plain; version=0.0.4')
 
 @app.route('/gettemperature')
 def gettemperature_api():
-    humidity, temperature = get_temperature()   
-    if humidity is not None and temperature is not None:
-        return jsonify(temperature=round(temperature, 1), humidity=round(humidity, 1), status="success")
+    snap = sensors.store.get()
+    age = snap.climate_age()
+    if snap.temperature is not None and age is not None and age <= DHT_MAX_AGE:
+        return jsonify(temperature=round(snap.temperature, 1), humidity=round(snap.humidity, 1),
+                       age=round(age, 1), status="success")
     return jsonify(status="error", message="센서 읽기 실패")
     
 def signal_handler(sig, frame):
-    print("\nCtrl+C 감지됨, 프로그램 종료.")
-    sys.exit(0)
+    # SIGTERM 도 Ctrl+C 와 같은 종료 경로(app.run 이후 finally)를 타도록 함
+    raise KeyboardInterrupt
 
-def save_to_db(temp, humid, dist, touch):
-    conn = None
-    cursor = None
-    try:
-        conn = mariadb.connect(**DB_CONFIG)
-        cursor = conn.cursor()
-        # [수정] 새 테이블 구조에 맞는 INSERT 쿼리
-        query = """
-            INSERT INTO Controller3 (temperature, humidity, distance, touch_detected)
-            VALUES (?, ?, ?, ?)
-        """
-        dist_to_save = dist if dist != -1 and dist < 400 else None
-        touch_to_save = 1 if touch else 0
-        
-        cursor.execute(query, (temp, humid, dist_to_save, touch_to_save))
-        conn.commit()
-        print(f"DB 저장 완료: Temp={temp}, Humid={humid}, Dist={dist_to_save}, Touch={touch}")
-    except mariadb.Error as e:
-        print(f"DB 저장 오류: {e}")
-    finally:
-        if cursor: cursor.close()
-        if conn: conn.close()
-
-def LoggerTask():
-    while True:
-        humidity, temperature = get_temperature()
-        distance = distance_cm 
-        touch = get_touch()
-        save_to_db(temperature, humidity, distance, touch)
-        time.sleep(SENSOR_POLL_INTERVAL)
-        
 if __name__ == '__main__':
-    atexit.register(cleanup_resources, led_pins=leds)
-    signal.signal(signal.SIGINT, signal_handler)
-    
-    threading.Thread(target=DistanceMonitorTask, daemon=True).start()
-    threading.Thread(target=LoggerTask, daemon=True).start()
-    
-    print("IoT 시스템 웹 서버 시작됨...")
-    app.run(port=5000, host='0.0.0.0')
+    signal.signal(signal.SIGTERM, signal_handler)
+    sensors.start()
 
+    print("IoT 시스템 웹 서버 시작됨...")
+    try:
+        app.run(port=5000, host='0.0.0.0')
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print("\n프로그램 종료 중...")
+        sensors.stop()
@@ -0,0 +1,123 @@
+# bench_db.py
+# 저장(INSERT)과 기록 조회(SELECT) 지연을 매번 connect 하는 방식과 연결 풀 방식으로 비교하고,
+# 행마다 commit 하는 저장과 배치 저장 큐(executemany)의 초당 저장 건수를 비교합니다.
+# 실제 Controller3 테이블을 쓰므로 측정용 행이 추가됩니다 (touch_detected = 2 로 표시해 두고 끝나면 지움).
+# 사용법: python bench_db.py [반복 횟수] [동시 조회 스레드 수]
+import statistics
+import sys
+import threading
+import time
+
+import mariadb
+
+from config import DB_CONFIG, HISTORY_PAGE_SIZE
+from iotcommon.batch_writer import BatchWriter
+from storage_mariadb import pool
+
+INSERT = "INSERT INTO Controller3 (temperature, humidity, distance, touch_detected) VALUES (?, ?, ?, 2)"
+SELECT = (f"SELECT log_time, temperature FROM Controller3 WHERE temperature IS NOT NULL "
+          f"ORDER BY log_time DESC LIMIT {HISTORY_PAGE_SIZE}")
+
+
+class Direct:
+    """예전 방식: 작업마다 새로 연결하고 닫음."""
+
+    def __enter__(self):
+        self.conn = mariadb.connect(**DB_CONFIG)
+        return self.conn
+
+    def __exit__(self, *exc):
+        self.conn.close()
+
+
+def insert(connection):
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(INSERT, (21.5, 40.0, 30.0))
+        conn.commit()
+        cursor.close()
+
+
+def query(connection):
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(SELECT)
+        cursor.fetchall()
+        cursor.close()
+
+
+def timings(func, connection, count):
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        func(connection)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def concurrent(func, connection, count, threads):
+    """threads 개 스레드가 동시에 count 번씩 호출할 때의 초당 처리량."""
+    def worker():
+        for _ in range(count):
+            func(connection)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return count * threads / (time.perf_counter() - start)
+
+
+def insert_many(rows):
+    with pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.executemany(INSERT, rows)
+        conn.commit()
+        cursor.close()
+
+
+def ingest(count):
+    """count 건을 행마다 commit 할 때와 배치 저장 큐로 넣을 때의 초당 저장 건수."""
+    start = time.perf_counter()
+    for _ in range(count):
+        insert(pool.connection)
+    single = count / (time.perf_counter() - start)
+
+    writer = BatchWriter(insert_many, batch_size=100, flush_interval=0.5, name='bench')
+    start = time.perf_counter()
+    for _ in range(count):
+        writer.put((21.5, 40.0, 30.0))
+    writer.close()
+    batched = writer.stats()['written'] / (time.perf_counter() - start)
+    return single, batched
+
+
+def report(name, samples):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{name:<22} 중앙값 {statistics.median(samples) * 1000:7.2f} ms   p95 {p95 * 1000:7.2f} ms")
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    query(pool.connection)  # 풀 생성은 측정에서 제외
+    print(f"반복 {count}회")
+    for name, connection in (('connect 매번', Direct), ('연결 풀', pool.connection)):
+        report(f"insert ({name})", timings(insert, connection, count))
+        report(f"history ({name})", timings(query, connection, count))
+    for name, connection in (('connect 매번', Direct), ('연결 풀', pool.connection)):
+        rate = concurrent(query, connection, count // threads or 1, threads)
+        print(f"history 동시 {threads}개 ({name}): {rate:8.1f} req/s")
+    single, batched = ingest(count * 5)
+    print(f"저장 처리량: 행마다 commit {single:8.1f} 건/s, 배치 저장 큐 {batched:8.1f} 건/s")
+    print(f"풀 통계: {pool.stats()}")
+
+    with pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM Controller3 WHERE touch_detected = 2")
+        conn.commit()
+        cursor.close()
@@ -0,0 +1,189 @@
+# bench_distance.py
+# 기존 busy-wait 에코 루프와 엣지 타임스탬프 방식(EchoTimer)의 정확도/CPU 사용량을 비교합니다.
+# 각 방식을 그냥 한 번, Flask 요청 처리처럼 CPU 를 쓰는 스레드(LOAD_THREADS 개)를 같이 돌리면서 한 번 재고
+# 네 경우를 한 표로 출력합니다.
+# 사용법: 센서 앞에 물체를 고정한 뒤  python bench_distance.py [측정 횟수]
+#         하드웨어 없이:  python bench_distance.py [측정 횟수] --simulate
+#         (--simulate 는 SIMULATED_CM 거리에서 에코가 돌아오는 가짜 GPIO 를 씀. 가짜 에코의 엣지도 파이썬 스레드가
+#          만들어서 그 스레드가 늦게 깨어난 만큼 엣지 방식의 값이 흔들리므로, 정확도와 부하 상황은 실제 센서에서만
+#          재고 --simulate 는 측정 한 번의 시간과 CPU 사용량만 비교함)
+import statistics
+import sys
+import threading
+import time
+import types
+
+SIMULATE = '--simulate' in sys.argv
+SIMULATED_CM = 30.0
+ECHO_DELAY = 0.0005      # s, 트리거 뒤 에코가 올라가기까지 (HC-SR04 의 초음파 발사 시간)
+LOAD_THREADS = 2
+SIMULATED_ECHO_PIN = 24  # sensor_utils.ECHO (가짜 GPIO 는 sensor_utils 보다 먼저 만들어야 해서 직접 적음)
+
+
+class SimulatedGPIO(types.ModuleType):
+    """RPi.GPIO 대역: TRIG 가 내려가면 ECHO_DELAY 뒤부터 SIMULATED_CM 의 펄스 폭만큼 ECHO 가 HIGH.
+    input() 은 그 시각표로 레벨을 돌려주고, 엣지 콜백은 별도 스레드에서 상승/하강 시각에 부릅니다."""
+
+    BCM = 'BCM'
+    IN = 'IN'
+    OUT = 'OUT'
+    BOTH = 'BOTH'
+
+    def __init__(self):
+        super().__init__('RPi.GPIO')
+        self.callbacks = {}
+        self.levels = {}
+        self.echo = (float('inf'), float('inf'))   # (상승 시각, 하강 시각) monotonic
+
+    def setmode(self, mode):
+        pass
+
+    def setup(self, pins, mode):
+        pass
+
+    def input(self, pin):
+        rise, fall = self.echo
+        return 1 if rise <= time.monotonic() < fall else 0
+
+    def output(self, pin, value):
+        was_high = self.levels.get(pin)
+        self.levels[pin] = value
+        if was_high and not value:
+            rise = time.monotonic() + ECHO_DELAY
+            self.echo = (rise, rise + SIMULATED_CM / SOUND_SPEED_HALF)
+            threading.Thread(target=self._edges, args=self.echo, daemon=True).start()
+
+    def _edges(self, rise, fall):
+        for at in (rise, fall):
+            time.sleep(max(0.0, at - time.monotonic()))
+            for echo_pin, callback in list(self.callbacks.items()):
+                callback(echo_pin)
+
+    def add_event_detect(self, pin, edge, callback=None, bouncetime=None):
+        if pin == SIMULATED_ECHO_PIN:   # 터치 핀 콜백은 에코와 무관
+            self.callbacks[pin] = callback
+
+    def remove_event_detect(self, pin):
+        self.callbacks.pop(pin, None)
+
+    def cleanup(self):
+        pass
+
+
+class IdleDHT11:
+    def __init__(self, pin):
+        self.pin = pin
+
+
+if SIMULATE:
+    SOUND_SPEED_HALF = 17150
+    gpio = SimulatedGPIO()
+    rpi = types.ModuleType('RPi')
+    rpi.GPIO = gpio
+    sys.modules.update({
+        'RPi': rpi,
+        'RPi.GPIO': gpio,
+        'board': types.SimpleNamespace(D26='D26'),
+        'adafruit_dht': types.SimpleNamespace(DHT11=IdleDHT11),
+        'lgpio': None,
+    })
+
+from sensor_utils import GPIO, TRIG, ECHO, SOUND_SPEED_HALF, echo_timer  # noqa: E402 (가짜 GPIO 를 먼저 등록)
+
+
+def busy_wait_distance():
+    """기존 방식: GPIO.input 을 돌면서 time.time() 으로 펄스 폭을 잽니다."""
+    GPIO.output(TRIG, True)
+    time.sleep(0.00001)
+    GPIO.output(TRIG, False)
+
+    pulse_start = time.time()
+    pulse_end = time.time()
+    timeout = pulse_start + 0.1
+    while GPIO.input(ECHO) == 0 and pulse_start < timeout:
+        pulse_start = time.time()
+    while GPIO.input(ECHO) == 1 and pulse_end < timeout:
+        pulse_end = time.time()
+    return (pulse_end - pulse_start) * SOUND_SPEED_HALF
+
+
+def edge_distance():
+    """새 방식: 엣지 이벤트 타임스탬프로 펄스 폭을 잽니다."""
+    pulse_ns = echo_timer.measure(TRIG)
+    if pulse_ns is None:
+        return None
+    return pulse_ns / 1e9 * SOUND_SPEED_HALF
+
+
+def cpu_load(stop):
+    """요청을 처리하는 Flask 스레드 대역: GIL 을 두고 측정 스레드와 경쟁합니다."""
+    while not stop.is_set():
+        sum(i * i for i in range(2000))
+
+
+def run(measure, samples, load):
+    """samples 번 재서 {'valid', 'mean', 'stdev', 'p95_error', 'wall_ms', 'cpu_ms'} 를 반환합니다.
+    CPU 는 부하 스레드가 없을 때만 의미가 있으므로 load 가 있으면 None."""
+    stop = threading.Event()
+    workers = [threading.Thread(target=cpu_load, args=(stop,), daemon=True) for _ in range(load)]
+    for worker in workers:
+        worker.start()
+    values = []
+    cpu = wall = 0.0
+    try:
+        for _ in range(samples):
+            time.sleep(0.06)  # 이전 에코가 사라질 때까지 대기 (CPU 를 쓰지 않으므로 측정 비용에서 뺌)
+            cpu_start, wall_start = time.process_time(), time.perf_counter()
+            d = measure()
+            cpu += time.process_time() - cpu_start
+            wall += time.perf_counter() - wall_start
+            if d is not None and 0 < d < 400:
+                values.append(d)
+    finally:
+        stop.set()
+        for worker in workers:
+            worker.join()
+    result = {'valid': len(values), 'mean': None, 'stdev': None, 'p95_error': None,
+              'wall_ms': wall * 1000 / samples, 'cpu_ms': None if load else cpu * 1000 / samples}
+    if len(values) >= 2:
+        errors = sorted(abs(v - statistics.median(values)) for v in values)
+        result.update(mean=statistics.mean(values), stdev=statistics.stdev(values),
+                      p95_error=errors[int(len(errors) * 0.95) - 1])
+    return result
+
+
+def report(results, samples):
+    def cell(value, digits):
+        return '-' if value is None else f"{value:.{digits}f}"
+
+    names = list(results)
+    print(f"{'':<22}" + ''.join(f"{name:>16}" for name in names))
+    rows = [('유효 측정', lambda r: f"{r['valid']}/{samples}")]
+    if not SIMULATE:
+        rows += [('평균 (cm)', lambda r: cell(r['mean'], 2)),
+                 ('표준편차 (cm)', lambda r: cell(r['stdev'], 3)),
+                 ('p95 |x-중앙값| (cm)', lambda r: cell(r['p95_error'], 3))]
+    rows += [('측정 시간 (ms/측정)', lambda r: cell(r['wall_ms'], 3)),
+             ('CPU (ms/측정)', lambda r: cell(r['cpu_ms'], 3))]
+    for label, value in rows:
+        print(f"{label:<22}" + ''.join(f"{value(results[name]):>16}" for name in names))
+
+
+if __name__ == '__main__':
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    samples = int(args[0]) if args else 200
+    GPIO.output(TRIG, False)
+    time.sleep(0.5)
+    try:
+        results = {
+            'busy-wait': run(busy_wait_distance, samples, 0),
+            'edge': run(edge_distance, samples, 0),
+        }
+        if not SIMULATE:
+            results[f'busy-wait+부하{LOAD_THREADS}'] = run(busy_wait_distance, samples, LOAD_THREADS)
+            results[f'edge+부하{LOAD_THREADS}'] = run(edge_distance, samples, LOAD_THREADS)
+        print(f"{'가짜 GPIO, ' + str(SIMULATED_CM) + ' cm' if SIMULATE else '실제 센서'}, 측정 {samples}회씩")
+        report(results, samples)
+    finally:
+        echo_timer.close()
+        GPIO.cleanup()
@@ -0,0 +1,72 @@
+# bench_http_load.py
+# HTTP 부하를 주는 동안 거리 측정값의 분산과 측정 지터를 thread 모드와 process 모드에서 비교합니다.
+# 사용법: 센서 앞에 물체를 고정한 뒤  python bench_http_load.py [부하 시간(s)] [클라이언트 수]
+import logging
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+PATHS = ['/', '/gettemperature', '/getdistance', '/gettouch', '/gethistory/distance?n=50']
+
+
+def load(base_url, stop, counter):
+    i = 0
+    while not stop.is_set():
+        try:
+            with urllib.request.urlopen(base_url + PATHS[i % len(PATHS)]) as res:
+                res.read()
+            counter[0] += 1
+        except Exception:
+            pass
+        i += 1
+
+
+def worker(mode, seconds, clients):
+    """한 모드로 앱을 띄우고 부하를 준 뒤 결과를 출력합니다 (모드마다 별도 프로세스에서 실행)."""
+    import config
+    config.ACQUISITION_MODE = mode
+    from werkzeug.serving import make_server
+    import app
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)  # 요청 로그 출력 비용 제외
+    app.sensors.start()
+    server = make_server('127.0.0.1', 0, app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    time.sleep(2)  # 센서 워밍업
+
+    stop = threading.Event()
+    counter = [0]
+    threads = [threading.Thread(target=load, args=(base_url, stop, counter), daemon=True)
+               for _ in range(clients)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    values = [value for _, value in app.sensors.history['distance'].since(seconds)]
+    stats = app.sensors.stats()['distance']
+    print(f"[{mode}] 요청 {counter[0] / seconds:.1f} req/s, 거리 측정 {len(values)}회")
+    if len(values) >= 2:
+        print(f"  거리 평균 {statistics.mean(values):.2f} cm, 표준편차 {statistics.stdev(values):.3f} cm, "
+              f"범위 {min(values):.1f}~{max(values):.1f} cm")
+    print(f"  측정 지터 평균 {stats['avg_jitter_ms']} ms, 최대 {stats['max_jitter_ms']} ms")
+
+    server.shutdown()
+    app.sensors.stop()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--worker':
+        worker(sys.argv[2], float(sys.argv[3]), int(sys.argv[4]))
+        sys.exit(0)
+
+    seconds = sys.argv[1] if len(sys.argv) > 1 else '30'
+    clients = sys.argv[2] if len(sys.argv) > 2 else '8'
+    for mode in ('thread', 'process'):
+        subprocess.run([sys.executable, __file__, '--worker', mode, seconds, clients], check=True)
@@ -0,0 +1,111 @@
+# bench_serving.py
+# 개발 서버(app.py, Werkzeug 단일 프로세스)와 운영 모드(serve.py, 센서 소유 프로세스 + 워커 여러 개)의
+# 처리량을 비교합니다. 부하는 여러 클라이언트 프로세스가 대시보드 API 를 번갈아 호출해서 만듭니다.
+# 사용법: python bench_serving.py [부하 시간(s)] [클라이언트 수] [워커 수]
+import http.client
+import logging
+import multiprocessing
+import os
+import subprocess
+import sys
+import threading
+import time
+
+PATHS = ['/api/v1/snapshot', '/gettemperature', '/getdistance', '/gettouch', '/gethistory/distance?n=50']
+DEV_PORT = 5091
+PROD_PORT = 5092
+
+
+def client(port, seconds, results):
+    """keep-alive 연결 하나로 seconds 동안 요청을 보내고 (성공, 실패) 횟수를 넣습니다."""
+    done = failed = 0
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+    deadline = time.monotonic() + seconds
+    i = 0
+    while time.monotonic() < deadline:
+        try:
+            conn.request('GET', PATHS[i % len(PATHS)])
+            conn.getresponse().read()
+            done += 1
+        except (OSError, http.client.HTTPException):
+            failed += 1
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+        i += 1
+    results.put((done, failed))
+
+
+def load(port, seconds, clients):
+    ctx = multiprocessing.get_context('spawn')
+    results = ctx.Queue()
+    procs = [ctx.Process(target=client, args=(port, seconds, results)) for _ in range(clients)]
+    for p in procs:
+        p.start()
+    totals = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    return sum(d for d, _ in totals), sum(f for _, f in totals)
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/gettouch')
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"서버가 {port} 에서 응답하지 않습니다")
+
+
+def run_dev_server():
+    """app.py 의 app.run() 과 같은 구성 (thread 모드, Werkzeug threaded)."""
+    from werkzeug.serving import make_server
+    import app
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)  # 요청 로그 출력 비용 제외
+    app.sensors.start()
+    server = make_server('127.0.0.1', DEV_PORT, app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        sys.stdin.read()    # 부모가 stdin 을 닫으면 종료
+    finally:
+        server.shutdown()
+        app.sensors.stop()
+
+
+def measure(name, server, port, seconds, clients):
+    try:
+        wait_for_port(port)
+        time.sleep(2)   # 센서 워밍업
+        done, failed = load(port, seconds, clients)
+        print(f"{name:<28} {done / seconds:8.1f} req/s (실패 {failed})")
+    finally:
+        if server.stdin:
+            server.stdin.close()
+        else:
+            server.terminate()
+        server.wait()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--dev':
+        run_dev_server()
+        sys.exit(0)
+
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 20
+    clients = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    workers = sys.argv[3] if len(sys.argv) > 3 else str(os.cpu_count() or 2)
+    here = os.path.dirname(os.path.abspath(__file__))
+    quiet = {'stdout': subprocess.DEVNULL, 'stderr': subprocess.DEVNULL}
+
+    print(f"클라이언트 {clients}개, {seconds:.0f}초")
+    measure('dev server (app.py)',
+            subprocess.Popen([sys.executable, __file__, '--dev'], cwd=here,
+                             stdin=subprocess.PIPE, **quiet),
+            DEV_PORT, seconds, clients)
+    measure(f'serve.py (워커 {workers}개)',
+            subprocess.Popen([sys.executable, 'serve.py', workers, f'127.0.0.1:{PROD_PORT}'], cwd=here, **quiet),
+            PROD_PORT, seconds, clients)
@@ -0,0 +1,78 @@
+# bench_storage.py
+# 저장소 구현(storage.py)별로 배치 저장 처리량과 최근 N개/기간 조회/집계 지연을 측정합니다.
+# sqlite 는 임시 파일에서 측정하므로 DB 서버 없이 돌릴 수 있습니다.
+# mariadb 는 실제 테이블에 2000년 1월 시각으로 측정용 행을 넣고 끝나면 지웁니다.
+# 사용법: python bench_storage.py [sqlite | mariadb] [행 수]
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from config import HISTORY_SENSORS, HISTORY_PAGE_SIZE
+from storage import open_storage, ROLLUP_TABLES
+from storage_sqlite import SqliteStorage
+
+START = datetime(2000, 1, 1)
+INTERVAL = 5  # seconds, 센서 기록 주기와 같게
+
+
+def rows(count):
+    return [(20 + i % 10, 40 + i % 7, 30.0 + i % 13, i % 2, START + timedelta(seconds=i * INTERVAL))
+            for i in range(count)]
+
+
+def report(name, samples):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{name:<22} 중앙값 {statistics.median(samples) * 1000:7.2f} ms   p95 {p95 * 1000:7.2f} ms")
+
+
+def timings(func, count=50):
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def cleanup(storage):
+    with storage.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM Controller3 WHERE log_time < ?", (storage.to_db(START + timedelta(days=31)),))
+        for table in ROLLUP_TABLES.values():
+            cursor.execute(f"DELETE FROM {table} WHERE bucket < ?", (storage.to_db(START + timedelta(days=31)),))
+        conn.commit()
+        cursor.close()
+
+
+if __name__ == '__main__':
+    backend = sys.argv[1] if len(sys.argv) > 1 else 'sqlite'
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 50000
+    if backend == 'sqlite':
+        storage = SqliteStorage(os.path.join(tempfile.mkdtemp(), 'bench.db'), HISTORY_SENSORS)
+    else:
+        storage = open_storage(backend, HISTORY_SENSORS)
+    storage.prepare()
+
+    data = rows(count)
+    start = time.perf_counter()
+    for i in range(0, count, 100):
+        storage.insert_batch(data[i:i + 100])
+    elapsed = time.perf_counter() - start
+    print(f"{backend}: 배치 저장 {count}건 {elapsed:.2f}s ({count / elapsed:8.1f} 건/s)")
+
+    # 원본 기록 기간을 조회 시점 기준으로 옮겨 계산하지 않도록 since 를 직접 지정
+    since = START + timedelta(seconds=count * INTERVAL) - timedelta(hours=1)
+    report("latest", timings(lambda: storage.latest('temperature', HISTORY_PAGE_SIZE)))
+    report("range (원본 1시간)", timings(lambda: storage.range_query('temperature', since)))
+    report("range (1분, 전체)", timings(lambda: storage.range_query('temperature', START, 60)))
+    report("range (1시간, 전체)", timings(lambda: storage.range_query('temperature', START, 3600)))
+    report("aggregate (1분, 전체)", timings(lambda: storage.aggregate('temperature', START)))
+    print(f"집계: {storage.aggregate('temperature', START)}")
+    print(f"저장소 통계: {storage.stats()}")
+
+    if backend != 'sqlite':
+        cleanup(storage)
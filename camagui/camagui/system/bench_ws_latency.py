@@ -0,0 +1,84 @@
+# bench_ws_latency.py
+# LED 한 번 바꾸는 왕복 시간을 기존 방식(GET /<n>/<state> → redirect → 페이지 다시 그리기)과
+# WebSocket 제어 채널(/ws 명령 → ack)로 비교합니다.
+# 사용법: python bench_ws_latency.py [횟수] [서버 주소]
+#   서버 주소를 주지 않으면 이 앱을 같은 프로세스 안에서 띄워서 측정합니다.
+#   예) python bench_ws_latency.py 200 http://raspberrypi.local:8080   (week03/project 앱)
+import json
+import logging
+import statistics
+import sys
+import threading
+import time
+import urllib.request
+
+import simple_websocket  # flask-sock 설치 시 같이 설치됨
+
+
+def summarize(name, samples):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{name:<12} 평균 {statistics.mean(samples):7.2f} ms, 중앙값 {statistics.median(samples):7.2f} ms, "
+          f"p95 {p95:7.2f} ms, 최대 {samples[-1]:7.2f} ms")
+
+
+def bench_redirect(base_url, count):
+    samples = []
+    for i in range(count):
+        start = time.perf_counter()
+        # urlopen 은 redirect 를 따라가므로 브라우저처럼 index 페이지까지 받아옴
+        with urllib.request.urlopen(f"{base_url}/0/{i % 2}") as res:
+            res.read()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def bench_websocket(base_url, count):
+    ws = simple_websocket.Client.connect(base_url.replace('http', 'ws', 1) + '/ws')
+    samples = []
+    try:
+        for i in range(count):
+            start = time.perf_counter()
+            ws.send(json.dumps({'id': i, 'leds': {'0': i % 2}}))
+            while True:
+                message = json.loads(ws.receive())
+                if message.get('type') == 'ack' and message.get('id') == i:
+                    break
+            if not message['ok']:
+                raise RuntimeError(message['error'])
+            samples.append((time.perf_counter() - start) * 1000)
+    finally:
+        ws.close()
+    return samples
+
+
+def start_local_server():
+    from werkzeug.serving import make_server
+    import app
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)  # 요청 로그 출력 비용 제외
+    app.sensors.start()
+    server = make_server('127.0.0.1', 0, app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    time.sleep(2)  # 센서 워밍업
+
+    def stop():
+        server.shutdown()
+        app.sensors.stop()
+    return f"http://127.0.0.1:{server.server_port}", stop
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    if len(sys.argv) > 2:
+        base_url, stop = sys.argv[2].rstrip('/'), None
+    else:
+        base_url, stop = start_local_server()
+
+    try:
+        print(f"LED 전환 {count}회 왕복 시간 ({base_url})")
+        summarize('redirect', bench_redirect(base_url, count))
+        summarize('websocket', bench_websocket(base_url, count))
+    finally:
+        if stop:
+            stop()
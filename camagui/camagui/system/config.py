@@ -1,7 +1,10 @@
 # config.py
 # 이 파일은 프로젝트 전체에서 사용하는 설정 값들을 보관합니다.
+import os
 
 # DB info
+DB_BACKEND = 'mariadb'  # 'mariadb': DB_CONFIG 의 MariaDB 서버, 'sqlite': SQLITE_PATH 파일에 저장 (DB 서버 불필요)
+SQLITE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'Controller3.db')
 DB_CONFIG = {
     'host': '127.0.0.1',
     'port': 3306,
@@ -9,8 +12,56 @@ DB_CONFIG = {
     'password': 'power2',
     'database': 'IOT'
 }
+DB_POOL_SIZE = 4  # 연결 풀 크기 (프로세스마다 하나의 풀)
+DB_POOL_TIMEOUT = 2.0  # seconds, 풀의 연결이 모두 사용 중일 때 기다릴 최대 시간
+DB_PING_INTERVAL = 30  # seconds, 이보다 오래 쉰 연결은 꺼낼 때 ping 으로 확인하고 끊겼으면 재연결
+DB_BATCH_SIZE = 100  # 배치 저장: 이만큼 모이면 바로 한 번에 저장
+DB_FLUSH_INTERVAL = 5.0  # seconds, 배치 저장: 첫 기록이 들어온 뒤 최대 이만큼 모았다가 저장
+DB_QUEUE_LIMIT = 10000  # 저장 대기 큐 최대 길이, 넘으면 기록하는 쪽을 잠깐 기다리게 하고 그래도 차 있으면 버림
+DB_PUT_TIMEOUT = 0.05  # seconds, 큐가 가득 찼을 때 기록하는 쪽이 기다릴 최대 시간
+# DB 가 꺼져 있거나 느려서 못 쓴 기록을 모아 두는 디스크 스풀 파일 (DB 가 돌아오면 다시 씀)
+SPOOL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'spool', 'Controller3.spool')
+SPOOL_REPLAY_INTERVAL = 10  # seconds, 스풀에 남은 기록을 DB 로 옮기는 작업 주기
+SPOOL_REPLAY_BATCH = 500  # 스풀에서 한 번에 옮길 행 수
+
+# LED GPIO
+LED_PINS = [17, 22, 27]
 
 # sensor settings
 ALERT_THRESHOLD = 10
 SENSOR_POLL_INTERVAL = 5  # seconds
+DISTANCE_POLL_INTERVAL = 0.5  # seconds
+TOUCH_POLL_INTERVAL = 0.5  # seconds, 터치 자체는 인터럽트로 감지하고 이 주기로 발행만 함
+DHT_SAMPLE_INTERVAL = 2.0  # seconds, DHT11 은 이보다 자주 읽을 수 없음
+DHT_MAX_AGE = 10  # seconds, 이보다 오래된 온습도 값은 응답하지 않음
+DHT_READ_TIMEOUT = 5  # seconds, DHT 드라이버 호출이 이보다 오래 걸리면 그 주기는 실패 처리
+DISTANCE_READ_TIMEOUT = 1.0  # seconds, 에코가 영영 안 돌아와도 이 시간 뒤 포기
+TOUCH_DEBOUNCE_MS = 50  # milliseconds, 이 시간 안의 터치 엣지는 채터링으로 무시
+SINGLE_FLIGHT_WINDOW = 0.1  # seconds, 같은 장치 읽기가 이 시간 안에 끝났으면 다시 읽지 않고 결과 재사용
+
+# history settings
+HISTORY_SENSORS = ('temperature', 'humidity', 'distance')
+HISTORY_CAPACITY = 2048  # 센서별 메모리 링 버퍼 크기 (개)
+HISTORY_PAGE_SIZE = 10  # 기록 페이지에 보여줄 개수
+HISTORY_MAX_POINTS = 1000  # 기간 조회에서 이보다 많아지면 1분/1시간 집계로 해상도를 낮춤
+
+# retention settings (보관 기간이 지난 기록은 파티션 단위로 통째로 삭제)
+RETENTION_DAYS = {'raw': 7, 'minute': 90, 'hour': None}  # days, None 이면 영구 보관
+PARTITION_AHEAD = 3  # 미리 만들어 둘 미래 파티션 개수 (원본은 일 단위, 1분 집계는 월 단위)
+MAINTENANCE_INTERVAL = 3600  # seconds, 파티션 추가/삭제 작업 주기
+
+# stream settings
+STREAM_POLL_INTERVAL = 0.25  # seconds, /stream 이 스냅샷 변경을 확인하는 주기
+STREAM_KEEPALIVE = 15  # seconds, 변경이 없을 때 연결 유지용 주석을 보내는 주기
+
+# acquisition settings
+ACQUISITION_MODE = 'thread'  # 'thread': 웹 서버 프로세스 안에서 센서 읽기, 'process': 별도 센서 프로세스
+#                            'client': serve.py 가 띄운 센서 소유 프로세스에 붙는 HTTP 워커 (직접 설정하지 않음)
+SENSOR_CPU = None  # 'process' 모드에서 센서 프로세스를 고정할 CPU 코어 번호 (예: 3), None 이면 고정 안 함
 
+# serving settings (serve.py 운영 모드)
+SERVE_BIND = '0.0.0.0:5000'
+SERVE_WORKERS = 2  # HTTP 워커 프로세스 수
+SERVE_THREADS = 8  # 워커당 요청 처리 스레드 수 (/stream, /ws 연결도 하나씩 차지)
+SENSOR_SHM_NAME = 'camagui_sensors'  # 센서 소유 프로세스의 공유 메모리 이름
+SENSOR_SOCKET = '/tmp/camagui_sensors.sock'  # 워커가 명령을 보내는 유닉스 소켓
@@ -0,0 +1,90 @@
+# control_channel.py
+# 대시보드와 서버 사이의 WebSocket 제어 채널(/ws). flask-sock 이 설치되어 있을 때만 켜집니다.
+#
+# 클라이언트 → 서버:  {"id": 7, "leds": {"0": 1, "2": 0}}
+# 서버 → 보낸 쪽:      {"type": "ack", "id": 7, "ok": true, "seq": 42, "leds": [1, 0, 0]}
+# 서버 → 나머지 전부:  {"type": "state", "seq": 42, "leds": [1, 0, 0]}
+import json
+import threading
+
+try:
+    from flask_sock import Sock
+    SOCK_AVAILABLE = True
+except ImportError:
+    Sock = None
+    SOCK_AVAILABLE = False
+
+
+class _Client:
+    """연결 하나. 여러 스레드가 같은 소켓에 동시에 쓰지 않도록 send 를 직렬화합니다."""
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.lock = threading.Lock()
+
+    def send(self, message):
+        with self.lock:
+            self.ws.send(json.dumps(message))
+
+
+class ControlChannel:
+    """연결된 대시보드 목록을 관리하고 명령 응답(ack)과 상태 변경 알림(broadcast)을 보냅니다."""
+
+    def __init__(self):
+        self._clients = set()
+        self._lock = threading.Lock()
+
+    def register(self, app, on_command, path='/ws'):
+        """app 에 WebSocket 라우트를 추가합니다. on_command(cmd) 는 결과 dict 를 반환하고
+        잘못된 명령이면 ValueError 를 냅니다. flask-sock 이 없으면 False 를 반환합니다."""
+        if not SOCK_AVAILABLE:
+            print("flask-sock 이 없어 WebSocket 제어 채널을 끕니다 (pip install flask-sock)")
+            return False
+        sock = Sock(app)
+
+        @sock.route(path)
+        def control(ws):
+            self.serve(ws, on_command)
+
+        return True
+
+    def clients(self):
+        with self._lock:
+            return len(self._clients)
+
+    def broadcast(self, message, exclude=None):
+        with self._lock:
+            clients = [client for client in self._clients if client is not exclude]
+        for client in clients:
+            try:
+                client.send(message)
+            except Exception:
+                # 끊긴 연결은 serve() 쪽에서 정리되지만 더 보내지 않도록 바로 뺌
+                self._remove(client)
+
+    def serve(self, ws, on_command):
+        client = _Client(ws)
+        with self._lock:
+            self._clients.add(client)
+        try:
+            while True:
+                raw = ws.receive()
+                cmd_id = None
+                try:
+                    cmd = json.loads(raw)
+                    if not isinstance(cmd, dict):
+                        raise ValueError("명령은 JSON 객체여야 합니다")
+                    cmd_id = cmd.get('id')
+                    result = on_command(cmd)
+                except ValueError as e:
+                    client.send({'type': 'ack', 'id': cmd_id, 'ok': False, 'error': str(e)})
+                    continue
+                client.send({'type': 'ack', 'id': cmd_id, 'ok': True, **result})
+                # 보낸 쪽은 ack 로 이미 알고 있으므로 나머지 대시보드에만 알림
+                self.broadcast({'type': 'state', **result}, exclude=client)
+        finally:
+            self._remove(client)
+
+    def _remove(self, client):
+        with self._lock:
+            self._clients.discard(client)
@@ -0,0 +1,139 @@
+# db.py
+# 센서 기록 저장/조회 함수를 모아 둡니다. 실제 DB 작업은 config.DB_BACKEND 로 고른 저장소(storage.py)가 하고,
+# 저장은 배치 저장 큐(iotcommon/batch_writer.py)에 넣어 모아서 한 번에 씁니다.
+# DB 가 꺼져 있거나 느려서 쓰지 못한 기록은 디스크 스풀(iotcommon/spool.py)에 남겼다가 DB 가 돌아오면 옮깁니다.
+import threading
+from datetime import datetime, timedelta
+
+from config import (DB_BACKEND, HISTORY_PAGE_SIZE, HISTORY_SENSORS, HISTORY_MAX_POINTS, SENSOR_POLL_INTERVAL,
+                    DB_BATCH_SIZE, DB_FLUSH_INTERVAL, DB_QUEUE_LIMIT, DB_PUT_TIMEOUT,
+                    SPOOL_PATH, SPOOL_REPLAY_BATCH)
+from iotcommon.batch_writer import BatchWriter
+from iotcommon.spool import Spool
+from iotcommon.rollup import choose_resolution
+from storage import open_storage
+from metrics import REGISTRY
+
+# 저장(LoggerTask)과 조회(/history)가 함께 쓰는 저장소 (DB_BACKEND: 'mariadb' 또는 'sqlite')
+storage = open_storage(DB_BACKEND, HISTORY_SENSORS)
+schema_ready = threading.Event()
+
+
+def prepare_db():
+    """스키마 마이그레이션을 적용합니다. 센서 소유 프로세스가 시작할 때 한 번 부르고,
+    그때 DB 가 꺼져 있었으면 스풀 재저장/보관 기간 정리 작업이 다시 시도합니다. 준비되었으면 True."""
+    if schema_ready.is_set():
+        return True
+    try:
+        storage.prepare()
+    except storage.Error as e:
+        print(f"DB 스키마 준비 오류 (나중에 다시 시도): {e}")
+        return False
+    schema_ready.set()
+    return True
+
+
+def insert_readings(rows):
+    """(temp, humid, dist, touch, 시각) 행들과 그 1분/1시간 집계를 한 트랜잭션으로 저장합니다."""
+    storage.insert_batch(rows)
+    print(f"DB 저장 완료: {len(rows)}건")
+
+
+# DB 에 쓰지 못한 기록을 모아 두는 디스크 스풀. replay_spool() 이 주기적으로 DB 로 옮김
+spool = Spool(SPOOL_PATH)
+
+
+def spool_rows(rows, error=None):
+    """저장에 실패한 배치를 스풀에 남깁니다 (BatchWriter 의 on_error)."""
+    spool.append(rows)
+    print(f"DB 에 쓰지 못한 기록 {len(rows)}건을 스풀에 남겼습니다")
+
+
+# 모든 저장 요청을 모아서 쓰는 큐. DB_BATCH_SIZE 개가 모이거나 DB_FLUSH_INTERVAL 초가 지나면 저장
+log_writer = BatchWriter(insert_readings, batch_size=DB_BATCH_SIZE, flush_interval=DB_FLUSH_INTERVAL,
+                         max_pending=DB_QUEUE_LIMIT, put_timeout=DB_PUT_TIMEOUT, on_error=spool_rows,
+                         name='camagui')
+
+REGISTRY.callback('db_writer_rows_total', '배치 저장 큐 행 수 (state=queued/written/dropped)', 'counter',
+                  lambda: {(state,): log_writer.stats()[state] for state in ('queued', 'written', 'dropped')},
+                  ('state',))
+REGISTRY.callback('db_writer_batches_total', '배치 저장 횟수 (result=ok/failed)', 'counter',
+                  lambda: {('ok',): log_writer.stats()['batches'],
+                           ('failed',): log_writer.stats()['failed_batches']},
+                  ('result',))
+REGISTRY.callback('db_writer_pending', '배치 저장 큐에 쌓여 있는 행 수', 'gauge',
+                  lambda: log_writer.stats()['pending'])
+REGISTRY.callback('db_spool_rows_total', '스풀 행 수 (state=spooled/replayed)', 'counter',
+                  lambda: {(state,): spool.stats()[state] for state in ('spooled', 'replayed')},
+                  ('state',))
+REGISTRY.callback('db_spool_pending_bytes', '스풀에 남아 DB 로 옮기지 못한 기록 크기 (bytes)', 'gauge',
+                  lambda: spool.pending_bytes())
+
+
+def save_to_db(temp, humid, dist, touch):
+    """기록 한 건을 배치 저장 큐에 넣습니다. DB 를 기다리지 않고 바로 반환합니다."""
+    dist_to_save = dist if dist != -1 and dist < 400 else None
+    touch_to_save = 1 if touch else 0
+    # 저장 시각은 큐에 넣는 시점 (배치로 늦게 써도 측정 시각이 밀리지 않음)
+    row = (temp, humid, dist_to_save, touch_to_save, datetime.now())
+    if not log_writer.put(row):
+        # DB 가 느려서 큐가 가득 찼으면 버리지 않고 바로 스풀에 남김
+        spool_rows([row])
+
+
+def close_db():
+    """큐에 남은 기록을 모두 저장합니다 (종료 시 호출)."""
+    log_writer.close()
+    stats = log_writer.stats()
+    print(f"DB 저장 큐 종료: 저장 {stats['written']}건, 스풀 {spool.stats()['spooled']}건, "
+          f"스풀에 남은 기록 {spool.pending_bytes()} bytes")
+
+
+def replay_spool():
+    """스풀에 남은 기록을 SPOOL_REPLAY_BATCH 개씩 DB 로 옮깁니다 (센서 허브가 주기적으로 호출).
+    DB 가 아직 돌아오지 않았으면 다음 주기에 다시 시도합니다."""
+    if spool.pending_bytes() == 0 or not prepare_db():
+        return
+    try:
+        moved = spool.drain(insert_readings, SPOOL_REPLAY_BATCH)
+    except storage.Error as e:
+        print(f"스풀 재저장 오류 (다음 주기에 다시 시도): {e}")
+        return
+    if moved:
+        print(f"스풀 기록 {moved}건을 DB 로 옮겼습니다")
+
+
+def load_history_from_db(sensor_type):
+    """Controller3 에서 sensor_type 컬럼의 최근 기록을 가져옵니다. sensor_type 은 검증된 컬럼명이어야 합니다."""
+    try:
+        return storage.latest(sensor_type, HISTORY_PAGE_SIZE)
+    except storage.Error as e:
+        print(f"DB 조회 오류: {e}")
+        return []
+
+
+def load_history_range(sensor_type, seconds):
+    """최근 seconds 초의 기록을 (해상도, [(시각, 평균, 최소, 최대, 개수), ...]) 로 가져옵니다.
+
+    HISTORY_MAX_POINTS 개 이하가 되는 가장 세밀한 해상도(원본/1분/1시간)를 골라서 읽습니다.
+    sensor_type 은 검증된 컬럼명이어야 합니다.
+    """
+    resolution, bucket = choose_resolution(seconds, SENSOR_POLL_INTERVAL, HISTORY_MAX_POINTS)
+    try:
+        points = storage.range_query(sensor_type, datetime.now() - timedelta(seconds=seconds), bucket)
+    except storage.Error as e:
+        print(f"DB 조회 오류: {e}")
+        points = []
+    return resolution, points
+
+
+def run_maintenance():
+    """보관 기간(RETENTION_DAYS)이 지난 기록을 정리합니다 (센서 허브가 주기적으로 호출).
+    MariaDB 는 미래 파티션을 만들고 지난 파티션을 지우고, SQLite 는 지난 행을 지웁니다."""
+    if not prepare_db():
+        return
+    try:
+        for table, summary in storage.maintain():
+            print(f"보관 기간 정리 ({table}): {summary}")
+    except storage.Error as e:
+        print(f"보관 기간 정리 오류: {e}")
@@ -0,0 +1,3 @@
+# iotcommon
+# camagui 와 jyw/week03 이 함께 쓰는 모듈입니다 (DB 연결 풀, 배치 저장, 스풀, 마이그레이션, 파티션, 롤업, 정적 파일).
+# camagui 는 이 패키지가 있는 system 디렉터리에서 실행하고, jyw 는 shared_path.py 로 이 위치를 import 경로에 추가합니다.
@@ -0,0 +1,89 @@
+# assets.py
+# 정적 파일 이름에 내용 해시를 붙이고, gzip 으로 미리 압축해 두고, 브라우저가 다시 묻지 않도록
+# immutable 로 캐시되게 서빙합니다. 템플릿의 url_for('static', filename=...) 는 자동으로
+# 해시된 이름(js/script.3f2a9c1b7e04.js)으로 바뀌므로 템플릿은 고칠 필요가 없습니다.
+import gzip
+import hashlib
+import mimetypes
+import os
+import posixpath
+
+from flask import Response, request
+
+COMPRESSIBLE = ('.css', '.js', '.json', '.svg', '.html', '.txt')
+# 서비스 워커는 등록 주소가 바뀌면 안 되고 항상 새로 확인해야 하므로 해시/장기 캐시에서 제외
+UNHASHED = frozenset({'js/sw.js', 'sw.js'})
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+class Asset:
+    __slots__ = ('data', 'gzip_data', 'mimetype', 'etag')
+
+    def __init__(self, data, gzip_data, mimetype, etag):
+        self.data = data
+        self.gzip_data = gzip_data
+        self.mimetype = mimetype
+        self.etag = etag
+
+
+class StaticAssets:
+    """앱 시작 시 static 폴더를 한 번 훑어서 해시 이름과 압축본을 메모리에 만들어 둡니다."""
+
+    def __init__(self, app=None, exclude=UNHASHED):
+        self.exclude = exclude
+        self.manifest = {}   # 원래 이름 -> 해시 이름
+        self.assets = {}     # 해시 이름 -> Asset
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.folder = app.static_folder
+        self._build()
+        self._send_static_file = app.send_static_file
+        app.url_defaults(self._rewrite)
+        # Flask 기본 static 라우트를 그대로 두고 처리 함수만 바꿈 (원래 이름 요청은 기본 처리)
+        app.view_functions['static'] = self.serve
+        saved = sum(len(a.data) - len(a.gzip_data) for a in self.assets.values() if a.gzip_data)
+        print(f"정적 파일 {len(self.assets)}개 준비 (gzip 으로 {saved} bytes 절약)")
+
+    def _build(self):
+        for root, _, files in os.walk(self.folder):
+            for file in files:
+                path = os.path.join(root, file)
+                name = os.path.relpath(path, self.folder).replace(os.sep, '/')
+                if name in self.exclude:
+                    continue
+                with open(path, 'rb') as f:
+                    data = f.read()
+                digest = hashlib.sha256(data).hexdigest()[:12]
+                base, ext = posixpath.splitext(name)
+                hashed = f"{base}.{digest}{ext}"
+                gzip_data = None
+                if ext.lower() in COMPRESSIBLE:
+                    gzip_data = gzip.compress(data, 9, mtime=0)
+                    if len(gzip_data) >= len(data):
+                        gzip_data = None
+                mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+                self.manifest[name] = hashed
+                self.assets[hashed] = Asset(data, gzip_data, mimetype, digest)
+
+    def _rewrite(self, endpoint, values):
+        if endpoint == 'static':
+            hashed = self.manifest.get(values.get('filename'))
+            if hashed is not None:
+                values['filename'] = hashed
+
+    def serve(self, filename):
+        asset = self.assets.get(filename)
+        if asset is None:
+            return self._send_static_file(filename)
+        if asset.gzip_data is not None and 'gzip' in request.accept_encodings:
+            response = Response(asset.gzip_data, mimetype=asset.mimetype)
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            response = Response(asset.data, mimetype=asset.mimetype)
+        # 이름에 내용 해시가 들어 있으므로 내용이 바뀌면 이름도 바뀜: 영구 캐시해도 안전
+        response.headers['Cache-Control'] = IMMUTABLE
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.set_etag(asset.etag)
+        return response.make_conditional(request)
@@ -0,0 +1,132 @@
+# batch_writer.py
+# 여러 곳에서 만든 기록(행)을 큐에 모았다가 한 트랜잭션의 executemany 로 한꺼번에 씁니다.
+# 행마다 commit(=fsync) 하던 비용이 배치당 한 번으로 줄고, 기록하는 쪽은 DB 를 기다리지 않습니다.
+import os
+import queue
+import threading
+import time
+
+
+class BatchWriter:
+    """write-behind 큐. put() 은 큐에 넣기만 하고, 전용 스레드가 batch_size 개가 모이거나
+    첫 행이 들어온 지 flush_interval 초가 지나면 flush(rows) 를 부릅니다.
+
+    큐가 max_pending 개로 가득 차면 put() 은 put_timeout 초까지 기다린 뒤(backpressure)
+    그래도 자리가 없으면 행을 버리고 False 를 반환합니다. flush 가 실패한 배치는
+    on_error(rows, error) 로 넘깁니다 (기본: 버리고 개수만 셈).
+    """
+
+    def __init__(self, flush, batch_size=100, flush_interval=1.0, max_pending=10000,
+                 put_timeout=0.05, on_error=None, name='writer'):
+        self.flush = flush
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.put_timeout = put_timeout
+        self.on_error = on_error
+        self.name = name
+        self._lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._closing = threading.Event()
+        self._stats = {'queued': 0, 'written': 0, 'batches': 0, 'dropped': 0,
+                       'failed_batches': 0, 'max_batch': 0, 'flush_seconds': 0.0}
+
+    def _ensure_started(self):
+        # fork 된 자식은 부모의 스레드를 물려받지 않으므로 자기 큐/스레드를 새로 만듦
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return self._queue
+            self._queue = queue.Queue(self.max_pending)
+            self._closing.clear()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name=f"{self.name}-flush", daemon=True)
+            self._thread.start()
+            return self._queue
+
+    def put(self, row):
+        """행 하나를 큐에 넣습니다. 큐가 가득 차서 버렸으면 False 를 반환합니다."""
+        if self._closing.is_set():
+            return False
+        pending = self._ensure_started()
+        try:
+            pending.put(row, timeout=self.put_timeout)
+        except queue.Full:
+            with self._lock:
+                self._stats['dropped'] += 1
+            return False
+        with self._lock:
+            self._stats['queued'] += 1
+        return True
+
+    def _collect(self, pending):
+        """첫 행을 기다린 뒤, batch_size 개가 되거나 flush_interval 이 지날 때까지 모읍니다."""
+        try:
+            rows = [pending.get(timeout=0.2)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(rows) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._closing.is_set():
+                break
+            try:
+                rows.append(pending.get(timeout=remaining))
+            except queue.Empty:
+                break
+        # 이미 쌓여 있는 행은 기다리지 않고 같은 배치에 담음
+        while len(rows) < self.batch_size:
+            try:
+                rows.append(pending.get_nowait())
+            except queue.Empty:
+                break
+        return rows
+
+    def _write(self, rows):
+        start = time.perf_counter()
+        try:
+            self.flush(rows)
+        except Exception as e:
+            with self._lock:
+                self._stats['failed_batches'] += 1
+            print(f"배치 저장 오류 ({self.name}, {len(rows)}건): {e}")
+            if self.on_error is not None:
+                try:
+                    self.on_error(rows, e)
+                except Exception as handler_error:
+                    print(f"배치 오류 처리 실패 ({self.name}): {handler_error}")
+            else:
+                with self._lock:
+                    self._stats['dropped'] += len(rows)
+            return
+        with self._lock:
+            stats = self._stats
+            stats['written'] += len(rows)
+            stats['batches'] += 1
+            stats['max_batch'] = max(stats['max_batch'], len(rows))
+            stats['flush_seconds'] += time.perf_counter() - start
+
+    def _run(self):
+        pending = self._queue
+        while not (self._closing.is_set() and pending.empty()):
+            rows = self._collect(pending)
+            if rows:
+                self._write(rows)
+
+    def close(self, timeout=10.0):
+        """새 행을 받지 않고, 큐에 남은 행을 모두 쓴 뒤 스레드를 끝냅니다."""
+        self._closing.set()
+        thread = self._thread
+        if thread is not None and self._pid == os.getpid():
+            thread.join(timeout)
+            if thread.is_alive():
+                print(f"배치 저장 종료 대기 시간 초과 ({self.name}, 남은 {self._queue.qsize()}건)")
+        self._thread = None
+
+    def stats(self):
+        """queued, written, batches, dropped, failed_batches, max_batch, pending(현재 큐 길이)."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['pending'] = self._queue.qsize() if self._queue is not None else 0
+        return stats
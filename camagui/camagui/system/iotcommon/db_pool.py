@@ -0,0 +1,164 @@
+# db_pool.py
+# 모든 DB 접근이 함께 쓰는 MariaDB 연결 풀입니다.
+# 저장/조회마다 mariadb.connect() (TCP 연결 + 인증) 하던 비용을 없애고, 꺼낼 때 오래 쉰 연결은
+# ping 으로 확인해서 끊겼으면 다시 연결합니다. DB 서버가 재시작되어도 앱을 다시 띄울 필요가 없습니다.
+import contextlib
+import os
+import threading
+import time
+
+import mariadb
+
+
+class DbPool:
+    """mariadb.ConnectionPool 을 감싸서 지연 생성, 헬스 체크, 재연결, 사용량 통계를 더합니다.
+
+    풀은 처음 쓸 때 만들므로 DB 가 꺼져 있어도 import 는 실패하지 않고, 다음 호출에서 다시 시도합니다.
+    fork 된 자식 프로세스는 부모의 연결(소켓)을 같이 쓰면 안 되므로 자기 풀을 새로 만듭니다.
+    """
+
+    def __init__(self, config, size=4, name='db', timeout=2.0, ping_interval=30.0):
+        self.config = config
+        self.size = size
+        self.name = name
+        self.timeout = timeout              # 풀이 다 쓰였을 때 기다릴 최대 시간 (s)
+        self.ping_interval = ping_interval  # 이보다 오래 쉰 연결은 꺼낼 때 ping 으로 확인 (s)
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pid = None
+        self._last_used = {}    # id(conn) -> 마지막 반납 시각
+        self._stats = {'in_use': 0, 'peak_in_use': 0, 'acquired': 0, 'waits': 0, 'empty': 0,
+                       'refills': 0, 'timeouts': 0, 'reconnects': 0, 'failures': 0, 'acquire_seconds': 0.0}
+
+    def _ensure_pool(self):
+        with self._lock:
+            if self._pool is not None and self._pid == os.getpid():
+                return self._pool
+            # pool_name 은 프로세스 안에서 유일해야 하므로 pid 를 붙임
+            self._pool = mariadb.ConnectionPool(pool_name=f"{self.name}-{os.getpid()}",
+                                                pool_size=self.size, **self.config)
+            self._pid = os.getpid()
+            self._last_used.clear()
+            self._stats['in_use'] = 0
+            print(f"DB 연결 풀 생성 ({self.name}, {self.size}개)")
+            return self._pool
+
+    def _acquire(self):
+        start = time.monotonic()
+        deadline = start + self.timeout
+        waited = False
+        while True:
+            try:
+                pool = self._ensure_pool()
+            except mariadb.Error:
+                with self._lock:
+                    self._stats['failures'] += 1
+                raise
+            try:
+                conn = pool.get_connection()
+                if conn is None:
+                    # 커넥터 버전에 따라 꺼낼 연결이 없으면 예외 대신 None 을 돌려줌
+                    raise mariadb.PoolError("No connection available")
+                break
+            except mariadb.PoolError:
+                if self._refill(pool):
+                    continue
+                # 모든 연결이 사용 중: 반납될 때까지 잠깐씩 기다림
+                if time.monotonic() >= deadline:
+                    with self._lock:
+                        self._stats['timeouts'] += 1
+                    raise
+                waited = True
+                time.sleep(0.005)
+            except mariadb.Error:
+                with self._lock:
+                    self._stats['failures'] += 1
+                raise
+        try:
+            self._check(conn)
+        except mariadb.Error:
+            conn.close()    # 풀에 돌려놓고 다음에 다시 재연결 시도
+            with self._lock:
+                self._stats['failures'] += 1
+            raise
+        with self._lock:
+            stats = self._stats
+            stats['acquired'] += 1
+            stats['waits'] += waited
+            stats['in_use'] += 1
+            stats['peak_in_use'] = max(stats['peak_in_use'], stats['in_use'])
+            stats['acquire_seconds'] += time.monotonic() - start
+        return conn
+
+    def _refill(self, pool):
+        """빌려 간 연결이 size 개보다 적은데 꺼낼 연결이 없으면 풀이 연결을 잃은 것입니다.
+
+        mariadb.ConnectionPool 은 DB 가 꺼져 있는 동안 ping 에 실패한 연결을 다시 만들지 못하면
+        풀에서 빼 버리므로, 그대로 두면 DB 가 돌아와도 풀이 빈 채로 남습니다. 이때 연결을 새로 만들어
+        채우고 True 를 반환합니다. 풀이 실제로 다 쓰이고 있으면 False (기다려야 함).
+        DB 가 아직 꺼져 있으면 기다리지 않고 연결 오류를 그대로 올립니다.
+        """
+        with self._lock:
+            if self._stats['in_use'] >= self.size:
+                return False
+            self._stats['empty'] += 1
+        try:
+            pool.add_connection()
+        except mariadb.PoolError:
+            return False    # 그 사이 반납된 연결로 자리가 찼음
+        except mariadb.Error:
+            with self._lock:
+                self._stats['failures'] += 1
+            raise
+        with self._lock:
+            self._stats['refills'] += 1
+        print(f"DB 연결 풀에 연결 추가 ({self.name})")
+        return True
+
+    def _check(self, conn):
+        """오래 쉰 연결은 ping 으로 확인하고, 끊겼으면 다시 연결합니다."""
+        last = self._last_used.get(id(conn))
+        if last is not None and time.monotonic() - last < self.ping_interval:
+            return
+        try:
+            conn.ping()
+        except mariadb.Error:
+            conn.reconnect()
+            with self._lock:
+                self._stats['reconnects'] += 1
+            print(f"DB 재연결 ({self.name})")
+
+    def _release(self, conn, broken):
+        with self._lock:
+            self._stats['in_use'] -= 1
+            if broken:
+                # 다음에 꺼낼 때 ping 부터 하도록 기록을 지움
+                self._last_used.pop(id(conn), None)
+            else:
+                self._last_used[id(conn)] = time.monotonic()
+        try:
+            if not broken:
+                conn.rollback()     # 커밋하지 않은 트랜잭션이 다음 사용자에게 넘어가지 않도록
+            conn.close()            # 풀 연결의 close() 는 실제로 끊지 않고 풀에 반납
+        except mariadb.Error:
+            pass
+
+    @contextlib.contextmanager
+    def connection(self):
+        """with pool.connection() as conn: ... 형태로 연결을 빌려 쓰고 자동으로 반납합니다."""
+        conn = self._acquire()
+        broken = False
+        try:
+            yield conn
+        except (mariadb.InterfaceError, mariadb.OperationalError):
+            broken = True
+            raise
+        finally:
+            self._release(conn, broken)
+
+    def stats(self):
+        """풀 크기와 사용량 통계 (in_use, peak_in_use, acquired, waits, timeouts, reconnects, failures).
+        waits 는 모든 연결이 사용 중이라 기다린 횟수, empty 는 풀이 연결을 잃어서 비어 있던 횟수,
+        refills 는 그때 새 연결을 만들어 채운 횟수입니다."""
+        with self._lock:
+            return dict(self._stats, size=self.size, created=self._pool is not None)
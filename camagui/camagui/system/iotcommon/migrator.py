@@ -0,0 +1,154 @@
+# migrator.py
+# 버전이 붙은 스키마 마이그레이션을 순서대로 적용하고, 적용한 버전을 schema_migrations 테이블에 남깁니다.
+# 각 앱의 migrate.py 가 MIGRATIONS 목록을 정의하고 이 모듈로 실행합니다.
+#
+# MariaDB 의 DDL 은 자동 커밋되므로 중간에 실패한 마이그레이션은 일부만 적용되어 있을 수 있습니다.
+# 그래서 단계마다 IF [NOT] EXISTS 를 써서 다시 실행해도 안전하게 만들고, 큰 테이블은
+# ALGORITHM=INPLACE, LOCK=NONE 과 나눠서 하는 UPDATE 로 테이블을 오래 잠그지 않게 합니다.
+import time
+
+import mariadb
+
+LOCK_NAME = 'schema_migrations'
+
+
+class Migration:
+    """version 순서로 적용됩니다. steps 는 SQL 문자열 또는 func(conn) 입니다."""
+
+    def __init__(self, version, name, *steps):
+        self.version = version
+        self.name = name
+        self.steps = steps
+
+
+class Check:
+    """EXPLAIN 으로 확인할 쿼리: key 인덱스를 쓰고 filesort 가 없어야 통과."""
+
+    def __init__(self, name, query, params=(), key=None):
+        self.name = name
+        self.query = query
+        self.params = params
+        self.key = key
+
+
+def _ensure_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT NOT NULL PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def applied_versions(conn):
+    cursor = conn.cursor()
+    try:
+        _ensure_table(cursor)
+        cursor.execute("SELECT version FROM schema_migrations")
+        return {row[0] for row in cursor.fetchall()}
+    finally:
+        cursor.close()
+
+
+def upgrade(conn, migrations, target=None):
+    """적용되지 않은 마이그레이션을 순서대로 적용하고, 적용한 버전 목록을 반환합니다."""
+    cursor = conn.cursor()
+    try:
+        # 여러 프로세스가 동시에 시작해도 한 곳에서만 적용하도록 서버 쪽 잠금 사용
+        cursor.execute("SELECT GET_LOCK(?, 30)", (LOCK_NAME,))
+        if cursor.fetchone()[0] != 1:
+            raise mariadb.OperationalError("다른 프로세스가 마이그레이션 중입니다")
+        done = applied_versions(conn)
+        applied = []
+        for migration in sorted(migrations, key=lambda m: m.version):
+            if migration.version in done or (target is not None and migration.version > target):
+                continue
+            start = time.perf_counter()
+            print(f"마이그레이션 {migration.version} 적용 중: {migration.name}")
+            for step in migration.steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    cursor.execute(step)
+            cursor.execute("INSERT INTO schema_migrations (version, name) VALUES (?, ?)",
+                           (migration.version, migration.name))
+            conn.commit()
+            applied.append(migration.version)
+            print(f"마이그레이션 {migration.version} 완료 ({time.perf_counter() - start:.2f}s)")
+        return applied
+    finally:
+        try:
+            cursor.execute("SELECT RELEASE_LOCK(?)", (LOCK_NAME,))
+            cursor.fetchall()
+        except mariadb.Error:
+            pass
+        cursor.close()
+
+
+def is_current(conn, migrations):
+    """적용되지 않은 마이그레이션이 없으면 True. 아무것도 만들거나 바꾸지 않으므로 조회 경로에서 써도 됩니다."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT COUNT(*) FROM INFORMATION_SCHEMA.TABLES "
+                       "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = ?", (LOCK_NAME,))
+        if not cursor.fetchone()[0]:
+            return False
+        cursor.execute("SELECT version FROM schema_migrations")
+        done = {row[0] for row in cursor.fetchall()}
+    finally:
+        cursor.close()
+    return {m.version for m in migrations} <= done
+
+
+def status(conn, migrations):
+    """[(version, name, 적용 여부), ...]"""
+    done = applied_versions(conn)
+    return [(m.version, m.name, m.version in done) for m in sorted(migrations, key=lambda m: m.version)]
+
+
+def explain(conn, check):
+    """(통과 여부, EXPLAIN 결과 행 목록). 첫 행(조회 대상 테이블)의 key 와 Extra 를 봅니다."""
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute("EXPLAIN " + check.query, check.params)
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+    first = rows[0] if rows else {}
+    extra = first.get('Extra') or ''
+    ok = (check.key is None or first.get('key') == check.key) and 'filesort' not in extra.lower()
+    return ok, rows
+
+
+def run_checks(conn, checks):
+    """모든 Check 를 EXPLAIN 으로 확인하고 결과를 출력합니다. 모두 통과하면 True."""
+    passed = True
+    for check in checks:
+        ok, rows = explain(conn, check)
+        first = rows[0] if rows else {}
+        print(f"[{'OK' if ok else 'FAIL'}] {check.name}: type={first.get('type')} key={first.get('key')} "
+              f"rows={first.get('rows')} extra={first.get('Extra')}")
+        passed = passed and ok
+    return passed
+
+
+def backfill(table, assignment, where, chunk=5000, key='id'):
+    """UPDATE 를 key 범위로 나눠서 실행하는 단계를 만듭니다 (테이블 전체를 한 번에 잠그지 않음)."""
+    def step(conn):
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"SELECT MIN({key}), MAX({key}) FROM {table}")
+            low, high = cursor.fetchone()
+            if low is None:
+                return
+            updated = 0
+            for start in range(low, high + 1, chunk):
+                cursor.execute(f"UPDATE {table} SET {assignment} WHERE {key} BETWEEN ? AND ? AND ({where})",
+                               (start, start + chunk - 1))
+                updated += cursor.rowcount
+                conn.commit()
+            print(f"  {table}: {updated}행 갱신")
+        finally:
+            cursor.close()
+    return step
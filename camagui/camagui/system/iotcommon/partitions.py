@@ -0,0 +1,97 @@
+# partitions.py
+# 기록 테이블을 날짜(일/월) 범위 파티션으로 나누고, 보관 기간이 지난 파티션을 통째로 지웁니다.
+# 행 단위 DELETE 는 지우는 만큼 SD 카드에 쓰고 인덱스도 고쳐야 하지만, DROP PARTITION 은 파일 하나를 지우는 것으로 끝납니다.
+#
+# 파티션은 RANGE (TO_DAYS(시각 컬럼)) 이고, 구간마다 p20250101(일) / p202501(월) 하나씩과
+# 마이그레이션 전 기록을 담는 p_old, 아직 만들지 않은 미래 구간을 받는 pmax 로 구성됩니다.
+from datetime import date, timedelta
+
+TO_DAYS_OFFSET = 365  # MariaDB 의 TO_DAYS(d) == d.toordinal() + 365
+
+
+def to_days(day):
+    return day.toordinal() + TO_DAYS_OFFSET
+
+
+def period_start(day, unit):
+    return day if unit == 'day' else day.replace(day=1)
+
+
+def next_period(start, unit):
+    if unit == 'day':
+        return start + timedelta(days=1)
+    return (start.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def partition_name(start, unit):
+    return start.strftime('p%Y%m%d' if unit == 'day' else 'p%Y%m')
+
+
+def _definition(start, unit):
+    return f"PARTITION {partition_name(start, unit)} VALUES LESS THAN ({to_days(next_period(start, unit))})"
+
+
+def upcoming(today, unit, ahead):
+    """오늘이 속한 구간부터 ahead 개 뒤 구간까지의 시작일 목록."""
+    starts = [period_start(today, unit)]
+    for _ in range(ahead):
+        starts.append(next_period(starts[-1], unit))
+    return starts
+
+
+def list_partitions(cursor, table):
+    """[(파티션 이름, 상한 TO_DAYS 값 또는 MAXVALUE 이면 None), ...] 를 순서대로 반환합니다. 파티션이 없으면 []."""
+    cursor.execute("SELECT PARTITION_NAME, PARTITION_DESCRIPTION FROM INFORMATION_SCHEMA.PARTITIONS "
+                   "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = ? AND PARTITION_NAME IS NOT NULL "
+                   "ORDER BY PARTITION_ORDINAL_POSITION", (table,))
+    return [(name, None if bound == 'MAXVALUE' else int(bound)) for name, bound in cursor.fetchall()]
+
+
+def partition_by_range(table, column, unit, ahead=3):
+    """테이블을 파티션으로 나누는 마이그레이션 단계를 만듭니다 (이미 나뉘어 있으면 건너뜀).
+
+    기존 행은 모두 p_old 로 들어가고, 보관 기간이 지나면 p_old 도 통째로 지워집니다.
+    테이블을 한 번 다시 쓰므로 기록이 많으면 시간이 걸립니다.
+    """
+    def step(conn):
+        cursor = conn.cursor()
+        try:
+            if list_partitions(cursor, table):
+                return
+            starts = upcoming(date.today(), unit, ahead)
+            parts = [f"PARTITION p_old VALUES LESS THAN ({to_days(starts[0])})"]
+            parts += [_definition(start, unit) for start in starts]
+            parts.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+            cursor.execute(f"ALTER TABLE {table} PARTITION BY RANGE (TO_DAYS({column})) ({', '.join(parts)})")
+        finally:
+            cursor.close()
+    return step
+
+
+def maintain(conn, table, unit, retention_days, ahead=3, today=None):
+    """앞으로 쓸 파티션을 미리 만들고 보관 기간이 지난 파티션을 지웁니다. (추가한 이름, 지운 이름) 을 반환합니다."""
+    today = today or date.today()
+    added, dropped = [], []
+    cursor = conn.cursor()
+    try:
+        parts = list_partitions(cursor, table)
+        if not parts:
+            return added, dropped   # 아직 파티션으로 나누지 않은 테이블
+        last = max(bound for _, bound in parts if bound is not None)
+        # pmax 를 쪼개서 새 구간을 만듦 (보통 pmax 는 비어 있으므로 금방 끝남)
+        new = [start for start in upcoming(today, unit, ahead) if to_days(next_period(start, unit)) > last]
+        if new:
+            definitions = ', '.join(_definition(start, unit) for start in new)
+            cursor.execute(f"ALTER TABLE {table} REORGANIZE PARTITION pmax INTO "
+                           f"({definitions}, PARTITION pmax VALUES LESS THAN MAXVALUE)")
+            added = [partition_name(start, unit) for start in new]
+        if retention_days is not None:
+            # 상한이 cutoff 이하인 파티션은 모든 행이 보관 기간보다 오래됨
+            cutoff = to_days(today - timedelta(days=retention_days))
+            expired = [name for name, bound in parts if bound is not None and bound <= cutoff]
+            if expired:
+                cursor.execute(f"ALTER TABLE {table} DROP PARTITION {', '.join(expired)}")
+                dropped = expired
+    finally:
+        cursor.close()
+    return added, dropped
@@ -0,0 +1,122 @@
+# rollup.py
+# 센서 기록을 1분/1시간 단위 집계(min/max/sum/개수)로 미리 모아 두는 롤업 계산과,
+# 조회 기간에 맞춰 원본/분/시간 해상도를 고르는 함수를 모아 둡니다.
+#
+# 집계는 배치 저장과 같은 트랜잭션에서 INSERT ... ON DUPLICATE KEY UPDATE 로 누적하므로
+# 원본을 다시 훑지 않고, 30일 그래프도 시간 단위 720개 행만 읽으면 됩니다.
+import re
+from datetime import timedelta
+
+# (해상도 이름, 버킷 크기(초)) — 원본은 버킷 없음
+RESOLUTIONS = (('raw', None), ('minute', 60), ('hour', 3600))
+
+RANGE_UNITS = {'m': 60, 'h': 3600, 'd': 86400}
+
+
+def bucket_start(timestamp, seconds):
+    """timestamp(datetime) 가 속한 버킷의 시작 시각."""
+    if seconds == 60:
+        return timestamp.replace(second=0, microsecond=0)
+    if seconds == 3600:
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp - timedelta(seconds=timestamp.timestamp() % seconds)
+
+
+def aggregate(rows, seconds):
+    """[(센서 키, 값, datetime), ...] 를 [(키, 버킷, min, max, sum, 개수), ...] 로 모읍니다. 값이 None 인 행은 제외."""
+    buckets = {}
+    for key, value, timestamp in rows:
+        if value is None:
+            continue
+        slot = (key, bucket_start(timestamp, seconds))
+        agg = buckets.get(slot)
+        if agg is None:
+            buckets[slot] = [value, value, value, 1]
+        else:
+            agg[0] = min(agg[0], value)
+            agg[1] = max(agg[1], value)
+            agg[2] += value
+            agg[3] += 1
+    return [(key, bucket, *agg) for (key, bucket), agg in buckets.items()]
+
+
+# 같은 버킷이 이미 있으면 누적
+ON_DUPLICATE = ("ON DUPLICATE KEY UPDATE "
+                "min_value = LEAST(min_value, VALUES(min_value)), "
+                "max_value = GREATEST(max_value, VALUES(max_value)), "
+                "sum_value = sum_value + VALUES(sum_value), "
+                "samples = samples + VALUES(samples)")
+
+# SQLite 의 같은 동작 (UPSERT, 3.24 이상). 두 인자 MIN/MAX 가 LEAST/GREATEST 역할
+SQLITE_ON_CONFLICT = ("ON CONFLICT (sensor, bucket) DO UPDATE SET "
+                      "min_value = MIN(min_value, excluded.min_value), "
+                      "max_value = MAX(max_value, excluded.max_value), "
+                      "sum_value = sum_value + excluded.sum_value, "
+                      "samples = samples + excluded.samples")
+
+BUCKET_FORMATS = {60: '%Y-%m-%d %H:%i:00', 3600: '%Y-%m-%d %H:00:00'}
+
+
+def upsert_sql(table):
+    """집계 행을 기존 버킷에 누적하는 INSERT 문 (executemany 용)."""
+    return (f"INSERT INTO {table} (sensor, bucket, min_value, max_value, sum_value, samples) "
+            f"VALUES (?, ?, ?, ?, ?, ?) {ON_DUPLICATE}")
+
+
+def sqlite_upsert_sql(table):
+    """upsert_sql 의 SQLite 판."""
+    return (f"INSERT INTO {table} (sensor, bucket, min_value, max_value, sum_value, samples) "
+            f"VALUES (?, ?, ?, ?, ?, ?) {SQLITE_ON_CONFLICT}")
+
+
+def backfill_sql(table, seconds, source, key, value, time_column):
+    """이미 쌓여 있는 원본 기록으로 롤업 테이블을 채우는 INSERT ... SELECT 문 (마이그레이션용)."""
+    return (f"INSERT INTO {table} (sensor, bucket, min_value, max_value, sum_value, samples) "
+            f"SELECT {key}, DATE_FORMAT({time_column}, '{BUCKET_FORMATS[seconds]}'), "
+            f"MIN({value}), MAX({value}), SUM({value}), COUNT({value}) "
+            f"FROM {source} WHERE {value} IS NOT NULL GROUP BY 1, 2 {ON_DUPLICATE}")
+
+
+def table_sql(table, key_type):
+    """롤업 테이블 생성문. (센서, 버킷) 이 기본 키이므로 기간 조회는 기본 키 범위 탐색입니다."""
+    return f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            sensor {key_type} NOT NULL,
+            bucket DATETIME NOT NULL,
+            min_value FLOAT NOT NULL,
+            max_value FLOAT NOT NULL,
+            sum_value DOUBLE NOT NULL,
+            samples INT UNSIGNED NOT NULL,
+            PRIMARY KEY (sensor, bucket)
+        )
+    """
+
+
+def parse_range(text):
+    """'90m', '6h', '30d' 또는 초 단위 숫자를 초로 바꿉니다. 잘못된 값이면 None."""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([mhd]?)\s*', text or '')
+    if not match:
+        return None
+    seconds = float(match.group(1)) * RANGE_UNITS.get(match.group(2), 1)
+    return seconds if seconds > 0 else None
+
+
+def choose_resolution(span, raw_interval, max_points):
+    """span 초 구간을 max_points 개 이하로 보여줄 수 있는 가장 세밀한 해상도 (이름, 버킷 초)."""
+    for name, seconds in RESOLUTIONS:
+        if span / (seconds or raw_interval) <= max_points:
+            return name, seconds
+    return RESOLUTIONS[-1]
+
+
+def summarize(points):
+    """[(시각, 평균, 최소, 최대, 개수), ...] 의 전체 count/min/max/avg (개수 가중 평균)."""
+    total = sum(count for *_, count in points)
+    if not total:
+        return {'count': 0, 'min': None, 'max': None, 'avg': None}
+    return {
+        'count': total,
+        'min': min(low for _, _, low, _, _ in points),
+        'max': max(high for _, _, _, high, _ in points),
+        'avg': sum(avg * count for _, avg, _, _, count in points) / total,
+    }
@@ -0,0 +1,154 @@
+# spool.py
+# DB 에 쓰지 못한 기록을 디스크의 추가 전용(append-only) 파일에 모아 두었다가, DB 가 돌아오면 묶어서 다시 씁니다.
+#
+# 파일 형식: 기록마다 [길이 4바이트][CRC32 4바이트][JSON 본문]. 어디까지 DB 에 옮겼는지는 옆의 .offset 파일에 남깁니다.
+# 쓰기 도중 전원이 꺼져 마지막 기록이 잘렸으면 다음에 열 때 CRC 로 알아보고 그 앞까지만 남깁니다.
+# DB 에 쓴 직후 .offset 을 남기기 전에 꺼지면 그 배치는 한 번 더 쓰일 수 있습니다 (최소 한 번 전달).
+import json
+import os
+import struct
+import threading
+import zlib
+from datetime import datetime
+
+HEADER = struct.Struct('<II')   # (본문 길이, CRC32)
+
+
+def _encode(row):
+    values = [{'dt': value.isoformat()} if isinstance(value, datetime) else value for value in row]
+    return json.dumps(values, separators=(',', ':')).encode()
+
+
+def _decode(data):
+    return tuple(datetime.fromisoformat(value['dt']) if isinstance(value, dict) else value
+                 for value in json.loads(data))
+
+
+class Spool:
+    """행 단위 기록을 파일에 덧붙이고(append), 앞에서부터 읽어서(read) DB 에 옮긴 만큼 commit 합니다.
+
+    append() 한 번에 fsync 한 번이므로 배치 단위로 넘기면 기록마다 fsync 하지 않습니다.
+    파일은 처음 쓸 때 엽니다. DB 에 쓰는 프로세스 하나만 사용해야 합니다.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.offset_path = path + '.offset'
+        self._lock = threading.Lock()
+        self._file = None
+        self._pid = None
+        self._offset = 0      # DB 에 옮긴 위치 (이 앞은 지워도 됨)
+        self._size = 0        # 파일 끝 위치
+        self._stats = {'spooled': 0, 'replayed': 0, 'syncs': 0, 'recovered_bytes': 0}
+
+    def _open(self):
+        # Lock 을 잡은 상태에서 호출
+        if self._file is not None and self._pid == os.getpid():
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._file = open(self.path, 'ab+')
+        self._pid = os.getpid()
+        try:
+            with open(self.offset_path) as f:
+                self._offset = int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            self._offset = 0
+        self._size = self._file.seek(0, os.SEEK_END)
+        self._offset = min(self._offset, self._size)
+        self._recover()
+
+    def _recover(self):
+        """마지막으로 온전한 기록 뒤에 남은 잘린 기록을 잘라냅니다."""
+        position = self._offset
+        self._file.seek(position)
+        while True:
+            header = self._file.read(HEADER.size)
+            if len(header) < HEADER.size:
+                break
+            length, crc = HEADER.unpack(header)
+            body = self._file.read(length)
+            if len(body) < length or zlib.crc32(body) != crc:
+                break
+            position += HEADER.size + length
+        if position < self._size:
+            print(f"스풀 파일 끝의 손상된 기록 {self._size - position} bytes 를 잘라냅니다")
+            self._stats['recovered_bytes'] += self._size - position
+            self._file.truncate(position)
+            os.fsync(self._file.fileno())
+            self._size = position
+
+    def append(self, rows):
+        """행들을 파일 끝에 쓰고 fsync 합니다."""
+        if not rows:
+            return
+        data = bytearray()
+        for row in rows:
+            body = _encode(row)
+            data += HEADER.pack(len(body), zlib.crc32(body)) + body
+        with self._lock:
+            self._open()
+            self._file.seek(0, os.SEEK_END)
+            self._file.write(data)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._size += len(data)
+            self._stats['spooled'] += len(rows)
+            self._stats['syncs'] += 1
+
+    def read(self, limit):
+        """옮기지 않은 기록을 앞에서부터 limit 개까지 읽어 (행 목록, 다음 위치) 를 반환합니다."""
+        with self._lock:
+            self._open()
+            position, end = self._offset, self._size
+        rows = []
+        with open(self.path, 'rb') as f:
+            f.seek(position)
+            while len(rows) < limit and position < end:
+                length, crc = HEADER.unpack(f.read(HEADER.size))
+                rows.append(_decode(f.read(length)))
+                position += HEADER.size + length
+        return rows, position
+
+    def commit(self, position, count):
+        """position 앞까지 DB 에 옮겼다고 기록합니다. 모두 옮겼으면 파일을 비웁니다."""
+        with self._lock:
+            self._offset = position
+            self._stats['replayed'] += count
+            if self._offset >= self._size:
+                self._file.truncate(0)
+                os.fsync(self._file.fileno())
+                self._offset = self._size = 0
+            tmp = self.offset_path + '.tmp'
+            with open(tmp, 'w') as f:
+                f.write(str(self._offset))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.offset_path)
+
+    def pending_bytes(self):
+        with self._lock:
+            if self._file is None:
+                # 아직 열지 않았으면 이전 실행에서 남은 기록이 있는지 파일 크기로 확인
+                try:
+                    return os.path.getsize(self.path)
+                except OSError:
+                    return 0
+            return self._size - self._offset
+
+    def drain(self, flush, batch_size=500):
+        """남은 기록을 batch_size 개씩 flush(rows) 로 옮깁니다. 옮긴 개수를 반환하고, flush 오류는 그대로 올립니다."""
+        moved = 0
+        while self.pending_bytes() > 0:
+            rows, position = self.read(batch_size)
+            if not rows:
+                break
+            flush(rows)
+            self.commit(position, len(rows))
+            moved += len(rows)
+        return moved
+
+    def stats(self):
+        """spooled(디스크에 쓴 행), replayed(DB 로 옮긴 행), syncs(fsync 횟수), pending_bytes."""
+        pending = self.pending_bytes()
+        with self._lock:
+            return dict(self._stats, pending_bytes=pending)
@@ -0,0 +1,169 @@
+# metrics.py
+# /metrics 로 내보낼 지표(카운터, 히스토그램, 콜백 값)를 모으고 Prometheus 텍스트 형식으로 만듭니다.
+#
+# 기록하는 쪽 비용은 Lock 한 번과 덧셈 몇 번뿐이고, 합계/버킷 누적은 조회(collect) 때만 계산합니다.
+# 프로세스마다 REGISTRY 가 하나씩 있으며, process/client 모드에서는 센서 프로세스의 collect() 결과를
+# 명령 채널로 받아와 merge() 로 합칩니다.
+import bisect
+import math
+import threading
+
+# 1ms ~ 10s: HTTP 응답, DB 쿼리, 초음파(~0.2s), DHT(수 초)를 모두 담을 수 있는 범위
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Counter:
+    type = 'counter'
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = list(self._values.items())
+        return [(self.name, dict(zip(self.labelnames, key)), value) for key, value in values]
+
+
+class Histogram:
+    type = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}    # labels -> [버킷별 개수(+Inf 포함), 합계]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def samples(self):
+        with self._lock:
+            values = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        result = []
+        for key, counts, total in values:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                result.append((self.name + '_bucket', dict(labels, le=_format_value(bound)), cumulative))
+            result.append((self.name + '_sum', labels, total))
+            result.append((self.name + '_count', labels, cumulative))
+        return result
+
+
+class CallbackMetric:
+    """조회할 때 func() 를 불러 값을 읽는 지표. func 는 숫자 또는 {라벨 값 튜플: 숫자} 를 반환합니다."""
+
+    def __init__(self, name, help, type, func, labelnames=()):
+        self.name = name
+        self.help = help
+        self.type = type
+        self.func = func
+        self.labelnames = tuple(labelnames)
+
+    def samples(self):
+        values = self.func()
+        if not isinstance(values, dict):
+            return [(self.name, {}, values)]
+        return [(self.name, dict(zip(self.labelnames, key)), value) for key, value in values.items()]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        # 같은 이름으로 다시 등록하면 교체 (예: 허브를 다시 만든 경우)
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def callback(self, name, help, type, func, labelnames=()):
+        return self.register(CallbackMetric(name, help, type, func, labelnames))
+
+    def collect(self):
+        """[(이름, 종류, 설명, [(샘플 이름, 라벨 dict, 값), ...]), ...] — 프로세스 사이로 보낼 수 있는 형태."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        families = []
+        for metric in metrics:
+            try:
+                families.append((metric.name, metric.type, metric.help, metric.samples()))
+            except Exception as e:
+                print(f"지표 수집 오류 ({metric.name}): {e}")
+        return families
+
+
+def with_labels(families, **labels):
+    """모든 샘플에 라벨을 덧붙입니다 (어느 프로세스의 값인지 구분할 때 사용)."""
+    return [(name, type, help, [(sample, dict(sample_labels, **labels), value)
+                                for sample, sample_labels, value in samples])
+            for name, type, help, samples in families]
+
+
+def merge(*family_lists):
+    """여러 프로세스의 collect() 결과에서 같은 이름의 지표를 하나로 합칩니다."""
+    merged = {}
+    for families in family_lists:
+        for name, type, help, samples in families:
+            if name in merged:
+                merged[name][3].extend(samples)
+            else:
+                merged[name] = (name, type, help, list(samples))
+    return list(merged.values())
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return f"{value:.1f}"
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render(families):
+    """Prometheus 텍스트 형식(version 0.0.4)으로 바꿉니다."""
+    lines = []
+    for name, type, help, samples in families:
+        lines.append(f"# HELP {name} {help}")
+        lines.append(f"# TYPE {name} {type}")
+        for sample, labels, value in samples:
+            if labels:
+                label_text = ','.join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+                lines.append(f"{sample}{{{label_text}}} {_format_value(value)}")
+            else:
+                lines.append(f"{sample} {_format_value(value)}")
+    return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+REGISTRY.callback('process_threads', '프로세스의 현재 스레드 수', 'gauge', threading.active_count)
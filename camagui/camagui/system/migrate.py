@@ -0,0 +1,90 @@
+# migrate.py
+# Controller3 스키마 마이그레이션 목록과 실행 명령입니다.
+# DB_BACKEND = 'mariadb' 용이며, SQLite 스키마는 storage_sqlite.py 가 처음 연결할 때 적용합니다.
+# 사용법: python migrate.py [up [버전] | status | check]
+#   up     적용되지 않은 마이그레이션을 적용 (기본)
+#   status 버전별 적용 여부 출력
+#   check  기록 조회 쿼리가 인덱스를 타는지 EXPLAIN 으로 확인 (실패하면 종료 코드 1)
+import sys
+
+import mariadb
+
+from config import HISTORY_SENSORS, HISTORY_PAGE_SIZE
+from config import PARTITION_AHEAD
+from storage import ROLLUP_TABLES
+from storage_mariadb import pool, PARTITIONED_TABLES
+from iotcommon.migrator import Migration, Check, upgrade, status, run_checks
+from iotcommon.rollup import table_sql, backfill_sql
+from iotcommon.partitions import partition_by_range
+
+MIGRATIONS = [
+    # 기존에 손으로 만든 테이블과 같은 구조 (이미 있으면 그대로 둠)
+    Migration(1, 'create Controller3', """
+        CREATE TABLE IF NOT EXISTS Controller3 (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            temperature FLOAT NULL,
+            humidity FLOAT NULL,
+            distance FLOAT NULL,
+            touch_detected TINYINT NOT NULL DEFAULT 0,
+            log_time DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """),
+    # ORDER BY log_time DESC LIMIT n 을 인덱스 역순 탐색으로 바꿔 전체 스캔 + filesort 를 없앰
+    Migration(2, 'index Controller3.log_time', """
+        ALTER TABLE Controller3 ADD INDEX IF NOT EXISTS idx_log_time (log_time),
+            ALGORITHM=INPLACE, LOCK=NONE
+    """),
+    # 1분/1시간 집계 테이블. 이후 기록은 저장할 때(Storage.insert_batch) 같이 누적되고, 기존 기록은 여기서 채움
+    Migration(3, 'create Controller3 rollups',
+        *[table_sql(table, "ENUM(" + ", ".join(f"'{sensor}'" for sensor in HISTORY_SENSORS) + ")")
+          for table in ROLLUP_TABLES.values()],
+        *[backfill_sql(table, seconds, 'Controller3', f"'{sensor}'", sensor, 'log_time')
+          for seconds, table in ROLLUP_TABLES.items() for sensor in HISTORY_SENSORS],
+    ),
+    # 날짜 범위 파티션: 파티션 컬럼이 모든 고유 키에 들어가야 하므로 기본 키를 (id, log_time) 으로 넓힘
+    Migration(4, 'partition Controller3 tables',
+        "ALTER TABLE Controller3 DROP PRIMARY KEY, ADD PRIMARY KEY (id, log_time)",
+        *[partition_by_range(table, column, unit, PARTITION_AHEAD) for table, column, unit, _ in PARTITIONED_TABLES],
+    ),
+]
+
+CHECKS = [
+    Check(f"history {sensor}",
+          f"SELECT log_time, {sensor} FROM Controller3 WHERE {sensor} IS NOT NULL "
+          f"ORDER BY log_time DESC LIMIT {HISTORY_PAGE_SIZE}",
+          key='idx_log_time')
+    for sensor in HISTORY_SENSORS
+] + [
+    # 기간 조회(?range=)의 롤업 테이블 읽기는 기본 키 범위 탐색이어야 함
+    Check(f"rollup {table}",
+          f"SELECT bucket, sum_value / samples FROM {table} WHERE sensor = 'temperature' "
+          f"AND bucket >= '2000-01-01' ORDER BY bucket",
+          key='PRIMARY')
+    for table in ROLLUP_TABLES.values()
+]
+
+
+def main(args):
+    command = args[0] if args else 'up'
+    with pool.connection() as conn:
+        if command == 'up':
+            target = int(args[1]) if len(args) > 1 else None
+            applied = upgrade(conn, MIGRATIONS, target)
+            print(f"적용한 마이그레이션: {applied or '없음'}")
+        elif command == 'status':
+            for version, name, done in status(conn, MIGRATIONS):
+                print(f"{version:>4}  {'적용됨' if done else '대기':<4}  {name}")
+        elif command == 'check':
+            return 0 if run_checks(conn, CHECKS) else 1
+        else:
+            print("사용법: python migrate.py [up [버전] | status | check]")
+            return 2
+    return 0
+
+
+if __name__ == '__main__':
+    try:
+        sys.exit(main(sys.argv[1:]))
+    except mariadb.Error as e:
+        print(f"마이그레이션 오류: {e}")
+        sys.exit(1)
@@ -0,0 +1,214 @@
+# sensor_hub.py
+# 모든 센서 읽기를 하나의 asyncio 루프에서 주기별로 실행하고, 읽은 값을 구독자에게 전달합니다.
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import REGISTRY
+
+SENSOR_READ_SECONDS = REGISTRY.histogram('sensor_read_duration_seconds',
+                                         '센서 작업 한 번에 걸린 시간', ('sensor',))
+
+
+class SensorJob:
+    """허브에 등록된 주기 작업 하나와 그 스케줄링 통계를 보관합니다."""
+
+    def __init__(self, name, func, period, timeout=None, blocking=True):
+        self.name = name
+        self.func = func
+        self.period = period
+        self.timeout = timeout
+        # 코루틴 함수는 루프에서 바로 await, blocking 함수는 executor 로 보냄
+        self.is_async = asyncio.iscoroutinefunction(func)
+        self.blocking = blocking and not self.is_async
+        self.deadline = 0.0
+        self.pending = None      # 타임아웃 후에도 executor 에서 아직 끝나지 않은 읽기
+        self.runs = 0
+        self.overruns = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.last_jitter = 0.0
+        self.max_jitter = 0.0
+        self.total_jitter = 0.0
+        self.last_duration = 0.0
+
+    def stats(self):
+        return {
+            'period': self.period,
+            'runs': self.runs,
+            'overruns': self.overruns,
+            'failures': self.failures,
+            'timeouts': self.timeouts,
+            'last_jitter_ms': round(self.last_jitter * 1000, 3),
+            'avg_jitter_ms': round(self.total_jitter / self.runs * 1000, 3) if self.runs else 0.0,
+            'max_jitter_ms': round(self.max_jitter * 1000, 3),
+            'last_duration_ms': round(self.last_duration * 1000, 3),
+        }
+
+
+class SensorHub:
+    """센서 장치를 소유하고 마감 시각(deadline) 기준으로 각 센서를 자기 주기에 맞춰 읽습니다.
+
+    모든 작업은 전용 스레드 하나에서 도는 asyncio 루프의 태스크입니다. 블로킹 드라이버
+    (adafruit_dht, DB 저장 등)만 executor 로 보내므로 센서 수만큼 스레드가 늘지 않습니다.
+    같은 작업은 이전 읽기가 끝나기 전에 다시 시작하지 않으므로 중복 읽기가 없습니다.
+    """
+
+    def __init__(self, max_workers=4):
+        self.max_workers = max_workers
+        self._jobs = {}
+        self._latest = {}          # name -> (value, time.time())
+        self._subscribers = []     # (names 또는 None, callback)
+        self._shutdown_hooks = []
+        self._loop = None
+        self._stopping = None
+        self._thread = None
+        self._executor = None
+        self._ready = threading.Event()
+        # 작업 통계는 기록할 때 비용이 없도록 조회 시점에 job 에서 바로 읽음
+        for field, help in (('runs', '실행 횟수'), ('failures', '예외로 실패한 횟수'),
+                            ('timeouts', '타임아웃 횟수'), ('overruns', '주기를 놓치거나 건너뛴 횟수')):
+            REGISTRY.callback(f'sensor_job_{field}_total', f'센서 작업 {help}', 'counter',
+                              lambda field=field: self._job_values(field), ('sensor',))
+
+    def schedule(self, name, func, period, timeout=None, blocking=True):
+        """func 를 period 초마다 실행합니다. None 이 아닌 반환값은 name 으로 발행됩니다.
+
+        func 는 코루틴 함수이거나 일반 함수입니다. 일반 함수 중 blocking=False 인 것은
+        루프에서 바로 호출하고, 나머지는 executor 에서 실행합니다. timeout 초 안에 끝나지
+        않으면 그 주기의 읽기는 실패로 처리합니다.
+        """
+        self._jobs[name] = SensorJob(name, func, period, timeout, blocking)
+
+    def subscribe(self, callback, names=None):
+        """발행된 값을 callback(name, value) 으로 받습니다. names 를 주면 해당 센서만 받습니다."""
+        self._subscribers.append((set(names) if names else None, callback))
+
+    def add_shutdown_hook(self, func):
+        """stop() 에서 모든 센서 작업이 끝난 뒤 등록 순서대로 호출됩니다."""
+        self._shutdown_hooks.append(func)
+
+    def latest(self, name, default=None):
+        """마지막으로 발행된 값을 반환합니다."""
+        entry = self._latest.get(name)
+        return entry[0] if entry else default
+
+    def latest_time(self, name):
+        """마지막 발행 시각(time.time())을 반환합니다."""
+        entry = self._latest.get(name)
+        return entry[1] if entry else None
+
+    def stats(self):
+        """센서별 스케줄링 지터/오버런/타임아웃 통계를 반환합니다."""
+        return {name: job.stats() for name, job in self._jobs.items()}
+
+    def _job_values(self, field):
+        return {(name,): getattr(job, field) for name, job in self._jobs.items()}
+
+    def publish(self, name, value):
+        self._latest[name] = (value, time.time())
+        for names, callback in self._subscribers:
+            if names is None or name in names:
+                try:
+                    callback(name, value)
+                except Exception as e:
+                    print(f"구독자 처리 오류 ({name}): {e}")
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix='sensor')
+        self._thread = threading.Thread(target=self._run_loop, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def stop(self, timeout=5.0):
+        """센서 태스크를 취소하고 끝날 때까지 기다린 뒤 종료 훅(LED 끄기, GPIO 정리)을 실행합니다."""
+        if self._thread is not None:
+            self._loop.call_soon_threadsafe(self._stopping.set)
+            self._thread.join(timeout)
+            self._thread = None
+        if self._executor is not None:
+            # 멈춘 드라이버 호출이 종료를 붙잡지 않도록 기다리지 않음
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        for hook in self._shutdown_hooks:
+            try:
+                hook()
+            except Exception as e:
+                print(f"종료 처리 오류: {e}")
+
+    def _run_loop(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._main())
+        finally:
+            self._loop.close()
+
+    async def _main(self):
+        self._stopping = asyncio.Event()
+        tasks = [asyncio.create_task(self._run_job(job), name=job.name)
+                 for job in self._jobs.values()]
+        self._ready.set()
+        await self._stopping.wait()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run_job(self, job):
+        loop = asyncio.get_running_loop()
+        job.deadline = loop.time()
+        while True:
+            delay = job.deadline - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            if job.pending is not None and not job.pending.done():
+                # 타임아웃된 이전 읽기가 아직 장치를 잡고 있으면 이번 주기는 건너뜀
+                job.overruns += 1
+            else:
+                job.pending = None
+                await self._run_once(job, loop)
+
+            job.deadline += job.period
+            now = loop.time()
+            if job.deadline <= now:
+                # 너무 밀렸으면 놓친 주기를 건너뛰고 다음 마감 시각으로 맞춤
+                missed = int((now - job.deadline) // job.period) + 1
+                job.overruns += missed
+                job.deadline += missed * job.period
+
+    async def _run_once(self, job, loop):
+        start = loop.time()
+        jitter = start - job.deadline
+        value = None
+        try:
+            if job.is_async:
+                value = await asyncio.wait_for(job.func(), job.timeout)
+            elif job.blocking:
+                job.pending = loop.run_in_executor(self._executor, job.func)
+                # shield: 타임아웃이 나도 스레드 작업은 취소할 수 없으므로 pending 으로 추적
+                value = await asyncio.wait_for(asyncio.shield(job.pending), job.timeout)
+            else:
+                value = job.func()
+        except asyncio.TimeoutError:
+            job.timeouts += 1
+            print(f"센서 작업 타임아웃 ({job.name}): {job.timeout}s")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            job.failures += 1
+            print(f"센서 작업 오류 ({job.name}): {e}")
+
+        job.runs += 1
+        job.last_jitter = jitter
+        job.total_jitter += jitter
+        job.max_jitter = max(job.max_jitter, jitter)
+        job.last_duration = loop.time() - start
+        SENSOR_READ_SECONDS.observe(job.last_duration, sensor=job.name)
+
+        if value is not None:
+            self.publish(job.name, value)
@@ -0,0 +1,235 @@
+# sensor_process.py
+# 센서 읽기를 별도 프로세스로 분리합니다 (ACQUISITION_MODE = 'process').
+# 웹 서버는 공유 메모리의 스냅샷/링 버퍼를 읽기만 하므로 HTTP 요청 처리와 GIL 을 나눠 쓰지 않습니다.
+#
+# 운영 모드(serve.py)에서는 이 프로세스가 GPIO 를 가진 유일한 소유자이고, 여러 HTTP 워커가
+# 이름 있는 공유 메모리와 유닉스 소켓(multiprocessing.connection)으로 붙습니다 (SensorClient).
+import atexit
+import multiprocessing
+import os
+import signal
+import threading
+from multiprocessing import resource_tracker, shared_memory
+from multiprocessing.connection import Client, Listener
+
+from config import HISTORY_CAPACITY, HISTORY_SENSORS, SENSOR_SHM_NAME, SENSOR_SOCKET
+from shared_state import SharedLayout, SharedSnapshotReader, SharedSnapshotWriter, SharedRingBuffer
+
+AUTHKEY_ENV = 'CAMAGUI_SENSOR_AUTHKEY'  # serve.py 가 실행마다 만들어 워커에게 환경 변수로 넘김
+
+
+def _serve_connection(conn, sensors):
+    """워커 연결 하나의 명령을 처리합니다 (연결마다 스레드 하나)."""
+    with conn:
+        while True:
+            try:
+                cmd, args = conn.recv()
+            except (EOFError, OSError):
+                return
+            try:
+                conn.send((True, sensors.handle_command(cmd, *args)))
+            except Exception as e:
+                conn.send((False, str(e)))
+
+
+def _accept_loop(listener, sensors):
+    while True:
+        try:
+            conn = listener.accept()
+        except OSError:
+            return      # listener 가 닫힘 (종료 중)
+        except Exception as e:
+            print(f"워커 연결 거부: {e}")   # 인증 실패 등
+            continue
+        threading.Thread(target=_serve_connection, args=(conn, sensors), daemon=True).start()
+
+
+def _sensor_main(shm, conn, stop, ready, cpu, address, authkey):
+    """센서 프로세스 본체: 허브를 돌리면서 웹 서버(또는 워커들)가 보낸 명령을 처리합니다."""
+    # 종료는 부모가 stop 이벤트로 지시하므로 Ctrl+C 는 무시
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if cpu is not None:
+        try:
+            os.sched_setaffinity(0, {cpu})
+            print(f"센서 프로세스를 CPU {cpu} 에 고정")
+        except OSError as e:
+            print(f"CPU 고정 실패: {e}")
+
+    # GPIO/DHT 설정은 이 프로세스에서만 일어나도록 여기서 import
+    from acquisition import LocalSensors
+    from snapshot import SnapshotStore
+
+    layout = SharedLayout(HISTORY_SENSORS, HISTORY_CAPACITY)
+    writer = SharedSnapshotWriter(shm.buf, layout)
+    history = {name: SharedRingBuffer(shm.buf, layout, name) for name in HISTORY_SENSORS}
+    sensors = LocalSensors(store=SnapshotStore(on_publish=writer.write), history=history)
+    writer.write(sensors.store.get())
+    sensors.start()
+    listener = None
+    if address is not None:
+        if os.path.exists(address):
+            os.unlink(address)  # 이전 실행이 남긴 소켓 파일
+        listener = Listener(address, family='AF_UNIX', authkey=authkey)
+        threading.Thread(target=_accept_loop, args=(listener, sensors), daemon=True).start()
+    ready.set()
+    try:
+        while not stop.is_set():
+            if not conn.poll(0.5):
+                continue
+            cmd, args = conn.recv()
+            try:
+                conn.send((True, sensors.handle_command(cmd, *args)))
+            except Exception as e:
+                conn.send((False, str(e)))
+    finally:
+        if listener is not None:
+            listener.close()
+        sensors.stop()
+        for buffer in history.values():
+            buffer.release()
+
+
+class SensorProcess:
+    """센서 프로세스를 띄우고, 웹 서버 쪽에서 LocalSensors 와 같은 방식으로 쓰게 해 줍니다.
+
+    store.get() 과 history 는 공유 메모리를 직접 읽고, set_leds()/stats() 는 파이프로
+    센서 프로세스에 요청합니다.
+    """
+
+    def __init__(self, cpu=None, serve_workers=False, authkey=None):
+        """serve_workers=True 이면 공유 메모리를 SENSOR_SHM_NAME 으로 만들고 SENSOR_SOCKET 에서
+        다른 프로세스(SensorClient)의 명령도 받습니다."""
+        layout = SharedLayout(HISTORY_SENSORS, HISTORY_CAPACITY)
+        name = SENSOR_SHM_NAME if serve_workers else None
+        if name is not None:
+            _unlink_stale(name)
+        self.shm = shared_memory.SharedMemory(name=name, create=True, size=layout.size)
+        self.store = SharedSnapshotReader(self.shm.buf, layout)
+        self.history = {name: SharedRingBuffer(self.shm.buf, layout, name) for name in HISTORY_SENSORS}
+
+        # fork: 자식이 공유 메모리 객체를 그대로 물려받음 (다시 attach 하지 않음)
+        ctx = multiprocessing.get_context('fork')
+        self._conn, child_conn = ctx.Pipe()
+        self._stop = ctx.Event()
+        self._ready = ctx.Event()
+        address = SENSOR_SOCKET if serve_workers else None
+        self._process = ctx.Process(target=_sensor_main, name='sensor',
+                                    args=(self.shm, child_conn, self._stop, self._ready, cpu,
+                                          address, authkey), daemon=True)
+        # 파이프 하나를 여러 요청 스레드가 같이 쓰므로 요청-응답 단위로 직렬화
+        self._conn_lock = threading.Lock()
+
+    def start(self):
+        self._process.start()
+
+    def wait_ready(self, timeout=30):
+        """센서 프로세스가 첫 스냅샷을 쓰고 명령을 받을 준비가 될 때까지 기다립니다."""
+        if not self._ready.wait(timeout):
+            raise RuntimeError("센서 프로세스가 시작되지 않았습니다")
+
+    def stop(self, timeout=10):
+        self._stop.set()
+        self._process.join(timeout)
+        if self._process.is_alive():
+            self._process.terminate()
+        for buffer in self.history.values():
+            buffer.release()
+        self.store = None
+        self.shm.close()
+        self.shm.unlink()
+
+    def call(self, cmd, *args):
+        with self._conn_lock:
+            self._conn.send((cmd, args))
+            ok, result = self._conn.recv()
+        if not ok:
+            raise RuntimeError(result)
+        return result
+
+    def set_leds(self, changes):
+        return self.call('set_leds', changes)
+
+    def stats(self):
+        return self.call('stats')
+
+    def read_stats(self):
+        return self.call('read_stats')
+
+    def metrics(self):
+        return self.call('metrics')
+
+
+def _unlink_stale(name):
+    """이전 실행이 비정상 종료로 남긴 같은 이름의 공유 메모리를 지웁니다."""
+    try:
+        stale = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+    stale.close()
+    stale.unlink()
+
+
+class SensorClient:
+    """운영 모드의 HTTP 워커 쪽 (ACQUISITION_MODE = 'client').
+
+    serve.py 가 띄운 센서 프로세스의 공유 메모리에 붙어서 읽고, 명령은 유닉스 소켓으로
+    보냅니다. GPIO 는 전혀 건드리지 않으므로 워커를 여러 개 띄워도 됩니다.
+    """
+
+    def __init__(self):
+        layout = SharedLayout(HISTORY_SENSORS, HISTORY_CAPACITY)
+        self.shm = shared_memory.SharedMemory(name=SENSOR_SHM_NAME)
+        # 3.11 에서는 붙기만 한 프로세스도 종료 시 공유 메모리를 지우려 하므로 추적에서 뺌
+        resource_tracker.unregister(self.shm._name, 'shared_memory')
+        self.store = SharedSnapshotReader(self.shm.buf, layout)
+        self.history = {name: SharedRingBuffer(self.shm.buf, layout, name) for name in HISTORY_SENSORS}
+        self._authkey = os.environ.get(AUTHKEY_ENV, '').encode() or None
+        self._conn = None
+        self._conn_lock = threading.Lock()
+        # 워커는 stop() 을 부르지 않고 끝나므로 종료 시 memoryview 를 풀고 닫음
+        atexit.register(self.stop)
+
+    def start(self):
+        pass    # 센서는 소유 프로세스가 돌림
+
+    def stop(self):
+        if self.store is None:
+            return
+        with self._conn_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+        for buffer in self.history.values():
+            buffer.release()
+        self.store = None
+        self.shm.close()
+
+    def call(self, cmd, *args):
+        with self._conn_lock:
+            # 소유 프로세스와의 연결은 처음 쓸 때 열고, 끊겼으면 한 번 다시 연결
+            for attempt in range(2):
+                try:
+                    if self._conn is None:
+                        self._conn = Client(SENSOR_SOCKET, family='AF_UNIX', authkey=self._authkey)
+                    self._conn.send((cmd, args))
+                    ok, result = self._conn.recv()
+                    break
+                except (EOFError, OSError):
+                    self._conn = None
+                    if attempt:
+                        raise
+        if not ok:
+            raise RuntimeError(result)
+        return result
+
+    def set_leds(self, changes):
+        return self.call('set_leds', changes)
+
+    def stats(self):
+        return self.call('stats')
+
+    def read_stats(self):
+        return self.call('read_stats')
+
+    def metrics(self):
+        return self.call('metrics')
@@ -3,9 +3,22 @@
 import RPi.GPIO as GPIO
 import adafruit_dht
 import board
+import asyncio
 import time
 import threading
 
+from config import DHT_MAX_AGE, TOUCH_DEBOUNCE_MS, SINGLE_FLIGHT_WINDOW
+from singleflight import SingleFlight
+from metrics import REGISTRY
+
+# lgpio 가 있으면 커널 엣지 타임스탬프(ns)를 사용하고, 없으면 RPi.GPIO 콜백으로 대체
+try:
+    import lgpio
+    LGPIO_AVAILABLE = True
+except ImportError:
+    lgpio = None
+    LGPIO_AVAILABLE = False
+
 # 2. Setups
 GPIO.setmode(GPIO.BCM)
 
@@ -14,6 +27,14 @@ TRIG = 23
 ECHO = 24
 TOUCH_PIN = 25
 DHT_PIN = board.D26
+GPIO_CHIP = 0  # lgpio 가 사용하는 gpiochip 번호
+
+# 센서 타이밍 상수
+DHT_MIN_INTERVAL = 2.0    # DHT11 최소 샘플링 간격 (s)
+ECHO_TIMEOUT = 0.1        # 에코가 돌아오지 않을 때 포기하는 시간 (s)
+ULTRASONIC_SETTLE = 0.2   # 측정 전 TRIG 를 LOW 로 두는 시간 (s)
+ULTRASONIC_LOCK_WAIT = ULTRASONIC_SETTLE + ECHO_TIMEOUT  # 다른 측정이 끝나기를 기다리는 최대 시간 (s)
+SOUND_SPEED_HALF = 17150  # 음속(cm/s) / 2
 
 GPIO.setup(TRIG, GPIO.OUT)
 GPIO.setup(ECHO, GPIO.IN)
@@ -22,82 +43,270 @@ GPIO.setup(TOUCH_PIN, GPIO.IN)
 # Sensor Objects
 dhtDevice = adafruit_dht.DHT11(DHT_PIN)
 
-# 여러 스레드에서 센서를 동시에 접근하는 것을 막기 위한 Lock
-sensor_lock = threading.Lock()
+SENSOR_ERRORS = REGISTRY.counter('sensor_read_errors_total', '센서 읽기 실패 횟수 (종류별)',
+                                 ('sensor', 'kind'))
 
-# Touch Sensor State
-last_touch_state = 0
-touch_detected = False
+# 모든 하드웨어 읽기는 이 single-flight 를 거침: 동시에 들어온 같은 장치 읽기는 한 번만 실행
+# 실패한 읽기(None, 거리 -1)는 재사용하지 않고 다음 호출이 다시 읽음
+hardware_reads = SingleFlight(window=SINGLE_FLIGHT_WINDOW, cacheable=lambda result: result not in (None, -1))
 
-distance_cm = -1
-proximity_alert = False
-ALERT_THRESHOLD = 10
+# 장치별 Lock: 한 장치의 느린 읽기(DHT 재시도)가 다른 장치의 측정을 막지 않도록 따로 둠
+dht_lock = threading.Lock()
+ultrasonic_lock = threading.Lock()
 
-# 3. sensor functions
-def get_temperature():
-    """온도와 습도를 읽어 반환합니다."""
-    for attempt in range(3):
+class EchoTimer:
+    """ECHO 핀의 상승/하강 엣지 타임스탬프로 펄스 폭을 측정합니다.
+
+    측정을 기다리는 동안 GPIO.input 을 반복 호출하지 않고 Event 로 잠들기 때문에
+    CPU 를 거의 쓰지 않으며, Flask 스레드에 선점당해도 타임스탬프가 흔들리지 않습니다.
+    """
+
+    def __init__(self, echo_pin):
+        self.echo_pin = echo_pin
+        self._rise_ns = None
+        self._fall_ns = None
+        self._done = threading.Event()
+        self._waiter = None   # measure_async 가 기다리는 (loop, future)
+        self._handle = None
+        self._callback = None
+        if LGPIO_AVAILABLE:
+            try:
+                # 커널이 엣지 발생 시각을 기록하므로 콜백 지연과 무관하게 정확합니다.
+                self._handle = lgpio.gpiochip_open(GPIO_CHIP)
+                lgpio.gpio_claim_alert(self._handle, echo_pin, lgpio.BOTH_EDGES)
+                self._callback = lgpio.callback(self._handle, echo_pin,
+                                                lgpio.BOTH_EDGES, self._on_lgpio_edge)
+                return
+            except Exception as e:
+                print(f"lgpio 엣지 감지 설정 실패, RPi.GPIO 로 대체: {e}")
+                self._handle = None
+        GPIO.add_event_detect(echo_pin, GPIO.BOTH, callback=self._on_gpio_edge)
+
+    def _on_lgpio_edge(self, chip, gpio, level, timestamp):
+        if level == 1:
+            self._rise_ns = timestamp
+        elif level == 0 and self._rise_ns is not None:
+            self._fall_ns = timestamp
+            self._finish()
+
+    def _on_gpio_edge(self, channel):
+        # RPi.GPIO 는 레벨을 넘겨주지 않으므로 트리거 이후 첫 엣지를 상승, 두 번째를 하강으로 봅니다.
+        now = time.monotonic_ns()
+        if self._rise_ns is None:
+            self._rise_ns = now
+        elif self._fall_ns is None:
+            self._fall_ns = now
+            self._finish()
+
+    def _finish(self):
+        # 콜백 스레드에서 호출됨: 동기 대기자는 Event 로, asyncio 대기자는 루프를 통해 깨움
+        self._done.set()
+        waiter = self._waiter
+        if waiter is not None:
+            loop, future = waiter
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+    def measure(self, trig_pin, timeout=ECHO_TIMEOUT):
+        """트리거 펄스를 보내고 에코 펄스 폭(ns)을 반환합니다. 타임아웃이면 None."""
+        self._rise_ns = None
+        self._fall_ns = None
+        self._done.clear()
+        GPIO.output(trig_pin, True)
+        time.sleep(0.00001)
+        GPIO.output(trig_pin, False)
+        if not self._done.wait(timeout):
+            return None
+        return self._fall_ns - self._rise_ns
+
+    async def measure_async(self, trig_pin, timeout=ECHO_TIMEOUT):
+        """measure() 의 asyncio 버전. 에코를 기다리는 동안 스레드를 점유하지 않습니다."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._rise_ns = None
+        self._fall_ns = None
+        self._done.clear()
+        self._waiter = (loop, future)
         try:
-            with sensor_lock:
-                humidity = dhtDevice.humidity
-                temperature = dhtDevice.temperature
-            if humidity is not None and temperature is not None:
-                return humidity, temperature
-            time.sleep(1)
+            GPIO.output(trig_pin, True)
+            time.sleep(0.00001)
+            GPIO.output(trig_pin, False)
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self._waiter = None
+        return self._fall_ns - self._rise_ns
+
+    def close(self):
+        if self._callback is not None:
+            self._callback.cancel()
+        if self._handle is not None:
+            lgpio.gpiochip_close(self._handle)
+        else:
+            GPIO.remove_event_detect(self.echo_pin)
+
+
+echo_timer = EchoTimer(ECHO)
+
+class DhtSampler:
+    """DHT11 을 읽고 마지막 정상 값을 보관합니다.
+
+    sample() 은 SensorHub 가 DHT_SAMPLE_INTERVAL 마다 호출하며,
+    HTTP 핸들러는 센서를 직접 읽지 않고 latest() 로 캐시된 값만 가져갑니다.
+    """
+
+    def __init__(self, device):
+        self.device = device
+        # (humidity, temperature, monotonic 읽은 시각) 을 통째로 교체해서 읽는 쪽이 항상 일관된 값을 봄
+        self._reading = (None, None, None)
+
+    def sample(self):
+        """센서를 한 번 읽어 성공하면 캐시를 갱신하고 (humidity, temperature) 를 반환합니다."""
+        return hardware_reads.do('dht', self._read)
+
+    def _read(self):
+        try:
+            with dht_lock:
+                humidity = self.device.humidity
+                temperature = self.device.temperature
         except RuntimeError as error:
-            print(f"DHT 센서 읽기 실패 (시도 {attempt+1}/3): {error.args[0]}")
-            time.sleep(1)
+            # DHT11 은 체크섬/타이밍 오류가 흔함: 비율을 보려고 따로 셈
+            SENSOR_ERRORS.inc(sensor='dht', kind='runtime')
+            print(f"DHT 센서 읽기 실패: {error.args[0]}")
+            return None
         except Exception as e:
-            print(f"DHT 센서 읽기 오류 (시도 {attempt+1}/3): {e}")
-            time.sleep(1)
-    return None, None
+            SENSOR_ERRORS.inc(sensor='dht', kind='error')
+            print(f"DHT 센서 읽기 오류: {e}")
+            return None
+        if humidity is None or temperature is None:
+            SENSOR_ERRORS.inc(sensor='dht', kind='empty')
+            return None
+        self._reading = (humidity, temperature, time.monotonic())
+        return humidity, temperature
+
+    def latest(self, max_age=DHT_MAX_AGE):
+        """(humidity, temperature, age) 를 반환합니다. 값이 없거나 max_age 보다 오래되면 값은 None."""
+        humidity, temperature, read_at = self._reading
+        if read_at is None:
+            return None, None, None
+        age = time.monotonic() - read_at
+        if max_age is not None and age > max_age:
+            return None, None, age
+        return humidity, temperature, age
+
+
+class TouchMonitor:
+    """터치 센서를 GPIO 엣지 콜백으로 감지하고 누적 터치 횟수를 셉니다.
+
+    상태는 콜백 스레드만 갱신하며 (level, count, last_touch) 튜플 하나로 교체하므로,
+    읽는 쪽은 핀을 건드리지 않고 락 없이 일관된 값을 얻습니다.
+    """
+
+    def __init__(self, pin, debounce_ms=TOUCH_DEBOUNCE_MS):
+        self.pin = pin
+        self.debounce_ns = debounce_ms * 1_000_000
+        self._last_edge_ns = 0
+        # (현재 레벨, 누적 터치 횟수, 마지막 터치 시각(time.time()))
+        self._state = (GPIO.input(pin), 0, None)
+        GPIO.add_event_detect(pin, GPIO.BOTH, callback=self._on_edge)
+
+    def _on_edge(self, channel):
+        now = time.monotonic_ns()
+        if now - self._last_edge_ns < self.debounce_ns:
+            return
+        level = GPIO.input(channel)
+        current, count, last_touch = self._state
+        if level == current:
+            return
+        self._last_edge_ns = now
+        if level == 1:
+            count += 1
+            last_touch = time.time()
+        self._state = (level, count, last_touch)
+
+    def state(self):
+        """(현재 터치 여부, 누적 터치 횟수, 마지막 터치 시각) 을 반환합니다."""
+        level, count, last_touch = self._state
+        return level == 1, count, last_touch
+
+    def close(self):
+        GPIO.remove_event_detect(self.pin)
+
+
+dht_sampler = DhtSampler(dhtDevice)
+touch_monitor = TouchMonitor(TOUCH_PIN)
+
+# 3. sensor functions
+def get_temperature(max_age=DHT_MAX_AGE):
+    """백그라운드 샘플러가 마지막으로 읽은 온도와 습도를 반환합니다."""
+    humidity, temperature, _ = dht_sampler.latest(max_age)
+    return humidity, temperature
 
 def get_touch():
-    """터치 센서의 상태를 감지하여 반환합니다."""
-    global last_touch_state, touch_detected
-    try:
-        current_state = GPIO.input(TOUCH_PIN)
-        if current_state == 1 and last_touch_state == 0:
-            touch_detected = True
-        elif current_state == 0 and last_touch_state == 1:
-            touch_detected = False
-        last_touch_state = current_state
-        return touch_detected
-    except Exception as e:
-        print(f"터치 센서 읽기 오류: {e}")
-        return False
+    """터치 센서가 현재 눌려 있는지 반환합니다."""
+    touched, _, _ = touch_monitor.state()
+    return touched
+
+def pulse_to_distance(pulse_ns):
+    """에코 펄스 폭(ns)을 거리(cm)로 바꿉니다. 측정 실패/범위 밖이면 -1."""
+    if pulse_ns is None:
+        SENSOR_ERRORS.inc(sensor='distance', kind='echo_timeout')
+        return -1
+    distance = pulse_ns / 1e9 * SOUND_SPEED_HALF
+    if distance >= 400:
+        SENSOR_ERRORS.inc(sensor='distance', kind='out_of_range')
+        return -1
+    return round(distance, 1)
 
 def get_distance():
     """초음파 센서로 거리를 측정하여 반환합니다."""
+    return hardware_reads.do('distance', _measure_distance)
+
+def _measure_distance():
     try:
-        with sensor_lock:
-            GPIO.output(TRIG, False)
-            time.sleep(0.2)
-            GPIO.output(TRIG, True)
-            time.sleep(0.00001)
+        with ultrasonic_lock:
             GPIO.output(TRIG, False)
+            time.sleep(ULTRASONIC_SETTLE)
+            return pulse_to_distance(echo_timer.measure(TRIG))
+    except Exception as e:
+        SENSOR_ERRORS.inc(sensor='distance', kind='error')
+        print(f"거리 센서 읽기 오류: {e}")
+        return -1
 
-            pulse_start = time.time()
-            pulse_end = time.time()
-            timeout = pulse_start + 0.1
-
-            while GPIO.input(ECHO) == 0 and pulse_start < timeout:
-                pulse_start = time.time()
+async def get_distance_async():
+    """get_distance() 의 asyncio 버전. 다른 곳에서 측정 중이면 그 결과를 같이 받습니다."""
+    return await hardware_reads.do_async('distance', _measure_distance_async)
 
-            while GPIO.input(ECHO) == 1 and pulse_end < timeout:
-                pulse_end = time.time()
+async def _acquire_ultrasonic_lock(timeout=ULTRASONIC_LOCK_WAIT):
+    """루프를 막지 않고 ultrasonic_lock 을 기다립니다. timeout 초 안에 못 잡으면 RuntimeError.
+    (스레드에서 acquire() 로 기다리면 도중에 취소되었을 때 잡은 Lock 을 놓을 곳이 없으므로 짧게 나눠서 시도)"""
+    deadline = time.monotonic() + timeout
+    while not ultrasonic_lock.acquire(blocking=False):
+        if time.monotonic() >= deadline:
+            SENSOR_ERRORS.inc(sensor='distance', kind='busy')
+            raise RuntimeError(f"초음파 센서가 {timeout:g}s 넘게 사용 중입니다")
+        await asyncio.sleep(0.005)
 
-            pulse_duration = pulse_end - pulse_start
-            distance = pulse_duration * 17150
-            return round(distance, 1) if distance < 400 else -1
+async def _measure_distance_async():
+    # 다른 곳에서 초음파 센서로 측정 중이면 건너뛰지 않고 끝날 때까지 기다림
+    await _acquire_ultrasonic_lock()
+    try:
+        GPIO.output(TRIG, False)
+        await asyncio.sleep(ULTRASONIC_SETTLE)
+        return pulse_to_distance(await echo_timer.measure_async(TRIG))
     except Exception as e:
+        SENSOR_ERRORS.inc(sensor='distance', kind='error')
         print(f"거리 센서 읽기 오류: {e}")
         return -1
+    finally:
+        ultrasonic_lock.release()
 
 def cleanup_gpio():
     """프로그램 종료 시 GPIO를 정리합니다."""
     print("GPIO 정리 중...")
     try:
+        echo_timer.close()
+        touch_monitor.close()
         GPIO.cleanup()
         print("GPIO 정리 완료")
     except Exception as e:
@@ -0,0 +1,83 @@
+# serve.py
+# 운영용 실행 진입점: GPIO/DHT 를 가진 센서 소유 프로세스 하나와 여러 HTTP 워커를 띄웁니다.
+# 워커는 공유 메모리로 센서 값을 읽고 유닉스 소켓으로 LED 명령을 보내므로 GPIO 를 다시 설정하지 않습니다.
+# 사용법: python serve.py [워커 수] [주소:포트]
+#   gunicorn 이 있으면 gunicorn(gthread) 워커 프로세스로, 없으면 waitress 스레드로 서빙합니다.
+import os
+import secrets
+import signal
+import subprocess
+import sys
+
+from config import SENSOR_CPU, SERVE_BIND, SERVE_WORKERS, SERVE_THREADS
+
+try:
+    import gunicorn
+    GUNICORN_AVAILABLE = True
+except ImportError:
+    GUNICORN_AVAILABLE = False
+
+try:
+    import waitress
+    WAITRESS_AVAILABLE = True
+except ImportError:
+    WAITRESS_AVAILABLE = False
+
+
+def load_app():
+    """워커 쪽에서 앱을 불러옵니다. 센서는 소유 프로세스에 붙는 client 모드로 만듭니다."""
+    import config
+    config.ACQUISITION_MODE = 'client'
+    from app import app
+    return app
+
+
+def signal_handler(sig, frame):
+    # SIGTERM 도 Ctrl+C 와 같은 종료 경로(finally)를 타도록 함
+    raise KeyboardInterrupt
+
+
+def main(workers, bind):
+    from sensor_process import SensorProcess, AUTHKEY_ENV
+
+    # 실행마다 새 인증 키를 만들어 워커에게만 환경 변수로 전달
+    authkey = secrets.token_hex(16)
+    os.environ[AUTHKEY_ENV] = authkey
+    owner = SensorProcess(cpu=SENSOR_CPU, serve_workers=True, authkey=authkey.encode())
+    owner.start()
+    owner.wait_ready()
+    print(f"센서 소유 프로세스 준비 완료, {bind} 에서 서빙 시작...")
+
+    # 워커가 센서 프로세스 핸들을 물려받지 않도록 WSGI 서버는 새 프로세스로 실행
+    if GUNICORN_AVAILABLE:
+        # /stream, /ws 처럼 오래 열린 연결이 워커 하나를 통째로 잡지 않도록 스레드 워커 사용
+        command = ['gunicorn', '--bind', bind, '--workers', str(workers),
+                   '--worker-class', 'gthread', '--threads', str(SERVE_THREADS), 'serve:load_app()']
+    elif WAITRESS_AVAILABLE:
+        print("gunicorn 이 없어 waitress(단일 프로세스, 다중 스레드)로 서빙합니다")
+        command = ['waitress', f'--listen={bind}', f'--threads={workers * SERVE_THREADS}',
+                   '--call', 'serve:load_app']
+    else:
+        print("gunicorn 또는 waitress 가 필요합니다 (pip install gunicorn)")
+        owner.stop()
+        return
+
+    server = None
+    try:
+        server = subprocess.Popen([sys.executable, '-m', *command],
+                                  cwd=os.path.dirname(os.path.abspath(__file__)))
+        server.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print("\n프로그램 종료 중...")
+        if server is not None and server.poll() is None:
+            server.terminate()  # WSGI 서버는 SIGTERM 에 진행 중인 요청을 마치고 종료
+            server.wait()
+        owner.stop()
+
+
+if __name__ == '__main__':
+    signal.signal(signal.SIGTERM, signal_handler)
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else SERVE_WORKERS,
+         sys.argv[2] if len(sys.argv) > 2 else SERVE_BIND)
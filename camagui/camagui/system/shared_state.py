@@ -0,0 +1,186 @@
+# shared_state.py
+# 센서 프로세스가 쓰고 웹 서버 프로세스가 읽는 공유 메모리 레이아웃(seqlock 방식)을 정의합니다.
+#
+# 영역마다 맨 앞에 8바이트 버전 카운터가 있습니다. 쓰는 쪽은 버전을 홀수로 올린 뒤 내용을 쓰고
+# 다시 짝수로 올립니다. 읽는 쪽은 버전이 짝수이고 복사 전후 버전이 같을 때만 값을 인정하고,
+# 아니면 다시 읽습니다. 그래서 읽는 쪽은 Lock 없이, 쓰는 쪽을 전혀 막지 않고 읽습니다.
+import math
+import struct
+import time
+
+from snapshot import Snapshot
+from timeseries import RingBuffer
+
+VERSION = struct.Struct('<Q')
+# seq, timestamp, temperature, humidity, climate_read_at, distance,
+# proximity_alert, touched, touch_count, last_touch, leds[3]
+SNAPSHOT = struct.Struct('<q5d2?qd3B')
+RING_HEADER = struct.Struct('<II')   # head, count
+
+NAN = float('nan')
+
+
+def _align8(n):
+    return (n + 7) & ~7
+
+
+def _to_float(value):
+    return NAN if value is None else float(value)
+
+
+def _from_float(value):
+    return None if math.isnan(value) else value
+
+
+class SharedLayout:
+    """스냅샷 영역 하나와 센서별 링 버퍼 영역의 오프셋을 계산합니다."""
+
+    def __init__(self, ring_names, capacity):
+        self.capacity = capacity
+        self.snapshot_offset = 0
+        offset = _align8(VERSION.size + SNAPSHOT.size)
+        self.ring_offsets = {}
+        for name in ring_names:
+            self.ring_offsets[name] = offset
+            offset += _align8(VERSION.size + RING_HEADER.size) + 16 * capacity
+        self.size = offset
+
+
+class _SeqLock:
+    """공유 메모리의 offset 위치에 있는 버전 카운터."""
+
+    def __init__(self, buf, offset):
+        self.buf = buf
+        self.offset = offset
+
+    def version(self):
+        return VERSION.unpack_from(self.buf, self.offset)[0]
+
+    def begin_write(self):
+        VERSION.pack_into(self.buf, self.offset, self.version() + 1)
+
+    end_write = begin_write
+
+    def read(self, func):
+        """func() 를 일관된 상태에서 실행될 때까지 반복하고 그 결과를 반환합니다."""
+        while True:
+            before = self.version()
+            if before & 1:
+                time.sleep(0)   # 쓰는 중이면 양보 후 재시도
+                continue
+            result = func()
+            if self.version() == before:
+                return result
+
+
+class SharedSnapshotWriter:
+    """센서 프로세스 쪽: SnapshotStore(on_publish=writer.write) 로 연결해서 사용합니다."""
+
+    def __init__(self, buf, layout):
+        self.buf = buf
+        self.offset = layout.snapshot_offset + VERSION.size
+        self.lock = _SeqLock(buf, layout.snapshot_offset)
+
+    def write(self, snap):
+        self.lock.begin_write()
+        SNAPSHOT.pack_into(self.buf, self.offset,
+                           snap.seq, snap.timestamp,
+                           _to_float(snap.temperature), _to_float(snap.humidity),
+                           _to_float(snap.climate_read_at), float(snap.distance),
+                           bool(snap.proximity_alert), bool(snap.touched),
+                           snap.touch_count, _to_float(snap.last_touch), *snap.leds)
+        self.lock.end_write()
+
+
+class SharedSnapshotReader:
+    """웹 서버 쪽: SnapshotStore 처럼 get() 으로 최신 스냅샷을 돌려줍니다."""
+
+    def __init__(self, buf, layout):
+        self.buf = buf
+        self.offset = layout.snapshot_offset + VERSION.size
+        self.lock = _SeqLock(buf, layout.snapshot_offset)
+        self._cached = (None, Snapshot())
+
+    def get(self):
+        version, snap = self._cached
+        if self.lock.version() == version:
+            # 바뀐 게 없으면 이전에 만든 객체를 그대로 재사용
+            return snap
+        version, values = self.lock.read(
+            lambda: (self.lock.version(), SNAPSHOT.unpack_from(self.buf, self.offset)))
+        (seq, timestamp, temperature, humidity, climate_read_at, distance,
+         proximity_alert, touched, touch_count, last_touch, *leds) = values
+        snap = Snapshot(seq=seq, timestamp=timestamp,
+                        temperature=_from_float(temperature), humidity=_from_float(humidity),
+                        climate_read_at=_from_float(climate_read_at), distance=distance,
+                        proximity_alert=proximity_alert, touched=touched,
+                        touch_count=touch_count, last_touch=_from_float(last_touch),
+                        leds=tuple(leds))
+        self._cached = (version, snap)
+        return snap
+
+
+class SharedRingBuffer(RingBuffer):
+    """공유 메모리 위의 RingBuffer. 센서 프로세스가 append 하고 웹 서버 프로세스가 읽습니다."""
+
+    def __init__(self, buf, layout, name):
+        offset = layout.ring_offsets[name]
+        self.capacity = layout.capacity
+        self.buf = buf
+        self.lock = _SeqLock(buf, offset)
+        self._header_offset = offset + VERSION.size
+        data = _align8(offset + VERSION.size + RING_HEADER.size)
+        size = 8 * self.capacity
+        self._times = buf[data:data + size].cast('d')
+        self._values = buf[data + size:data + 2 * size].cast('d')
+
+    def _header(self):
+        return RING_HEADER.unpack_from(self.buf, self._header_offset)
+
+    def __len__(self):
+        return self.lock.read(lambda: self._header()[1])
+
+    def append(self, value, timestamp=None):
+        head, count = self._header()
+        self.lock.begin_write()
+        self._times[head] = time.time() if timestamp is None else timestamp
+        self._values[head] = value
+        RING_HEADER.pack_into(self.buf, self._header_offset,
+                              (head + 1) % self.capacity, min(count + 1, self.capacity))
+        self.lock.end_write()
+
+    def _points(self, head, count, limit):
+        limit = min(limit, count)
+        result = []
+        idx = head
+        for _ in range(limit):
+            idx = (idx - 1) % self.capacity
+            result.append((self._times[idx], self._values[idx]))
+        return result
+
+    def recent(self, n):
+        def read():
+            head, count = self._header()
+            return self._points(head, count, n)
+        return self.lock.read(read)
+
+    def since(self, seconds, now=None):
+        cutoff = (time.time() if now is None else now) - seconds
+
+        def read():
+            head, count = self._header()
+            result = []
+            idx = head
+            for _ in range(count):
+                idx = (idx - 1) % self.capacity
+                ts = self._times[idx]
+                if ts < cutoff:
+                    break
+                result.append((ts, self._values[idx]))
+            return result
+        return self.lock.read(read)
+
+    def release(self):
+        # SharedMemory.close() 전에 memoryview 를 풀어야 함
+        self._times.release()
+        self._values.release()
@@ -0,0 +1,103 @@
+# singleflight.py
+# 같은 장치를 동시에 읽으려는 호출들을 실제 하드웨어 읽기 한 번으로 합칩니다.
+import asyncio
+import threading
+import time
+
+
+class _Call:
+    """진행 중인 읽기 하나. 끝나면 done 이 set 되고 result 또는 error 가 채워집니다."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """key(장치) 별로 진행 중인 읽기가 있으면 새로 읽지 않고 그 결과를 같이 받습니다.
+
+    window 초 안에 끝난 읽기의 결과도 다시 읽지 않고 재사용합니다. 단 오류가 났거나
+    cacheable(결과) 가 거짓인 읽기(기본: None, 즉 실패/건너뜀)는 재사용하지 않습니다.
+    스레드에서 부르는 do() 와 asyncio 루프에서 부르는 do_async() 가 같은 key 를 공유할 수 있습니다.
+    """
+
+    def __init__(self, window=0.0, cacheable=None):
+        self.window = window
+        self.cacheable = cacheable or (lambda result: result is not None)
+        self._lock = threading.Lock()
+        self._calls = {}     # key -> 진행 중인 _Call
+        self._recent = {}    # key -> (result, 끝난 시각)
+        self._counts = {}    # key -> {'reads', 'coalesced', 'hits'}
+
+    def _begin(self, key):
+        """(재사용할 결과가 있는지, 결과, _Call, 직접 읽어야 하는지) 를 반환합니다."""
+        with self._lock:
+            counts = self._counts.setdefault(key, {'reads': 0, 'coalesced': 0, 'hits': 0})
+            recent = self._recent.get(key)
+            if recent is not None and time.monotonic() - recent[1] <= self.window:
+                counts['hits'] += 1
+                return True, recent[0], None, False
+            call = self._calls.get(key)
+            if call is not None:
+                counts['coalesced'] += 1
+                return False, None, call, False
+            call = self._calls[key] = _Call()
+            counts['reads'] += 1
+            return False, None, call, True
+
+    def _finish(self, key, call):
+        with self._lock:
+            del self._calls[key]
+            if call.error is None and self.cacheable(call.result):
+                self._recent[key] = (call.result, time.monotonic())
+            else:
+                # 실패한 읽기 때문에 그 전의 성공한 결과가 계속 재사용되지 않도록 지움
+                self._recent.pop(key, None)
+        call.done.set()
+
+    @staticmethod
+    def _result(call):
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def do(self, key, func):
+        """func() 를 실행하거나, 같은 key 의 진행 중/최근 읽기 결과를 반환합니다."""
+        hit, result, call, leader = self._begin(key)
+        if hit:
+            return result
+        if not leader:
+            call.done.wait()
+            return self._result(call)
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            self._finish(key, call)
+        return call.result
+
+    async def do_async(self, key, func):
+        """do() 의 asyncio 버전. func 는 코루틴 함수입니다."""
+        hit, result, call, leader = self._begin(key)
+        if hit:
+            return result
+        if not leader:
+            # 다른 스레드의 읽기일 수도 있으므로 루프를 막지 않게 스레드에서 기다림
+            await asyncio.to_thread(call.done.wait)
+            return self._result(call)
+        try:
+            call.result = await func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            self._finish(key, call)
+        return call.result
+
+    def stats(self):
+        """key 별 실제 읽기(reads), 진행 중 읽기에 합류(coalesced), 최근 결과 재사용(hits) 횟수."""
+        with self._lock:
+            return {key: dict(counts) for key, counts in self._counts.items()}
@@ -0,0 +1,65 @@
+# snapshot.py
+# 현재 센서 값과 장치 상태를 하나의 불변 스냅샷으로 묶어 스레드 간에 안전하게 공유합니다.
+import dataclasses
+import threading
+import time
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class Snapshot:
+    """한 시점의 모든 센서 값과 장치 상태. 만들어진 뒤에는 바뀌지 않습니다."""
+    seq: int = 0
+    timestamp: float = 0.0          # 발행 시각 (time.time())
+    temperature: float = None
+    humidity: float = None
+    climate_read_at: float = None   # 온습도를 읽은 시각 (time.monotonic())
+    distance: float = -1
+    proximity_alert: bool = False
+    touched: bool = False
+    touch_count: int = 0
+    last_touch: float = None        # 마지막 터치 시각 (time.time())
+    leds: tuple = (0, 0, 0)
+
+    def climate_age(self):
+        """온습도 값이 읽힌 지 몇 초 지났는지 반환합니다. 읽은 적이 없으면 None."""
+        if self.climate_read_at is None:
+            return None
+        return time.monotonic() - self.climate_read_at
+
+
+class SnapshotStore:
+    """최신 Snapshot 을 참조 하나로 보관합니다.
+
+    쓰는 쪽은 새 Snapshot 을 만들어 참조를 한 번에 바꾸고, 읽는 쪽은 get() 으로
+    Lock 없이 항상 완전한 스냅샷 하나를 얻습니다.
+    """
+
+    def __init__(self, initial=None, on_publish=None):
+        self._current = initial or Snapshot()
+        # 새 스냅샷이 발행될 때마다 쓰기 Lock 안에서 호출 (공유 메모리 미러링 등)
+        self._on_publish = on_publish
+        # 쓰는 쪽끼리만 직렬화 (읽기-수정-쓰기 경쟁 방지)
+        self._write_lock = threading.Lock()
+
+    def get(self):
+        return self._current
+
+    def modify(self, func):
+        """func(현재 스냅샷) 이 돌려준 변경 사항으로 새 스냅샷을 발행합니다."""
+        with self._write_lock:
+            current = self._current
+            changes = func(current) or {}
+            # 값이 그대로인 필드는 빼서, 실제로 바뀐 게 없으면 seq 를 올리지 않음
+            changes = {k: v for k, v in changes.items() if getattr(current, k) != v}
+            if not changes:
+                return current
+            new = dataclasses.replace(current, seq=current.seq + 1, timestamp=time.time(), **changes)
+            self._current = new
+            if self._on_publish is not None:
+                self._on_publish(new)
+            return new
+
+    def update(self, **changes):
+        """주어진 필드만 바꾼 새 스냅샷을 발행합니다."""
+        return self.modify(lambda current: changes)
@@ -18,116 +18,203 @@ function updateSwitchLabel(switchElement, labelElement) {
     }
 }
 
-// --- 모드에 따라 스위치 활성/비활성 제어 --- 
-async function updateSwitchesByMode() {
-    try {
-        const res = await fetch('/gettouch', { cache: 'no-store' });
-        const data = await res.json();
-        const isManual = Number(data.current_state) === 1;
-
-        const aircon = document.getElementById('airconSwitch');
-        const heater = document.getElementById('heaterSwitch');
-        const humidifier = document.getElementById('humidifierSwitch');
+// --- 서버에서 받은 최신 값 (/stream 은 바뀐 값만 보내므로 여기에 합쳐 둠) ---
+const sensorState = {};
+const LED_SWITCH_IDS = ['airconSwitch', 'heaterSwitch', 'humidifierSwitch'];
+const LED_LABEL_IDS = ['airconState', 'heaterState', 'humidifierState'];
+
+// --- 모드(터치)에 따라 스위치 활성/비활성 및 모드 표시 제어 ---
+function renderMode() {
+    const isManual = sensorState.touched === true;
+
+    LED_SWITCH_IDS.forEach(id => {
+        const sw = document.getElementById(id);
+        if (sw) sw.disabled = !isManual;
+    });
+
+    const modeEl = document.getElementById('modeSwitch');
+    if (modeEl) {
+        modeEl.classList.toggle('is-manu', isManual);
+        modeEl.classList.toggle('is-auto', !isManual);
+    }
 
-        [aircon, heater, humidifier].forEach(sw => {
-            if (sw) sw.disabled = !isManual;
-        });
-    } catch (e) {
-        console.error('스위치 모드 업데이트 오류:', e);
+    const modeDesc = document.getElementById('modeDesc');
+    if (modeDesc) {
+        if (isManual) {
+            modeDesc.innerHTML = '모드: <b>MANU</b> — <b>AUTO</b>일 때는 개별 ON/OFF가 비활성화됩니다.';
+        } else {
+            modeDesc.innerHTML = '모드: <b>AUTO</b> — 개별 ON/OFF가 비활성화됩니다.';
+        }
     }
 }
 
-async function updateDistance() {
-    try {
-        const res = await fetch("/getdistance");
-        const data = await res.json();
+// --- LED 상태를 스위치에 반영 (다른 화면에서 바꾼 것도 따라감) ---
+function renderLeds() {
+    if (!Array.isArray(sensorState.leds)) return;
+    sensorState.leds.forEach((state, index) => {
+        const sw = document.getElementById(LED_SWITCH_IDS[index]);
+        if (!sw) return;
+        sw.checked = state === 1;
+        updateSwitchLabel(sw, document.getElementById(LED_LABEL_IDS[index]));
+    });
+}
 
-        const distanceValueElement = document.getElementById("current-distance-value");
-        const statusElement = document.getElementById("proximity-status");
+function renderDistance() {
+    const distanceValueElement = document.getElementById("current-distance-value");
+    const statusElement = document.getElementById("proximity-status");
+    const container = document.getElementById('main-container');
 
-        if (data.value !== "Out of Range" && data.value !== -1) {
-            const distanceInCm = Math.round(data.value);
-            distanceValueElement.textContent = distanceInCm;
-        } else {
-            distanceValueElement.textContent = "측정 불가";
-        }
+    if (sensorState.distance !== undefined && sensorState.distance !== -1) {
+        distanceValueElement.textContent = Math.round(sensorState.distance);
+    } else {
+        distanceValueElement.textContent = "측정 불가";
+    }
 
-        if (data.alert) {
-            statusElement.textContent = "Status: PROXIMITY ALERT!";
-            statusElement.classList.remove("status-normal");
-            statusElement.classList.add("status-alert");
-        } else {
-            statusElement.textContent = "Status: Normal";
-            statusElement.classList.remove("status-alert");
-            statusElement.classList.add("status-normal");
+    if (sensorState.alert) {
+        statusElement.textContent = "Status: PROXIMITY ALERT!";
+        statusElement.classList.remove("status-normal");
+        statusElement.classList.add("status-alert");
+    } else {
+        statusElement.textContent = "Status: Normal";
+        statusElement.classList.remove("status-alert");
+        statusElement.classList.add("status-normal");
+    }
+
+    // 경고 거리 이내면 테두리 색상 변경
+    if (container) container.classList.toggle('danger-border', sensorState.alert === true);
+}
+
+function renderClimate() {
+    const temperatureElement = document.getElementById("temperature-value");
+    const humidityElement = document.getElementById("humidity-value");
+    const climateStatusElement = document.getElementById("climate-status");
+    const climateStatusTextElement = document.getElementById("climate-status-text");
+
+    if (sensorState.temperature != null && sensorState.humidity != null) {
+        temperatureElement.textContent = sensorState.temperature.toFixed(1);
+        humidityElement.textContent = sensorState.humidity.toFixed(1);
+
+        let statusText = "정상";
+        let statusClass = "climate-normal";
+
+        if (sensorState.temperature < 10) {
+            statusText = "추움";
+            statusClass = "climate-cold";
+        } else if (sensorState.temperature > 30) {
+            statusText = "더움";
+            statusClass = "climate-hot";
+        } else if (sensorState.humidity > 80) {
+            statusText = "습함";
+            statusClass = "climate-humid";
+        } else if (sensorState.humidity < 30) {
+            statusText = "건조함";
+            statusClass = "climate-dry";
         }
-    } catch (error) {
-        console.error("Failed to fetch distance:", error);
-        document.getElementById("current-distance-value").textContent = "연결 오류";
+
+        climateStatusTextElement.textContent = statusText;
+        climateStatusElement.className = statusClass;
+    } else {
+        temperatureElement.textContent = "--";
+        humidityElement.textContent = "--";
+        climateStatusTextElement.textContent = "센서 오류";
+        climateStatusElement.className = "climate-error";
+    }
+}
+
+function renderAll() {
+    renderDistance();
+    renderClimate();
+    renderMode();
+    renderLeds();
+}
+
+// --- /stream (Server-Sent Events) 구독: 폴링 대신 값이 바뀔 때만 받음 ---
+// 연결이 끊기면 브라우저가 Last-Event-ID 를 붙여 자동으로 재접속합니다.
+function connectStream() {
+    const source = new EventSource('/stream');
+
+    source.addEventListener('reading', event => {
+        const changed = JSON.parse(event.data);
+        Object.assign(sensorState, changed);
+        if ('distance' in changed || 'alert' in changed) renderDistance();
+        if ('temperature' in changed || 'humidity' in changed) renderClimate();
+        if ('touched' in changed) renderMode();
+        if ('leds' in changed) renderLeds();
+    });
+
+    // 재접속되면 가지고 있던 값으로 화면 복구 (같은 seq 면 서버는 다시 보내지 않음)
+    source.addEventListener('open', renderAll);
+
+    source.addEventListener('error', () => {
+        console.error("센서 스트림 연결 오류, 재접속 대기 중");
         const statusElement = document.getElementById("proximity-status");
         statusElement.textContent = "Status: Error";
         statusElement.classList.remove("status-alert");
         statusElement.classList.add("status-normal");
-    }
+        document.getElementById("climate-status-text").textContent = "연결 오류";
+        document.getElementById("climate-status").className = "climate-error";
+    });
 }
 
-async function updateTemperatureHumidity() {
-    try {
-        const res = await fetch("/gettemperature");
-        const data = await res.json();
+// --- WebSocket 제어 채널: 연결되어 있으면 페이지 이동 없이 명령을 보내고 ack 를 받음 ---
+let controlSocket = null;
+let controlRetryDelay = 1000;
+let nextCommandId = 1;
+
+function connectControl() {
+    const scheme = location.protocol === 'https:' ? 'wss' : 'ws';
+    const socket = new WebSocket(`${scheme}://${location.host}/ws`);
+
+    socket.addEventListener('open', () => {
+        controlSocket = socket;
+        controlRetryDelay = 1000;
+    });
+
+    socket.addEventListener('message', event => {
+        const message = JSON.parse(event.data);
+        if (message.type === 'ack' && !message.ok) {
+            console.error('LED 제어 실패:', message.error);
+            renderLeds();  // 실패하면 서버가 알고 있는 상태로 되돌림
+            return;
+        }
+        // 내 명령의 ack 와 다른 대시보드가 바꾼 state 모두 LED 상태를 담고 있음
+        if (Array.isArray(message.leds)) {
+            sensorState.leds = message.leds;
+            renderLeds();
+        }
+    });
+
+    socket.addEventListener('close', () => {
+        controlSocket = null;
+        // 서버에 /ws 가 없거나 끊겼으면 점점 늦게 재시도 (그동안은 HTTP 로 보냄)
+        setTimeout(connectControl, controlRetryDelay);
+        controlRetryDelay = Math.min(controlRetryDelay * 2, 30000);
+    });
+}
 
-        const temperatureElement = document.getElementById("temperature-value");
-        const humidityElement = document.getElementById("humidity-value");
-        const climateStatusElement = document.getElementById("climate-status");
-        const climateStatusTextElement = document.getElementById("climate-status-text");
-
-        if (data.status === "success" && data.temperature !== null && data.humidity !== null) {
-            temperatureElement.textContent = data.temperature.toFixed(1);
-            humidityElement.textContent = data.humidity.toFixed(1);
-
-            let statusText = "정상";
-            let statusClass = "climate-normal";
-
-            if (data.temperature < 10) {
-                statusText = "추움";
-                statusClass = "climate-cold";
-            } else if (data.temperature > 30) {
-                statusText = "더움";
-                statusClass = "climate-hot";
-            } else if (data.humidity > 80) {
-                statusText = "습함";
-                statusClass = "climate-humid";
-            } else if (data.humidity < 30) {
-                statusText = "건조함";
-                statusClass = "climate-dry";
-            }
-
-            climateStatusTextElement.textContent = statusText;
-            climateStatusElement.className = statusClass;
-        } else {
-            temperatureElement.textContent = "--";
-            humidityElement.textContent = "--";
-            climateStatusTextElement.textContent = "센서 오류";
-            climateStatusElement.className = "climate-error";
+async function sendLed(index, state) {
+    if (controlSocket && controlSocket.readyState === WebSocket.OPEN) {
+        controlSocket.send(JSON.stringify({ id: nextCommandId++, leds: { [index]: state } }));
+    } else {
+        // WebSocket 이 없으면 JSON API 로 보냄 (페이지를 다시 그리는 /<n>/<state> 대신)
+        const res = await fetch('/api/v1/leds', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ leds: { [index]: state } }),
+        });
+        const data = await res.json();
+        if (Array.isArray(data.leds)) {
+            sensorState.leds = data.leds;
+            renderLeds();
         }
-    } catch (error) {
-        console.error("Failed to fetch temperature/humidity:", error);
-        document.getElementById("temperature-value").textContent = "--";
-        document.getElementById("humidity-value").textContent = "--";
-        document.getElementById("climate-status-text").textContent = "연결 오류";
-        document.getElementById("climate-status").className = "climate-error";
     }
 }
 
 // --- 페이지 로드 시 실행될 메인 로직 ---
 document.addEventListener('DOMContentLoaded', () => {
-    // 주기적으로 센서 값 업데이트
-    setInterval(updateDistance, 1000);
-    setInterval(updateTemperatureHumidity, 2000);
-    
-    // 모드 상태 주기적 확인 및 스위치 활성화/비활성화
-    updateSwitchesByMode();
-    setInterval(updateSwitchesByMode, 1000);
+    // 센서 값, 모드, LED 상태는 모두 스트림 하나로 업데이트
+    connectStream();
+    connectControl();
 
     // --- 각 스위치 요소 가져오기 ---
     const aircon = document.getElementById('airconSwitch');
@@ -148,21 +235,21 @@ document.addEventListener('DOMContentLoaded', () => {
         aircon.addEventListener('change', async () => {
             const state = aircon.checked ? 1 : 0;
             updateSwitchLabel(aircon, airconState); // 라벨 업데이트
-            await fetch(`/0/${state}`);
+            await sendLed(0, state);
         });
     }
     if (heater) {
         heater.addEventListener('change', async () => {
             const state = heater.checked ? 1 : 0;
             updateSwitchLabel(heater, heaterState); // 라벨 업데이트
-            await fetch(`/1/${state}`);
+            await sendLed(1, state);
         });
     }
     if (humidifier) {
         humidifier.addEventListener('change', async () => {
             const state = humidifier.checked ? 1 : 0;
             updateSwitchLabel(humidifier, humidifierState); // 라벨 업데이트
-            await fetch(`/2/${state}`);
+            await sendLed(2, state);
         });
     }
 });
\ No newline at end of file
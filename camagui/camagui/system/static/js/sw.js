@@ -7,6 +7,8 @@ self.addEventListener('install', (event) => {
 // 서비스 워커가 fetch(네트워크 요청) 이벤트를 가로챌 때 실행됩니다.
 // 이 부분이 있어야 '설치 가능한 앱'으로 인식됩니다.
 self.addEventListener('fetch', (event) => {
+  // 센서 스트림(/stream)은 가로채지 않고 브라우저가 직접 연결하도록 둠
+  if (event.request.headers.get('Accept') === 'text/event-stream') return;
   // 현재는 네트워크 요청에 아무런 조작도 하지 않고 그대로 보내줍니다.
   event.respondWith(fetch(event.request));
 });
\ No newline at end of file
@@ -0,0 +1,142 @@
+# storage.py
+# 센서 기록 저장소 인터페이스입니다. 저장(배치), 최근 N개, 기간 조회, 집계를 정의하고
+# MariaDB(storage_mariadb.py) 와 내장 SQLite(storage_sqlite.py) 구현 중 config.DB_BACKEND 로 고릅니다.
+#
+# 두 DB 모두 ? 자리표시자와 같은 SELECT 문을 받으므로 조회는 이 기본 클래스에서 한 번만 작성하고,
+# 구현은 연결 관리, 스키마 준비, 롤업 누적 문법, 보관 기간 정리만 다르게 합니다.
+import abc
+import contextlib
+import time
+
+from metrics import REGISTRY
+from iotcommon.rollup import aggregate
+
+# 버킷 크기(초) -> 롤업 테이블
+ROLLUP_TABLES = {60: 'Controller3_1m', 3600: 'Controller3_1h'}
+
+DB_SECONDS = REGISTRY.histogram('db_operation_duration_seconds', 'DB 작업 시간 (acquire/insert/query)', ('op',))
+DB_ERRORS = REGISTRY.counter('db_errors_total', 'DB 작업 실패 횟수', ('op',))
+
+
+class Storage(abc.ABC):
+    """기록 저장소. 행은 (temp, humid, dist, touch, 시각) 이고 sensor 는 HISTORY_SENSORS 중 하나(검증된 컬럼명)입니다.
+
+    구현은 connection(), prepare(), upsert_sql(table), maintain() 을 정의하고
+    Error 에 그 DB 드라이버의 오류 클래스를 둡니다 (호출하는 쪽은 storage.Error 로 잡음).
+    """
+
+    name = 'storage'
+    Error = Exception
+
+    def __init__(self, sensors):
+        self.sensors = sensors
+
+    @abc.abstractmethod
+    def connection(self):
+        """연결 하나를 빌려주는 context manager 입니다."""
+
+    @abc.abstractmethod
+    def prepare(self):
+        """스키마를 최신으로 만듭니다. 시작할 때 한 번 부르고, 저장(insert_batch)할 때는 부르지 않습니다."""
+
+    @abc.abstractmethod
+    def upsert_sql(self, table):
+        """롤업 테이블 table 에 (sensor, bucket, min, max, sum, samples) 를 누적하는 SQL 입니다."""
+
+    @abc.abstractmethod
+    def maintain(self):
+        """보관 기간이 지난 기록을 정리합니다. 정리한 내용을 [(테이블, 설명), ...] 로 반환합니다."""
+
+    def stats(self):
+        return {'backend': self.name}
+
+    def to_db(self, timestamp):
+        """datetime 을 이 DB 에 넘길 값으로 바꿉니다."""
+        return timestamp
+
+    def from_db(self, value):
+        """DB 에서 읽은 시각 값을 datetime 으로 바꿉니다."""
+        return value
+
+    @contextlib.contextmanager
+    def timed(self, op):
+        """with 블록 시간을 DB_SECONDS 에 기록하고, DB 오류는 DB_ERRORS 에 셉니다."""
+        start = time.perf_counter()
+        try:
+            yield
+        except self.Error:
+            DB_ERRORS.inc(op=op)
+            raise
+        finally:
+            DB_SECONDS.observe(time.perf_counter() - start, op=op)
+
+    def _fetch(self, op, query, params=()):
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                with self.timed(op):
+                    cursor.execute(query, params)
+                    return cursor.fetchall()
+            finally:
+                cursor.close()
+
+    def insert_batch(self, rows):
+        """(temp, humid, dist, touch, 시각) 행들과 그 1분/1시간 집계를 한 트랜잭션으로 저장합니다."""
+        samples = [(sensor, row[index], row[4]) for row in rows for index, sensor in enumerate(self.sensors)]
+        values = [(*row[:4], self.to_db(row[4])) for row in rows]
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                with self.timed('insert'):
+                    cursor.executemany("INSERT INTO Controller3 (temperature, humidity, distance, touch_detected, "
+                                       "log_time) VALUES (?, ?, ?, ?, ?)", values)
+                    for seconds, table in ROLLUP_TABLES.items():
+                        buckets = [(key, self.to_db(bucket), *agg)
+                                   for key, bucket, *agg in aggregate(samples, seconds)]
+                        if buckets:
+                            cursor.executemany(self.upsert_sql(table), buckets)
+                    conn.commit()
+            finally:
+                cursor.close()
+
+    def latest(self, sensor, limit):
+        """sensor 의 최근 기록 limit 개를 [(시각, 값), ...] 로 최신순으로 가져옵니다 (log_time 인덱스 역순 탐색)."""
+        rows = self._fetch('query', f"SELECT log_time, {sensor} FROM Controller3 WHERE {sensor} IS NOT NULL "
+                                    f"ORDER BY log_time DESC LIMIT {int(limit)}")
+        return [(self.from_db(timestamp), value) for timestamp, value in rows]
+
+    def range_query(self, sensor, since, bucket=None):
+        """since 이후 기록을 [(시각, 평균, 최소, 최대, 개수), ...] 로 시간순으로 가져옵니다.
+        bucket 이 None 이면 원본, 60/3600 이면 롤업 테이블에서 읽습니다."""
+        if bucket is None:
+            query = (f"SELECT log_time, {sensor}, {sensor}, {sensor}, 1 FROM Controller3 "
+                     f"WHERE log_time >= ? AND {sensor} IS NOT NULL ORDER BY log_time")
+            params = (self.to_db(since),)
+        else:
+            query = (f"SELECT bucket, sum_value / samples, min_value, max_value, samples FROM {ROLLUP_TABLES[bucket]} "
+                     f"WHERE sensor = ? AND bucket >= ? ORDER BY bucket")
+            params = (sensor, self.to_db(since))
+        return [(self.from_db(timestamp), *rest) for timestamp, *rest in self._fetch('query', query, params)]
+
+    def aggregate(self, sensor, since, bucket=60):
+        """since 이후 기록의 count/min/max/avg 를 롤업 테이블에서 한 번에 계산합니다 (버킷 경계까지 포함)."""
+        rows = self._fetch('query', f"SELECT SUM(samples), MIN(min_value), MAX(max_value), SUM(sum_value) "
+                                    f"FROM {ROLLUP_TABLES[bucket]} WHERE sensor = ? AND bucket >= ?",
+                           (sensor, self.to_db(since)))
+        count, low, high, total = rows[0] if rows else (None, None, None, None)
+        if not count:
+            return {'count': 0, 'min': None, 'max': None, 'avg': None}
+        # MariaDB 는 SUM 을 DECIMAL 로 돌려주므로 숫자형을 맞춤
+        return {'count': int(count), 'min': low, 'max': high, 'avg': float(total) / int(count)}
+
+
+def open_storage(backend, sensors):
+    """config.DB_BACKEND 에 맞는 저장소를 만듭니다. 쓰지 않는 DB 드라이버는 import 하지 않습니다."""
+    if backend == 'mariadb':
+        from storage_mariadb import MariaDbStorage
+        return MariaDbStorage(sensors)
+    if backend == 'sqlite':
+        from config import SQLITE_PATH
+        from storage_sqlite import SqliteStorage
+        return SqliteStorage(SQLITE_PATH, sensors)
+    raise ValueError(f"알 수 없는 DB_BACKEND: {backend}")
@@ -0,0 +1,77 @@
+# storage_mariadb.py
+# MariaDB 저장소 구현입니다. 연결은 연결 풀(iotcommon/db_pool.py)에서 빌려 쓰고, 스키마는 migrate.py 의 마이그레이션으로
+# (센서 프로세스 시작 때 또는 python migrate.py up),
+# 보관 기간 정리는 날짜 범위 파티션(iotcommon/partitions.py)을 통째로 지우는 방식으로 합니다.
+import contextlib
+import time
+
+import mariadb
+
+from config import DB_CONFIG, DB_POOL_SIZE, DB_POOL_TIMEOUT, DB_PING_INTERVAL, RETENTION_DAYS, PARTITION_AHEAD
+from iotcommon.db_pool import DbPool
+from metrics import REGISTRY
+from iotcommon.partitions import maintain
+from iotcommon.rollup import upsert_sql
+from storage import Storage, DB_SECONDS
+
+# 파티션으로 나눈 테이블: (테이블, 시각 컬럼, 파티션 단위, RETENTION_DAYS 키). 1시간 집계는 영구 보관이라 나누지 않음
+PARTITIONED_TABLES = (('Controller3', 'log_time', 'day', 'raw'),
+                      ('Controller3_1m', 'bucket', 'month', 'minute'))
+
+# 저장(LoggerTask)과 조회(/history)가 함께 쓰는 연결 풀. 프로세스마다 처음 쓸 때 만들어짐
+pool = DbPool(DB_CONFIG, size=DB_POOL_SIZE, name='camagui', timeout=DB_POOL_TIMEOUT,
+              ping_interval=DB_PING_INTERVAL)
+
+REGISTRY.callback('db_pool_connections', 'DB 연결 풀 연결 수 (state=size/in_use/peak_in_use)', 'gauge',
+                  lambda: {(state,): pool.stats()[state] for state in ('size', 'in_use', 'peak_in_use')},
+                  ('state',))
+REGISTRY.callback('db_pool_events_total', 'DB 연결 풀 이벤트 횟수', 'counter',
+                  lambda: {(event,): pool.stats()[event]
+                           for event in ('acquired', 'waits', 'empty', 'refills', 'timeouts',
+                                         'reconnects', 'failures')},
+                  ('event',))
+
+
+class MariaDbStorage(Storage):
+    """DB_CONFIG 의 MariaDB 서버에 저장합니다."""
+
+    name = 'mariadb'
+    Error = mariadb.Error
+
+    def __init__(self, sensors):
+        super().__init__(sensors)
+        self.pool = pool
+
+    @contextlib.contextmanager
+    def connection(self):
+        """풀에서 연결을 빌려 쓰고 반납합니다. 빌리는 데 걸린 시간은 op='acquire' 로 기록합니다.
+        (빌리지 못한 경우는 풀 통계의 timeouts/failures 에 셉니다)"""
+        start = time.perf_counter()
+        with self.pool.connection() as conn:
+            DB_SECONDS.observe(time.perf_counter() - start, op='acquire')
+            yield conn
+
+    def prepare(self):
+        """적용되지 않은 마이그레이션(롤업 테이블, 파티션 등)을 적용합니다.
+        테이블을 다시 만드는 단계도 있으므로 저장 경로(BatchWriter)가 아니라 시작할 때 부릅니다."""
+        from migrate import MIGRATIONS
+        from iotcommon.migrator import upgrade
+        with self.connection() as conn:
+            upgrade(conn, MIGRATIONS)
+
+    def upsert_sql(self, table):
+        return upsert_sql(table)
+
+    def maintain(self):
+        """미래 파티션을 미리 만들고 보관 기간(RETENTION_DAYS)이 지난 파티션을 지웁니다."""
+        done = []
+        with self.connection() as conn:
+            for table, _, unit, policy in PARTITIONED_TABLES:
+                with self.timed('maintenance'):
+                    added, dropped = maintain(conn, table, unit, RETENTION_DAYS[policy], PARTITION_AHEAD)
+                if added or dropped:
+                    done.append((table, f"추가 {added}, 삭제 {dropped}"))
+        return done
+
+    def stats(self):
+        return dict(self.pool.stats(), backend=self.name)
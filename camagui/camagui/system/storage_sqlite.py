@@ -0,0 +1,148 @@
+# storage_sqlite.py
+# 내장 SQLite 저장소 구현입니다. DB 서버 없이 파일 하나(SQLITE_PATH)에 저장하므로
+# 작은 설치나 MariaDB 가 없는 CI/벤치마크 환경에서도 앱 전체를 그대로 돌릴 수 있습니다.
+#
+# - WAL 모드: 센서 프로세스가 쓰는 동안에도 웹 프로세스/스레드가 막히지 않고 읽음.
+#   synchronous=NORMAL 이라 commit 마다 fsync 하지 않고 체크포인트 때 모아서 씀.
+# - 문장은 모두 ? 자리표시자를 쓰는 고정 SQL 이라 연결마다 한 번만 컴파일되고
+#   sqlite3 의 문장 캐시(cached_statements)에서 준비된 문장(prepared statement)으로 재사용됨.
+# - 스키마는 PRAGMA user_version 으로 버전을 매겨서 처음 연결할 때 적용.
+# - 파티션이 없으므로 보관 기간이 지난 기록은 시각 인덱스 범위로 DELETE.
+import contextlib
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+from config import RETENTION_DAYS
+from iotcommon.rollup import sqlite_upsert_sql, table_sql
+from storage import Storage, ROLLUP_TABLES
+
+# (버전, [SQL, ...]) — MariaDB 의 migrate.py 와 같은 최종 구조
+MIGRATIONS = [
+    (1, [
+        """
+        CREATE TABLE IF NOT EXISTS Controller3 (
+            id INTEGER PRIMARY KEY,
+            temperature REAL NULL,
+            humidity REAL NULL,
+            distance REAL NULL,
+            touch_detected INTEGER NOT NULL DEFAULT 0,
+            log_time TEXT NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_log_time ON Controller3 (log_time)",
+        # 롤업은 (sensor, bucket) 기본 키 순서로 저장되도록 rowid 없는 테이블로 만듦
+        *[table_sql(table, 'TEXT') + " WITHOUT ROWID" for table in ROLLUP_TABLES.values()],
+    ]),
+]
+
+# 보관 기간 정리 대상: (테이블, 시각 컬럼, RETENTION_DAYS 키)
+RETENTION_TABLES = (('Controller3', 'log_time', 'raw'),
+                    ('Controller3_1m', 'bucket', 'minute'),
+                    ('Controller3_1h', 'bucket', 'hour'))
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'  # 글자 순서 == 시간 순서 (MariaDB DATETIME 과 같은 초 단위)
+
+
+class SqliteStorage(Storage):
+    """path 의 SQLite 파일에 저장합니다. 연결은 스레드마다 하나씩 (fork 된 자식은 새로) 엽니다."""
+
+    name = 'sqlite'
+    Error = sqlite3.Error
+
+    def __init__(self, path, sensors, busy_timeout=5.0):
+        super().__init__(sensors)
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = 0
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # 다른 프로세스가 쓰는 중이면 busy_timeout 초까지 기다림
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout, cached_statements=256)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        self._migrate(conn)
+        with self._lock:
+            self._connections += 1
+        return conn
+
+    def _migrate(self, conn):
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= MIGRATIONS[-1][0]:
+            return
+        # 여러 프로세스가 동시에 처음 열어도 한 곳에서만 적용하도록 쓰기 잠금을 먼저 잡음
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for target, steps in MIGRATIONS:
+                if target <= version:
+                    continue
+                print(f"SQLite 스키마 {target} 적용 중 ({self.path})")
+                for step in steps:
+                    conn.execute(step)
+                conn.execute(f"PRAGMA user_version = {int(target)}")
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+
+    @contextlib.contextmanager
+    def connection(self):
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            local.conn, local.pid = self._connect(), os.getpid()
+        conn = local.conn
+        try:
+            yield conn
+        finally:
+            # 끝나지 않은 트랜잭션은 되돌려서 다음 사용에 넘기지 않음 (db_pool 의 반납과 같은 동작)
+            if conn.in_transaction:
+                conn.rollback()
+
+    def prepare(self):
+        # 스키마는 연결할 때 적용되므로 이 스레드의 연결을 미리 열어 둠
+        with self.connection():
+            pass
+
+    def upsert_sql(self, table):
+        return sqlite_upsert_sql(table)
+
+    def to_db(self, timestamp):
+        return timestamp.strftime(TIME_FORMAT)
+
+    def from_db(self, value):
+        return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+    def maintain(self):
+        """보관 기간(RETENTION_DAYS)이 지난 기록을 지웁니다. 시각 인덱스(또는 롤업 기본 키) 범위 삭제입니다."""
+        done = []
+        now = datetime.now()
+        with self.connection() as conn:
+            for table, column, policy in RETENTION_TABLES:
+                days = RETENTION_DAYS[policy]
+                if days is None:
+                    continue
+                with self.timed('maintenance'):
+                    if column == 'bucket':
+                        # 롤업 기본 키는 (sensor, bucket) 이므로 센서별로 범위를 지정해야 키 범위 삭제가 됨
+                        deleted = 0
+                        for sensor in self.sensors:
+                            deleted += conn.execute(f"DELETE FROM {table} WHERE sensor = ? AND bucket < ?",
+                                                    (sensor, self.to_db(now - timedelta(days=days)))).rowcount
+                    else:
+                        deleted = conn.execute(f"DELETE FROM {table} WHERE {column} < ?",
+                                               (self.to_db(now - timedelta(days=days)),)).rowcount
+                    conn.commit()
+                if deleted:
+                    done.append((table, f"삭제 {deleted}행"))
+            # 통계가 바뀐 인덱스만 다시 분석 (쿼리 계획 유지)
+            conn.execute("PRAGMA optimize")
+        return done
+
+    def stats(self):
+        with self._lock:
+            return {'backend': self.name, 'path': self.path, 'connections': self._connections}
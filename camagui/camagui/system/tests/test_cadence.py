@@ -0,0 +1,166 @@
+# test_cadence.py
+# DHT 가 계속 실패/재시도하며 자기 Lock 을 오래 잡고 있어도 초음파 측정 주기가 유지되는지 확인합니다.
+# GPIO/DHT 모듈을 가짜로 바꿔 끼우고 실제 sensor_utils 의 get_distance_async, DhtSampler, 장치별 Lock 을
+# SensorHub 에 물려서 돌립니다. 주기와 재시도 시간은 실제(0.5 s, 3 s)보다 줄여서 몇 초 안에 끝납니다.
+# 비교용으로 초음파 Lock 을 DHT Lock 과 같은 객체로 바꾼 경우(예전 공유 Lock)는 주기가 깨져야 합니다.
+import asyncio
+import importlib
+import sys
+import threading
+import time
+import types
+
+import pytest
+
+from sensor_hub import SensorHub
+
+DISTANCE_PERIOD = 0.1       # s, 실제 DISTANCE_POLL_INTERVAL 대신
+CLIMATE_PERIOD = 0.2        # s, DHT 를 쉬지 않고 다시 읽도록 재시도 시간보다 짧게
+DHT_RETRY_TIME = 0.6        # s, 예전 get_temperature() 의 3회 x 1 s 재시도처럼 DHT 읽기가 Lock 을 잡는 시간
+ECHO_PULSE = 0.00058        # s, 약 10 cm 거리의 에코 펄스 폭
+RUN_TIME = 1.2              # s, 경우마다 허브를 돌리는 시간
+TOUCH_PIN = 25
+
+
+class FakeGPIO(types.ModuleType):
+    """RPi.GPIO 대역: TRIG 펄스가 끝나면 ECHO 엣지 콜백을 두 번(상승/하강) 불러 줍니다."""
+
+    BCM = 'BCM'
+    IN = 'IN'
+    OUT = 'OUT'
+    BOTH = 'BOTH'
+
+    def __init__(self):
+        super().__init__('RPi.GPIO')
+        self.callbacks = {}
+        self.levels = {}
+
+    def setmode(self, mode):
+        pass
+
+    def setup(self, pins, mode):
+        pass
+
+    def input(self, pin):
+        return 0
+
+    def output(self, pin, value):
+        was_high = self.levels.get(pin)
+        self.levels[pin] = value
+        if was_high and not value:
+            for echo_pin, callback in list(self.callbacks.items()):
+                threading.Timer(0.0001, callback, (echo_pin,)).start()
+                threading.Timer(0.0001 + ECHO_PULSE, callback, (echo_pin,)).start()
+
+    def add_event_detect(self, pin, edge, callback=None, bouncetime=None):
+        if pin != TOUCH_PIN:
+            self.callbacks[pin] = callback
+
+    def remove_event_detect(self, pin):
+        self.callbacks.pop(pin, None)
+
+    def cleanup(self):
+        pass
+
+
+class FailingDHT11:
+    """읽을 때마다 재시도 끝에 체크섬 오류를 내는 DHT11."""
+
+    def __init__(self, pin):
+        self.pin = pin
+
+    @property
+    def humidity(self):
+        time.sleep(DHT_RETRY_TIME)
+        raise RuntimeError("Checksum did not validate")
+
+    @property
+    def temperature(self):
+        raise RuntimeError("Checksum did not validate")
+
+
+@pytest.fixture(scope='module')
+def sensor_utils():
+    """가짜 GPIO/DHT 를 등록한 상태로 sensor_utils 를 import 합니다 (이 모듈이 끝나면 되돌림)."""
+    gpio = FakeGPIO()
+    rpi = types.ModuleType('RPi')
+    rpi.GPIO = gpio
+    fakes = {
+        'RPi': rpi,
+        'RPi.GPIO': gpio,
+        'board': types.SimpleNamespace(D26='D26'),
+        'adafruit_dht': types.SimpleNamespace(DHT11=FailingDHT11),
+        'lgpio': None,   # RPi.GPIO 콜백 경로 사용
+    }
+    saved = {name: sys.modules.get(name) for name in (*fakes, 'sensor_utils')}
+    sys.modules.update(fakes)
+    sys.modules.pop('sensor_utils', None)
+    try:
+        module = importlib.import_module('sensor_utils')
+        module.ULTRASONIC_SETTLE = 0.01
+        yield module
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = value
+
+
+def run_hub(sensor_utils, shared_lock):
+    """허브를 RUN_TIME 동안 돌리고 (성공한 거리 측정 시각 목록, 거리 작업 통계) 를 반환합니다."""
+    per_device_lock = sensor_utils.ultrasonic_lock
+    if shared_lock:
+        sensor_utils.ultrasonic_lock = sensor_utils.dht_lock
+    stamps = []
+
+    async def read_distance():
+        distance = await sensor_utils.get_distance_async()
+        if distance is not None and distance != -1:
+            stamps.append(time.monotonic())
+        return distance
+
+    hub = SensorHub()
+    hub.schedule('distance', read_distance, DISTANCE_PERIOD, timeout=1.0)
+    hub.schedule('climate', sensor_utils.dht_sampler.sample, CLIMATE_PERIOD, timeout=2.0)
+    hub.start()
+    try:
+        time.sleep(RUN_TIME)
+    finally:
+        hub.stop()
+        sensor_utils.ultrasonic_lock = per_device_lock
+        # 멈출 때 진행 중이던 DHT 읽기가 끝나서 Lock 을 놓을 때까지 기다림
+        assert sensor_utils.dht_lock.acquire(timeout=DHT_RETRY_TIME * 2)
+        sensor_utils.dht_lock.release()
+    return stamps, hub.stats()['distance']
+
+
+def intervals(stamps):
+    return [b - a for a, b in zip(stamps, stamps[1:])]
+
+
+def test_per_device_lock_keeps_distance_cadence(sensor_utils):
+    assert sensor_utils.ultrasonic_lock is not sensor_utils.dht_lock
+    stamps, stats = run_hub(sensor_utils, shared_lock=False)
+    # DHT 가 내내 Lock 을 잡고 있어도 거리는 주기마다 측정됨
+    assert len(stamps) >= RUN_TIME / DISTANCE_PERIOD * 0.7
+    assert max(intervals(stamps)) < DISTANCE_PERIOD * 1.5
+    assert stats['failures'] == stats['timeouts'] == 0
+
+
+def test_shared_lock_breaks_distance_cadence(sensor_utils):
+    stamps, stats = run_hub(sensor_utils, shared_lock=True)
+    # 같은 Lock 이면 DHT 재시도 동안 거리 측정이 기다리다가 실패하고, DHT 읽기 사이에만 측정됨
+    assert stats['failures'] > 0
+    assert len(stamps) < RUN_TIME / DISTANCE_PERIOD * 0.7
+
+
+def test_distance_waits_for_busy_lock(sensor_utils, monkeypatch):
+    # 다른 곳에서 측정 중이면 건너뛰지(None) 않고 끝날 때까지 기다렸다가 측정함
+    monkeypatch.setattr(sensor_utils.hardware_reads, 'window', 0)
+    sensor_utils.ultrasonic_lock.acquire()
+    threading.Timer(0.1, sensor_utils.ultrasonic_lock.release).start()
+    start = time.monotonic()
+    distance = asyncio.run(sensor_utils.get_distance_async())
+    assert distance not in (None, -1)
+    assert time.monotonic() - start >= 0.1
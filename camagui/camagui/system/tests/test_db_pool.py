@@ -0,0 +1,32 @@
+# test_db_pool.py
+# DB 가 꺼졌다 돌아왔을 때 연결 풀이 잃어버린 연결을 다시 채우는지 확인합니다.
+import mariadb
+import pytest
+
+
+def test_pool_refills_after_outage(server, pool):
+    with pool.connection():
+        pass
+    server.up = False
+    for _ in range(3):
+        with pytest.raises(mariadb.Error):
+            with pool.connection():
+                pass
+    server.up = True
+    with pool.connection() as conn:
+        conn.insert([(1,)])
+    stats = pool.stats()
+    assert server.rows == [(1,)]
+    assert stats['refills'] >= 1
+    assert stats['empty'] >= 1
+    assert stats['timeouts'] == 0
+
+
+def test_pool_waits_when_all_connections_busy(pool):
+    with pool.connection(), pool.connection():
+        with pytest.raises(mariadb.PoolError):
+            with pool.connection():
+                pass
+    stats = pool.stats()
+    assert stats['timeouts'] == 1
+    assert stats['empty'] == 0
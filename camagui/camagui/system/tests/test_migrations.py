@@ -0,0 +1,222 @@
+# test_migrations.py
+# migrate.py 의 마이그레이션이 순서대로 한 번씩 적용되는지, 그리고 기간 조회/파티션 관리가 만드는 SQL 이
+# 파티션 컬럼/기본 키 범위를 쓰는지 확인합니다. DB 서버 대신 실행한 SQL 을 기록하는 가짜 연결을 씁니다.
+import contextlib
+from datetime import date, datetime
+
+import pytest
+
+import migrate
+from iotcommon.migrator import Check, Migration, explain, is_current, run_checks, upgrade
+from iotcommon.partitions import maintain, to_days
+from iotcommon.rollup import choose_resolution
+from storage import Storage
+
+
+class FakeDb:
+    """실행한 SQL 을 statements 에 모으고, 마이그레이션 기록/파티션/EXPLAIN 조회에만 답하는 가짜 MariaDB."""
+
+    def __init__(self):
+        self.statements = []
+        self.versions = set()
+        self.partitions = {}    # 테이블 -> [(이름, 상한), ...]
+        self.explain_rows = []
+
+    def cursor(self, dictionary=False):
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+        self.rows = []
+        self.rowcount = 0
+
+    def execute(self, query, params=()):
+        sql = ' '.join(query.split())
+        self.db.statements.append((sql, params))
+        self.rows = []
+        if sql.startswith('SELECT GET_LOCK'):
+            self.rows = [(1,)]
+        elif sql.startswith('SELECT version FROM schema_migrations'):
+            self.rows = [(version,) for version in sorted(self.db.versions)]
+        elif sql.startswith('INSERT INTO schema_migrations'):
+            self.db.versions.add(params[0])
+        elif 'INFORMATION_SCHEMA.TABLES' in sql:
+            self.rows = [(1 if self.db.versions else 0,)]
+        elif 'INFORMATION_SCHEMA.PARTITIONS' in sql:
+            self.rows = [(name, 'MAXVALUE' if bound is None else str(bound))
+                         for name, bound in self.db.partitions.get(params[0], [])]
+        elif sql.startswith('EXPLAIN'):
+            self.rows = self.db.explain_rows
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+def executed(db, prefix):
+    return [sql for sql, _ in db.statements if sql.startswith(prefix)]
+
+
+def test_migrations_are_ordered_and_unique():
+    versions = [m.version for m in migrate.MIGRATIONS]
+    assert versions == sorted(set(versions))
+
+
+def test_upgrade_applies_migrations_in_order_once():
+    db = FakeDb()
+    assert not is_current(db, migrate.MIGRATIONS)
+    assert upgrade(db, migrate.MIGRATIONS, target=2) == [1, 2]
+    assert not is_current(db, migrate.MIGRATIONS)
+
+    assert upgrade(db, migrate.MIGRATIONS) == [3, 4]
+    assert is_current(db, migrate.MIGRATIONS)
+    assert upgrade(db, migrate.MIGRATIONS) == []
+
+    ddl = [sql for sql, _ in db.statements if sql.startswith(('CREATE TABLE IF NOT EXISTS Controller3', 'ALTER'))]
+    assert ddl[0].startswith('CREATE TABLE IF NOT EXISTS Controller3 (')
+    assert 'ADD INDEX IF NOT EXISTS idx_log_time' in ddl[1]
+    assert [sql.split()[5] for sql in ddl[2:4]] == ['Controller3_1m', 'Controller3_1h']
+    # 파티션 컬럼이 기본 키에 들어간 뒤에 파티션으로 나눔
+    assert ddl[4] == 'ALTER TABLE Controller3 DROP PRIMARY KEY, ADD PRIMARY KEY (id, log_time)'
+    assert ddl[5].startswith('ALTER TABLE Controller3 PARTITION BY RANGE (TO_DAYS(log_time))')
+    assert ddl[6].startswith('ALTER TABLE Controller3_1m PARTITION BY RANGE (TO_DAYS(bucket))')
+    assert len(ddl) == 7
+    # 마이그레이션마다 적용 기록을 남기고, 서버 쪽 잠금은 매번 풂
+    assert [params[0] for sql, params in db.statements if sql.startswith('INSERT INTO schema_migrations')] == \
+        [1, 2, 3, 4]
+    assert len(executed(db, 'SELECT GET_LOCK')) == len(executed(db, 'SELECT RELEASE_LOCK')) == 3
+
+
+def test_upgrade_skips_applied_versions():
+    db = FakeDb()
+    db.versions = {1, 2, 3}
+    steps = []
+    migrations = [Migration(5, 'five', lambda conn: steps.append(5)),
+                  Migration(4, 'four', lambda conn: steps.append(4)),
+                  Migration(2, 'two', lambda conn: steps.append(2))]
+    assert upgrade(db, migrations) == [4, 5]
+    assert steps == [4, 5]
+
+
+def test_partition_by_range_skips_partitioned_table():
+    db = FakeDb()
+    db.partitions['Controller3'] = [('p_old', 1), ('pmax', None)]
+    db.versions = {1, 2, 3}
+    upgrade(db, migrate.MIGRATIONS)
+    assert not [sql for sql in executed(db, 'ALTER TABLE Controller3 ') if 'PARTITION BY' in sql]
+    assert executed(db, 'ALTER TABLE Controller3_1m PARTITION BY RANGE')
+
+
+def test_maintain_adds_and_drops_day_partitions():
+    db = FakeDb()
+    today = date(2025, 3, 10)
+    db.partitions['Controller3'] = [('p_old', to_days(date(2025, 3, 1))),
+                                    ('p20250301', to_days(date(2025, 3, 2))),
+                                    ('p20250309', to_days(date(2025, 3, 10))),
+                                    ('p20250310', to_days(date(2025, 3, 11))),
+                                    ('pmax', None)]
+    added, dropped = maintain(db, 'Controller3', 'day', retention_days=7, ahead=2, today=today)
+    assert added == ['p20250311', 'p20250312']
+    assert dropped == ['p_old', 'p20250301']
+    assert executed(db, 'ALTER') == [
+        f"ALTER TABLE Controller3 REORGANIZE PARTITION pmax INTO "
+        f"(PARTITION p20250311 VALUES LESS THAN ({to_days(date(2025, 3, 12))}), "
+        f"PARTITION p20250312 VALUES LESS THAN ({to_days(date(2025, 3, 13))}), "
+        f"PARTITION pmax VALUES LESS THAN MAXVALUE)",
+        "ALTER TABLE Controller3 DROP PARTITION p_old, p20250301",
+    ]
+
+
+def test_maintain_month_partitions_keep_unexpired():
+    db = FakeDb()
+    db.partitions['Controller3_1m'] = [('p202501', to_days(date(2025, 2, 1))),
+                                       ('p202502', to_days(date(2025, 3, 1))),
+                                       ('p202503', to_days(date(2025, 4, 1))),
+                                       ('pmax', None)]
+    added, dropped = maintain(db, 'Controller3_1m', 'month', retention_days=40, ahead=1, today=date(2025, 3, 15))
+    assert added == ['p202504']
+    assert dropped == ['p202501']
+
+
+class RecordingStorage(Storage):
+    """기간 조회가 만드는 SQL 을 확인하기 위한 저장소."""
+
+    name = 'recording'
+
+    def __init__(self, sensors):
+        super().__init__(sensors)
+        self.db = FakeDb()
+
+    @contextlib.contextmanager
+    def connection(self):
+        yield self.db
+
+    def prepare(self):
+        pass
+
+    def upsert_sql(self, table):
+        return f"UPSERT {table}"
+
+    def maintain(self):
+        return []
+
+
+def test_range_queries_use_time_and_rollup_keys():
+    storage = RecordingStorage(('temperature',))
+    since = datetime(2025, 3, 10, 12, 0)
+    storage.range_query('temperature', since)
+    storage.range_query('temperature', since, 60)
+    storage.range_query('temperature', since, 3600)
+    storage.aggregate('temperature', since)
+    (raw, raw_params), (minute, minute_params), (hour, _), (total, total_params) = storage.db.statements
+    # 원본은 파티션 컬럼(log_time) 범위 조건이라 지난 파티션은 읽지 않음
+    assert raw == ("SELECT log_time, temperature, temperature, temperature, 1 FROM Controller3 "
+                   "WHERE log_time >= ? AND temperature IS NOT NULL ORDER BY log_time")
+    assert raw_params == (since,)
+    # 롤업은 (sensor, bucket) 기본 키 범위
+    assert minute == ("SELECT bucket, sum_value / samples, min_value, max_value, samples FROM Controller3_1m "
+                      "WHERE sensor = ? AND bucket >= ? ORDER BY bucket")
+    assert minute_params == ('temperature', since)
+    assert 'FROM Controller3_1h WHERE sensor = ? AND bucket >= ?' in hour
+    assert 'FROM Controller3_1m WHERE sensor = ? AND bucket >= ?' in total
+    assert total_params == ('temperature', since)
+
+
+@pytest.mark.parametrize('span, expected', [
+    (3600, ('raw', None)),              # 5초 간격 720개
+    (5000, ('raw', None)),              # 정확히 1000개
+    (5005, ('minute', 60)),
+    (60000, ('minute', 60)),
+    (60060, ('hour', 3600)),
+    (30 * 86400, ('hour', 3600)),
+    (10 ** 9, ('hour', 3600)),          # 가장 거친 해상도보다 많아도 시간 단위
+])
+def test_choose_resolution(span, expected):
+    assert choose_resolution(span, 5, 1000) == expected
+
+
+def test_checks_cover_history_and_rollups():
+    names = [check.name for check in migrate.CHECKS]
+    assert names == ['history temperature', 'history humidity', 'history distance',
+                     'rollup Controller3_1m', 'rollup Controller3_1h']
+
+
+def test_explain_requires_key_without_filesort():
+    db = FakeDb()
+    check = Check('rollup', "SELECT 1", key='PRIMARY')
+    db.explain_rows = [{'key': 'PRIMARY', 'Extra': 'Using where'}]
+    assert explain(db, check)[0]
+    db.explain_rows = [{'key': 'PRIMARY', 'Extra': 'Using where; Using filesort'}]
+    assert not explain(db, check)[0]
+    db.explain_rows = [{'key': None, 'Extra': ''}]
+    assert not run_checks(db, [check])
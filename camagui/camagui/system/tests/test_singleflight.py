@@ -0,0 +1,56 @@
+# test_singleflight.py
+# 성공한 읽기만 window 동안 재사용하고, 실패(예외)/건너뜀(None) 결과는 다음 호출이 다시 읽는지 확인합니다.
+import asyncio
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def reader(*results):
+    """부를 때마다 results 를 차례로 돌려주는(예외면 올리는) 읽기 함수와 호출 횟수 목록."""
+    calls = []
+
+    def read():
+        result = results[len(calls)]
+        calls.append(result)
+        if isinstance(result, Exception):
+            raise result
+        return result
+    return read, calls
+
+
+def test_success_is_reused_within_window():
+    flight = SingleFlight(window=60)
+    read, calls = reader(1.5, 2.5)
+    assert flight.do('distance', read) == 1.5
+    assert flight.do('distance', read) == 1.5
+    assert len(calls) == 1
+    assert flight.stats()['distance'] == {'reads': 1, 'coalesced': 0, 'hits': 1}
+
+
+@pytest.mark.parametrize('failed', [None, RuntimeError("busy")])
+def test_failed_read_is_not_reused(failed):
+    flight = SingleFlight(window=60)
+    read, calls = reader(failed, 3.0, 4.0)
+    if isinstance(failed, Exception):
+        with pytest.raises(RuntimeError):
+            flight.do('distance', read)
+    else:
+        assert flight.do('distance', read) is None
+    assert flight.do('distance', read) == 3.0
+    assert flight.do('distance', read) == 3.0
+    assert len(calls) == 2
+
+
+def test_cacheable_predicate_and_async():
+    flight = SingleFlight(window=60, cacheable=lambda result: result != -1)
+    results = iter([-1, 7.0, 8.0])
+
+    async def read():
+        return next(results)
+
+    async def main():
+        return [await flight.do_async('distance', read) for _ in range(3)]
+
+    assert asyncio.run(main()) == [-1, 7.0, 7.0]
@@ -0,0 +1,31 @@
+# test_spool.py
+# DB 가 꺼져 있는 동안 스풀에 쌓인 기록이 DB 가 돌아온 뒤 모두 옮겨지고 스풀이 비워지는지 확인합니다.
+import mariadb
+import pytest
+
+from iotcommon.spool import Spool
+
+
+def test_spool_drains_after_outage(server, pool, tmp_path):
+    spool = Spool(str(tmp_path / 'readings.spool'))
+
+    def insert(rows):
+        with pool.connection() as conn:
+            conn.insert(rows)
+
+    insert([])  # 풀은 DB 가 살아 있을 때 만들어져 있음
+    server.up = False
+    for batch in range(5):
+        rows = [(batch, i) for i in range(10)]
+        with pytest.raises(mariadb.Error):
+            insert(rows)
+        spool.append(rows)
+    with pytest.raises(mariadb.Error):
+        spool.drain(insert, batch_size=20)
+    assert spool.pending_bytes() > 0
+
+    server.up = True
+    assert spool.drain(insert, batch_size=20) == 50
+    assert spool.pending_bytes() == 0
+    assert len(server.rows) == 50
+    assert (tmp_path / 'readings.spool').stat().st_size == 0
@@ -0,0 +1,85 @@
+# test_storage_sqlite.py
+# SQLite 저장소로 배치 저장, 최근 N개, 기간 조회(원본/롤업), 집계, 롤업 누적이 맞게 동작하는지 확인합니다.
+from datetime import datetime, timedelta
+
+import pytest
+
+from storage import Storage, open_storage
+from storage_sqlite import SqliteStorage
+
+SENSORS = ('temperature', 'humidity', 'distance')
+START = datetime(2024, 1, 1, 12, 0, 0)
+
+
+def rows(count, start=START, step=20):
+    """step 초 간격의 (temp, humid, dist, touch, 시각) 행. 세 번째 행마다 거리는 None."""
+    return [(20.0 + i, 40.0 + i, None if i % 3 == 2 else 100.0 + i, i % 2, start + timedelta(seconds=i * step))
+            for i in range(count)]
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return SqliteStorage(str(tmp_path / 'test.db'), SENSORS)
+
+
+def test_storage_is_abstract():
+    with pytest.raises(TypeError):
+        Storage(SENSORS)
+
+
+def test_open_storage_sqlite(tmp_path, monkeypatch):
+    monkeypatch.setattr('config.SQLITE_PATH', str(tmp_path / 'open.db'))
+    storage = open_storage('sqlite', SENSORS)
+    assert isinstance(storage, SqliteStorage)
+    with pytest.raises(ValueError):
+        open_storage('oracle', SENSORS)
+
+
+def test_insert_batch_and_latest(storage):
+    storage.insert_batch(rows(9))
+    latest = storage.latest('temperature', 3)
+    assert latest == [(START + timedelta(seconds=160), 28.0),
+                      (START + timedelta(seconds=140), 27.0),
+                      (START + timedelta(seconds=120), 26.0)]
+    # None 인 기록은 건너뜀
+    assert [value for _, value in storage.latest('distance', 2)] == [107.0, 106.0]
+
+
+def test_range_query_raw(storage):
+    storage.insert_batch(rows(9))
+    points = storage.range_query('temperature', START + timedelta(seconds=100))
+    assert points == [(START + timedelta(seconds=s), 20.0 + s / 20, 20.0 + s / 20, 20.0 + s / 20, 1)
+                      for s in (100, 120, 140, 160)]
+    assert len(storage.range_query('distance', START)) == 6
+
+
+def test_range_query_bucketed(storage):
+    storage.insert_batch(rows(9))   # 12:00:00 ~ 12:02:40, 1분에 3개씩
+    points = storage.range_query('temperature', START, 60)
+    assert points == [(START, 21.0, 20.0, 22.0, 3),
+                      (START + timedelta(minutes=1), 24.0, 23.0, 25.0, 3),
+                      (START + timedelta(minutes=2), 27.0, 26.0, 28.0, 3)]
+    assert storage.range_query('temperature', START + timedelta(minutes=1), 60)[0][0] == START + timedelta(minutes=1)
+    assert storage.range_query('temperature', START, 3600) == [(START, 24.0, 20.0, 28.0, 9)]
+    # 센서별로 따로 모이고 None 은 세지 않음
+    assert [count for *_, count in storage.range_query('distance', START, 60)] == [2, 2, 2]
+
+
+def test_aggregate(storage):
+    storage.insert_batch(rows(9))
+    assert storage.aggregate('temperature', START) == {'count': 9, 'min': 20.0, 'max': 28.0, 'avg': 24.0}
+    assert storage.aggregate('temperature', START + timedelta(minutes=2)) == {
+        'count': 3, 'min': 26.0, 'max': 28.0, 'avg': 27.0}
+    assert storage.aggregate('temperature', START + timedelta(hours=1)) == {
+        'count': 0, 'min': None, 'max': None, 'avg': None}
+
+
+def test_rollup_upsert_accumulates(storage):
+    # 같은 1분 버킷에 배치를 나눠 저장해도 한 버킷으로 누적됨
+    storage.insert_batch(rows(2, step=10))
+    storage.insert_batch([(5.0, 40.0, None, 0, START + timedelta(seconds=30)),
+                          (50.0, 40.0, None, 0, START + timedelta(seconds=50))])
+    assert storage.range_query('temperature', START, 60) == [(START, 24.0, 5.0, 50.0, 4)]
+    assert storage.range_query('temperature', START, 3600) == [(START, 24.0, 5.0, 50.0, 4)]
+    with storage.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM Controller3_1m WHERE sensor = 'temperature'").fetchone() == (1,)
@@ -0,0 +1,26 @@
+# test_timeseries.py
+# RingBuffer 의 최근 n 개 조회와 통계가 같은 구간을 보는지 확인합니다.
+from timeseries import RingBuffer
+
+
+def make_buffer():
+    buffer = RingBuffer(4)
+    for i, value in enumerate([1.0, 2.0, 3.0, 4.0, 5.0]):
+        buffer.append(value, timestamp=100.0 + i)
+    return buffer
+
+
+def test_recent_wraps_newest_first():
+    assert make_buffer().recent(3) == [(104.0, 5.0), (103.0, 4.0), (102.0, 3.0)]
+
+
+def test_stats_matches_recent():
+    buffer = make_buffer()
+    assert buffer.stats(n=2) == {'count': 2, 'min': 4.0, 'max': 5.0, 'avg': 4.5}
+    assert buffer.stats() == {'count': 4, 'min': 2.0, 'max': 5.0, 'avg': 3.5}
+
+
+def test_stats_zero_points_is_empty():
+    buffer = make_buffer()
+    assert buffer.recent(0) == []
+    assert buffer.stats(n=0) == {'count': 0, 'min': None, 'max': None, 'avg': None}
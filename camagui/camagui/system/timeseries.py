@@ -0,0 +1,69 @@
+# timeseries.py
+# 최근 센서 값을 고정 크기 링 버퍼(typed array)에 보관해서 DB 조회 없이 기록/통계를 제공합니다.
+import threading
+import time
+from array import array
+
+
+class RingBuffer:
+    """(timestamp, value) 를 최대 capacity 개까지 보관하는 링 버퍼.
+
+    timestamp 와 value 는 각각 array('d') 에 저장하므로 메모리 사용량이 capacity 로 고정되고
+    파이썬 객체를 따로 만들지 않습니다. 가득 차면 가장 오래된 값부터 덮어씁니다.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._times = array('d', bytes(8 * capacity))
+        self._values = array('d', bytes(8 * capacity))
+        self._head = 0     # 다음에 쓸 위치
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._count
+
+    def append(self, value, timestamp=None):
+        with self._lock:
+            self._times[self._head] = time.time() if timestamp is None else timestamp
+            self._values[self._head] = value
+            self._head = (self._head + 1) % self.capacity
+            if self._count < self.capacity:
+                self._count += 1
+
+    def _newest_first(self, limit):
+        # Lock 을 잡은 상태에서 호출
+        limit = min(limit, self._count)
+        idx = self._head
+        for _ in range(limit):
+            idx = (idx - 1) % self.capacity
+            yield self._times[idx], self._values[idx]
+
+    def recent(self, n):
+        """최근 n 개를 최신순 [(timestamp, value), ...] 로 반환합니다."""
+        with self._lock:
+            return list(self._newest_first(n))
+
+    def since(self, seconds, now=None):
+        """최근 seconds 초 안의 값을 최신순으로 반환합니다."""
+        cutoff = (time.time() if now is None else now) - seconds
+        result = []
+        with self._lock:
+            for ts, value in self._newest_first(self._count):
+                if ts < cutoff:
+                    break
+                result.append((ts, value))
+        return result
+
+    def stats(self, n=None, seconds=None):
+        """최근 n 개 또는 seconds 초 구간의 count/min/max/avg 를 반환합니다."""
+        points = self.since(seconds) if seconds is not None else self.recent(self.capacity if n is None else n)
+        if not points:
+            return {'count': 0, 'min': None, 'max': None, 'avg': None}
+        values = [value for _, value in points]
+        return {
+            'count': len(values),
+            'min': min(values),
+            'max': max(values),
+            'avg': sum(values) / len(values),
+        }
@@ -1,9 +1,20 @@
+import os
 import time
 import threading
-from flask import Flask, render_template, jsonify
+from dataclasses import dataclass, replace
+from flask import Flask, render_template, jsonify, request
 import mariadb  # MariaDB 라이브러리
-from datetime import datetime
+from datetime import datetime, timedelta
 import RPi.GPIO as GPIO
+import shared_path  # noqa: F401 (iotcommon 패키지 경로)
+from iotcommon.assets import StaticAssets
+from iotcommon.db_pool import DbPool
+from iotcommon.batch_writer import BatchWriter
+from iotcommon.spool import Spool
+from migrate import MIGRATIONS, ROLLUP_TABLES, PARTITIONED_TABLES, load_sensor_ids
+from iotcommon.migrator import upgrade, is_current
+from iotcommon.rollup import aggregate, upsert_sql, parse_range, choose_resolution, summarize
+from iotcommon.partitions import maintain
 
 # DHT11 센서 관련 모듈 import (예외 처리)
 DHT_AVAILABLE = False
@@ -27,6 +38,28 @@ DB_CONFIG = {
     'password': 'yewon',
     'database': 'IOT'
 }
+# 저장 스레드와 /history 가 함께 쓰는 연결 풀 (매번 connect 하지 않음)
+db_pool = DbPool(DB_CONFIG, size=3, name='jyw')
+
+# 기록 보관 기간 (일). 지난 기록은 파티션 단위로 통째로 삭제, None 이면 영구 보관
+RETENTION_DAYS = {'raw': 7, 'minute': 90, 'hour': None}
+MAINTENANCE_INTERVAL = 3600  # 파티션 추가/삭제 주기 (초)
+
+# DB 가 꺼져 있거나 느려서 못 쓴 기록을 남겨 두는 디스크 스풀 (DB 가 돌아오면 다시 씀)
+SPOOL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'readings.spool')
+SPOOL_REPLAY_INTERVAL = 10  # 스풀에 남은 기록을 DB 로 옮기는 주기 (초)
+
+# 센서별 측정 주기 (초). 센서마다 자기 스레드에서 돌아서 느린 DHT 읽기가 거리/터치 측정을 늦추지 않음
+CLIMATE_INTERVAL = 2.0    # DHT11 은 2초보다 자주 읽을 수 없음
+DISTANCE_INTERVAL = 0.5
+TOUCH_INTERVAL = 0.05     # 짧은 터치도 놓치지 않도록 자주 확인
+TOUCH_DEBOUNCE = 0.3      # 모드를 바꾼 뒤 이 시간 동안은 다시 바꾸지 않음
+LOG_INTERVAL = 5          # 최근에 읽은 값을 DB 에 기록하는 주기
+
+# /history?range= 로 고를 수 있는 기간과 해상도 선택 기준
+HISTORY_RANGES = (('1h', '1시간'), ('24h', '24시간'), ('7d', '7일'), ('30d', '30일'))
+HISTORY_RAW_INTERVAL = LOG_INTERVAL  # 원본 기록 간격 (초)
+HISTORY_MAX_POINTS = 1000  # 이보다 많아지면 1분/1시간 집계로 해상도를 낮춤
 
 LED_AIRCON_PIN = 17       # 에어컨 (LED 1)
 LED_HEATER_PIN = 22       # 히터 (LED 2)
@@ -37,13 +70,53 @@ ULTRASONIC_ECHO_PIN = 24 # 초음파 센서 Echo
 
 TOUCH_SENSOR_PIN = 25     # 터치 센서
 
-# 현실적인 초기값으로 설정 (일반적인 실내 환경)
-sensor_data = {"temperature": 22.0, "humidity": 50.0, "distance": 100.0}
-sensor_data_initialized = False  # 실제 센서에서 데이터를 읽었는지 확인하는 플래그
-system_status = {"mode": "AUTO", "devices": {"aircon": "OFF", "heater": "OFF", "dehumidifier": "OFF"}}
+DEVICE_PINS = {
+    "aircon": LED_AIRCON_PIN,
+    "heater": LED_HEATER_PIN,
+    "dehumidifier": LED_DEHUMIDIFIER_PIN
+}
+
+# --- 센서 값/기기 상태 스냅샷 ---
+# 불변 객체라서 한 번 만들어지면 바뀌지 않고, 갱신은 전역 참조를 새 객체로 바꾸는 것으로만 함.
+# 그래서 /data 는 Lock 없이도 항상 한 시점의 완전한 값을 반환함.
+@dataclass(frozen=True, slots=True)
+class SystemSnapshot:
+    seq: int = 0
+    # 현실적인 초기값으로 설정 (일반적인 실내 환경)
+    temperature: float = 22.0
+    humidity: float = 50.0
+    distance: float = 100.0
+    data_initialized: bool = False  # 실제 센서에서 데이터를 읽었는지 확인하는 플래그
+    mode: str = "AUTO"
+    devices: tuple = (("aircon", "OFF"), ("heater", "OFF"), ("dehumidifier", "OFF"))
+    read_at: tuple = ()  # ((센서 이름, 실제로 읽은 시각 monotonic), ...) 한 번도 읽지 않은 센서는 없음
+
+    def device_states(self):
+        return dict(self.devices)
+
+snapshot = SystemSnapshot()
+snapshot_lock = threading.Lock()  # 쓰는 쪽끼리만 직렬화
+
+def publish(func):
+    """func(현재 스냅샷) 이 돌려준 변경 사항으로 새 스냅샷을 만들어 참조를 교체"""
+    global snapshot
+    with snapshot_lock:
+        changes = func(snapshot)
+        if changes:
+            snapshot = replace(snapshot, seq=snapshot.seq + 1, **changes)
+        return snapshot
+
+def toggled_mode(snap):
+    return {"mode": "MANUAL" if snap.mode == "AUTO" else "AUTO"}
+
 previous_touch_state = 0
 GPIO_AVAILABLE = False
+# 초음파 Echo 핀 엣지 시각 (monotonic ns)
+echo_edges = []
+echo_done = threading.Event()
 app = Flask(__name__)
+# 정적 파일: 해시 이름 + gzip + immutable 캐시 (url_for('static', ...) 가 자동으로 해시 이름을 씀)
+StaticAssets(app)
 
 
 
@@ -58,6 +131,7 @@ def setup_gpio():
         GPIO.setup(ULTRASONIC_TRIG_PIN, GPIO.OUT)
         GPIO.setup(ULTRASONIC_ECHO_PIN, GPIO.IN)
         GPIO.setup(TOUCH_SENSOR_PIN, GPIO.IN, pull_up_down=GPIO.PUD_DOWN)
+        GPIO.add_event_detect(ULTRASONIC_ECHO_PIN, GPIO.BOTH, callback=on_echo_edge)
         GPIO_AVAILABLE = True
         print("GPIO setup completed.")
         return True
@@ -75,6 +149,11 @@ def control_led(pin, state):
     except Exception as e:
         print(f"LED control error: {e}")
 
+def on_echo_edge(channel):
+    echo_edges.append(time.monotonic_ns())
+    if len(echo_edges) >= 2:
+        echo_done.set()
+
 def measure_distance():
     if not GPIO_AVAILABLE:
         # 모의 거리 데이터 반환
@@ -82,182 +161,251 @@ def measure_distance():
         return 50 + random.uniform(-30, 50)
     
     try:
+        echo_edges.clear()
+        echo_done.clear()
         GPIO.output(ULTRASONIC_TRIG_PIN, True)
         time.sleep(0.00001)
         GPIO.output(ULTRASONIC_TRIG_PIN, False)
         
-        # 타임아웃을 위한 시작 시간
-        timeout_start = time.time()
-        start_time = time.time()
+        # Echo 상승/하강 엣지가 콜백으로 들어올 때까지 대기 (타임아웃 1초)
+        if not echo_done.wait(1.0):
+            return 999.0
         
-        # Echo 핀이 HIGH가 될 때까지 대기 (타임아웃 1초)
-        while GPIO.input(ULTRASONIC_ECHO_PIN) == 0:
-            start_time = time.time()
-            if time.time() - timeout_start > 1.0:
-                return 999.0
-        
-        # Echo 핀이 LOW가 될 때까지 대기 (타임아웃 1초)
-        timeout_start = time.time()
-        stop_time = time.time()
-        while GPIO.input(ULTRASONIC_ECHO_PIN) == 1:
-            stop_time = time.time()
-            if time.time() - timeout_start > 1.0:
-                return 999.0
-        
-        distance = ((stop_time - start_time) * 34300) / 2
+        distance = ((echo_edges[1] - echo_edges[0]) / 1e9 * 34300) / 2
         return distance
     except Exception as e:
         print(f"Distance measurement error: {e}")
         return 999.0
 
 # --- 데이터베이스 초기화 함수 ---
+def prepare_db(conn):
+    # 테이블 생성과 인덱스/스키마 변경은 migrate.py 의 마이그레이션으로 관리
+    # 시작할 때(init_db)와, 그때 DB 가 꺼져 있었으면 스풀 재저장 스레드에서만 호출:
+    # 오래 걸리는 마이그레이션을 요청이나 배치 저장 안에서 돌리지 않음
+    if not sensor_ids:
+        upgrade(conn, MIGRATIONS)
+        sensor_ids.update(load_sensor_ids(conn))
+
+def load_sensor_ids_if_current(conn):
+    # 조회 쪽: 마이그레이션은 돌리지 않고, 스키마가 최신일 때만 센서 id 를 읽음. 최신이 아니면 False
+    if not sensor_ids:
+        if not is_current(conn, MIGRATIONS):
+            return False
+        sensor_ids.update(load_sensor_ids(conn))
+    return True
+
 def init_db():
     try:
-        conn = mariadb.connect(**DB_CONFIG)
-        cursor = conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS readings (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                sensor_type VARCHAR(50) NOT NULL,
-                value FLOAT NOT NULL,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        conn.commit()
-        cursor.close()
-        conn.close()
+        with db_pool.connection() as conn:
+            prepare_db(conn)
         print("MariaDB database initialized.")
     except mariadb.Error as e:
+        # DB 가 꺼져 있어도 종료하지 않음: 기록은 스풀에 쌓이고, 연결되면 그때 마이그레이션 적용
         print(f"Error connecting to MariaDB: {e}")
-        exit()
+        print("Readings will be spooled to disk until the database is back.")
+
+# --- 센서 기록 배치 저장 ---
+# 센서 이름 -> sensors 테이블 id (prepare_db 에서 채움)
+sensor_ids = {}
+
+def insert_readings(rows):
+    # 모인 (sensor_type, value, timestamp) 행과 그 1분/1시간 집계를 한 트랜잭션으로 저장
+    with db_pool.connection() as conn:
+        if not load_sensor_ids_if_current(conn):
+            # 아직 마이그레이션 전이면 저장하지 않음 (배치는 스풀에 남았다가 prepare_db 뒤에 옮겨짐)
+            raise mariadb.OperationalError("Database schema is not up to date")
+        rows = [(sensor_ids[sensor_type], value, timestamp) for sensor_type, value, timestamp in rows]
+        cursor = conn.cursor()
+        try:
+            cursor.executemany("INSERT INTO readings (sensor_id, value, timestamp) VALUES (%s, %s, %s)", rows)
+            for seconds, table in ROLLUP_TABLES.items():
+                buckets = aggregate(rows, seconds)
+                if buckets:
+                    cursor.executemany(upsert_sql(table), buckets)
+            conn.commit()
+        finally:
+            cursor.close()
+
+# DB 에 쓰지 못한 기록을 모아 두는 디스크 스풀 (db_spool_replay 스레드가 DB 로 옮김)
+spool = Spool(SPOOL_PATH)
+
+def spool_readings(rows, error=None):
+    spool.append(rows)
+    print(f"Spooled {len(rows)} readings to disk")
+
+# 100건이 모이거나 첫 기록 후 5초가 지나면 한 번에 저장 (루프는 DB 를 기다리지 않음)
+# 저장에 실패한 배치는 버리지 않고 스풀에 남김
+reading_writer = BatchWriter(insert_readings, batch_size=100, flush_interval=5.0,
+                             on_error=spool_readings, name='jyw')
+
+# --- 백그라운드 스레드: DB 가 돌아오면 스풀에 남은 기록을 500건씩 DB 로 옮김 ---
+def db_spool_replay():
+    while True:
+        if spool.pending_bytes() > 0:
+            try:
+                if not sensor_ids:
+                    with db_pool.connection() as conn:
+                        prepare_db(conn)
+                moved = spool.drain(insert_readings, 500)
+                if moved:
+                    print(f"Replayed {moved} spooled readings")
+            except mariadb.Error as e:
+                print(f"DB Error on spool replay (will retry): {e}")
+        time.sleep(SPOOL_REPLAY_INTERVAL)
+
+# --- 백그라운드 스레드: 파티션 추가 및 보관 기간이 지난 파티션 삭제 ---
+def db_maintenance():
+    while True:
+        try:
+            with db_pool.connection() as conn:
+                for table, _, unit, policy in PARTITIONED_TABLES:
+                    added, dropped = maintain(conn, table, unit, RETENTION_DAYS[policy])
+                    if added or dropped:
+                        print(f"Partitions on {table}: added {added}, dropped {dropped}")
+        except mariadb.Error as e:
+            print(f"DB Error on maintenance: {e}")
+        time.sleep(MAINTENANCE_INTERVAL)
 
 # --- Auto 모드 제어 로직 ---
 def auto_control_logic():
-    global sensor_data_initialized
+    snap = snapshot
     
     # 실제 센서 데이터를 읽기 전에는 제어하지 않음
-    if not sensor_data_initialized:
+    if not snap.data_initialized:
         print("Waiting for real sensor data before auto control...")
         return
     
     # 센서 데이터 가져오기
-    temp = sensor_data["temperature"]
-    humidity = sensor_data["humidity"]
+    temp = snap.temperature
+    humidity = snap.humidity
+    desired = {}
     
     # 온도 기반 기기 제어 (온도가 유효한 경우에만)
     if -10.0 <= temp <= 50.0:
-        # 에어컨 제어
-        new_aircon_state = "ON" if temp >= 28.0 else "OFF"
-        if system_status["devices"]["aircon"] != new_aircon_state:
-            system_status["devices"]["aircon"] = new_aircon_state
-            control_led(LED_AIRCON_PIN, new_aircon_state)
-            print(f"Aircon {new_aircon_state} (temp: {temp}°C)")
-        
-        # 히터 제어
-        new_heater_state = "ON" if temp <= 15.0 else "OFF"
-        if system_status["devices"]["heater"] != new_heater_state:
-            system_status["devices"]["heater"] = new_heater_state
-            control_led(LED_HEATER_PIN, new_heater_state)
-            print(f"Heater {new_heater_state} (temp: {temp}°C)")
+        desired["aircon"] = "ON" if temp >= 28.0 else "OFF"   # 에어컨 제어
+        desired["heater"] = "ON" if temp <= 15.0 else "OFF"   # 히터 제어
     else:
         print(f"Invalid temperature reading: {temp}°C. Skipping temperature-based control.")
     
     # 습도 기반 기기 제어 (습도가 유효한 경우에만)
     if 0.0 <= humidity <= 100.0:
-        # 제습기 제어
-        new_dehumidifier_state = "ON" if humidity >= 60.0 else "OFF"
-        if system_status["devices"]["dehumidifier"] != new_dehumidifier_state:
-            system_status["devices"]["dehumidifier"] = new_dehumidifier_state
-            control_led(LED_DEHUMIDIFIER_PIN, new_dehumidifier_state)
-            print(f"Dehumidifier {new_dehumidifier_state} (humidity: {humidity}%)")
+        desired["dehumidifier"] = "ON" if humidity >= 60.0 else "OFF"   # 제습기 제어
     else:
         print(f"Invalid humidity reading: {humidity}%. Skipping humidity-based control.")
 
-# --- 백그라운드 스레드: 실제 하드웨어 데이터 수집 및 DB 저장 ---
-def update_hardware_data():
-    global previous_touch_state, sensor_data_initialized
-    while True:
-        # 1. DHT11 센서에서 온도와 습도를 개별적으로 읽기 시도
-        temperature = None
-        humidity = None
-        
-        if DHT_AVAILABLE and dht is not None:
+    changed = []
+    def apply(current):
+        # 그 사이 MANUAL 로 바뀌었으면 자동 제어를 적용하지 않음
+        if current.mode != "AUTO":
+            return None
+        states = current.device_states()
+        for device, state in desired.items():
+            if states[device] != state:
+                states[device] = state
+                changed.append((device, state))
+        return {"devices": tuple(states.items())} if changed else None
+
+    publish(apply)
+    for device, state in changed:
+        control_led(DEVICE_PINS[device], state)
+        print(f"{device} {state} (temp: {temp}°C, humidity: {humidity}%)")
+
+# --- 백그라운드 스레드: 센서별 측정과 DB 저장 ---
+def run_every(name, period, func):
+    # func 를 자기 스레드에서 period 초마다 실행. 마감 시각 기준이라 실행 시간만큼 주기가 밀리지 않고,
+    # 한 번 늦으면 밀린 회차를 몰아서 돌리지 않고 지금부터 다시 셈
+    def loop():
+        deadline = time.monotonic()
+        while True:
             try:
-                # DHT11에서 데이터 읽기
-                temp_read = dht.temperature
-                hum_read = dht.humidity
-                print(f"[DEBUG] Raw DHT11 read: Temp={temp_read}, Hum={hum_read}")
-                # 온도 유효성 개별 검증
-                if temp_read is not None and -10.0 <= temp_read <= 50.0:
-                    temperature = temp_read
-                else:
-                    print(f"Invalid temperature reading: {temp_read}")
-                # 습도 유효성 개별 검증  
-                if hum_read is not None and 0.0 <= hum_read <= 100.0:
-                    humidity = hum_read
-                else:
-                    print(f"Invalid humidity reading: {hum_read}")
-            except RuntimeError as e:
-                print(f"DHT11 read error: {e}")
+                func()
             except Exception as e:
-                print(f"DHT11 unexpected error: {e}")
-        
-        # 거리 센서 읽기
-        distance = measure_distance()
+                print(f"{name} task error: {e}")
+            deadline += period
+            delay = deadline - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                deadline = time.monotonic()
+    threading.Thread(target=loop, name=name, daemon=True).start()
+
+def update_readings(readings, **changes):
+    # 읽은 값과 읽은 시각을 스냅샷에 한 번에 반영
+    now = time.monotonic()
+    def apply(current):
+        read_at = dict(current.read_at)
+        read_at.update((sensor_type, now) for sensor_type in readings)
+        return dict(readings, read_at=tuple(read_at.items()), **changes)
+    publish(apply)
 
-        # 2. MariaDB에 데이터 저장 및 sensor_data 업데이트
+def read_climate():
+    if DHT_AVAILABLE and dht is not None:
         try:
-            conn = mariadb.connect(**DB_CONFIG)
-            cursor = conn.cursor()
-            current_time = datetime.now()
-            
-            # 온도 데이터 개별 처리
-            if temperature is not None:
-                sensor_data["temperature"] = round(temperature, 1)
-                sensor_data_initialized = True  # 실제 센서 데이터를 읽었음을 표시
-                cursor.execute("INSERT INTO readings (sensor_type, value, timestamp) VALUES (%s, %s, %s)",
-                               ('temperature', sensor_data["temperature"], current_time))
-                print(f"Temperature updated: {sensor_data['temperature']}°C")
-            
-            # 습도 데이터 개별 처리
-            if humidity is not None:
-                sensor_data["humidity"] = round(humidity, 1)
-                sensor_data_initialized = True  # 실제 센서 데이터를 읽었음을 표시
-                cursor.execute("INSERT INTO readings (sensor_type, value, timestamp) VALUES (%s, %s, %s)",
-                               ('humidity', sensor_data["humidity"], current_time))
-                print(f"Humidity updated: {sensor_data['humidity']}%")
-
-            # 거리 센서 데이터 유효성 검증 (0cm ~ 400cm)
-            if 0.0 <= distance <= 400.0:
-                sensor_data["distance"] = round(distance, 1)
-                cursor.execute("INSERT INTO readings (sensor_type, value, timestamp) VALUES (%s, %s, %s)",
-                               ('distance', sensor_data["distance"], current_time))
+            temp_read = dht.temperature
+            hum_read = dht.humidity
+        except RuntimeError as e:
+            # DHT11 은 체크섬/타이밍 오류가 흔함: 다음 주기에 다시 읽음
+            print(f"DHT11 read error: {e}")
+        except Exception as e:
+            print(f"DHT11 unexpected error: {e}")
+        else:
+            readings = {}
+            # 온도/습도 유효성 개별 검증
+            if temp_read is not None and -10.0 <= temp_read <= 50.0:
+                readings["temperature"] = round(temp_read, 1)
             else:
-                print(f"Invalid distance reading: {distance}cm. Keeping previous value.")
-            conn.commit()
-            cursor.close()
-            conn.close()
-        except mariadb.Error as e:
-            print(f"DB Error on insert: {e}")
-        
-        # 3. 터치 센서 감지
-        if GPIO_AVAILABLE:
-            try:
-                current_touch_state = GPIO.input(TOUCH_SENSOR_PIN)
-                if current_touch_state == 1 and previous_touch_state == 0:
-                    system_status["mode"] = "MANUAL" if system_status["mode"] == "AUTO" else "AUTO"
-                    print(f"Mode toggled to {system_status['mode']} by touch sensor.")
-                    time.sleep(0.3) # 디바운싱 고려
-                previous_touch_state = current_touch_state
-            except Exception as e:
-                print(f"Touch sensor error: {e}")
+                print(f"Invalid temperature reading: {temp_read}")
+            if hum_read is not None and 0.0 <= hum_read <= 100.0:
+                readings["humidity"] = round(hum_read, 1)
+            else:
+                print(f"Invalid humidity reading: {hum_read}")
+            if readings:
+                update_readings(readings, data_initialized=True)  # 실제 센서 데이터를 읽었음을 표시
+
+    # Auto 모드일 경우, 새 온습도로 제어 로직 실행
+    if snapshot.mode == "AUTO":
+        auto_control_logic()
+
+def read_distance():
+    distance = measure_distance()
+    # 거리 센서 데이터 유효성 검증 (0cm ~ 400cm)
+    if 0.0 <= distance <= 400.0:
+        update_readings({"distance": round(distance, 1)})
+    else:
+        print(f"Invalid distance reading: {distance}cm. Keeping previous value.")
+
+def read_touch():
+    global previous_touch_state
+    if not GPIO_AVAILABLE:
+        return
+    current_touch_state = GPIO.input(TOUCH_SENSOR_PIN)
+    if current_touch_state == 1 and previous_touch_state == 0:
+        mode = publish(toggled_mode).mode
+        print(f"Mode toggled to {mode} by touch sensor.")
+        time.sleep(TOUCH_DEBOUNCE)  # 디바운싱 (터치 스레드만 쉼)
+    previous_touch_state = current_touch_state
 
-        # 4. Auto 모드일 경우, 제어 로직 실행
-        if system_status["mode"] == "AUTO":
-            auto_control_logic()
+last_logged = 0.0
 
+def log_readings():
+    # 지난 기록 이후에 실제로 읽은 센서 값만 배치 저장 큐에 넣음 (DB 를 기다리지 않음)
+    global last_logged
+    snap = snapshot
+    now = time.monotonic()
+    current_time = datetime.now()
+    for sensor_type, read_at in snap.read_at:
+        if read_at > last_logged:
+            row = (sensor_type, getattr(snap, sensor_type), current_time)
+            if not reading_writer.put(row):
+                # DB 가 느려서 큐가 가득 찼으면 바로 스풀에 남김
+                spool_readings([row])
+    last_logged = now
 
-        time.sleep(5)
+def start_sensor_tasks():
+    run_every("climate", CLIMATE_INTERVAL, read_climate)
+    run_every("distance", DISTANCE_INTERVAL, read_distance)
+    run_every("touch", TOUCH_INTERVAL, read_touch)
+    run_every("logger", LOG_INTERVAL, log_readings)
 
 # --- Flask 라우팅 ---
 @app.route('/')
@@ -266,30 +414,43 @@ def index():
 
 @app.route('/data')
 def get_data():
+    snap = snapshot  # 참조 하나만 읽으므로 항상 일관된 값
     return jsonify({
-        "sensors": sensor_data, 
-        "status": system_status,
-        "data_initialized": sensor_data_initialized
+        "sensors": {"temperature": snap.temperature, "humidity": snap.humidity, "distance": snap.distance},
+        "status": {"mode": snap.mode, "devices": snap.device_states()},
+        "data_initialized": snap.data_initialized,
+        "seq": snap.seq
     })
 
 @app.route('/toggle_mode', methods=['POST'])
 def toggle_mode():
-    system_status["mode"] = "MANUAL" if system_status["mode"] == "AUTO" else "AUTO"
-    return jsonify({"success": True, "mode": system_status["mode"]})
+    mode = publish(toggled_mode).mode
+    return jsonify({"success": True, "mode": mode})
 
 @app.route('/control/<device>/<action>', methods=['POST'])
 def control_device(device, action):
-    if system_status["mode"] == "MANUAL":
-        action = action.upper()
-        if device in system_status["devices"] and action in ["ON", "OFF"]:
-            system_status["devices"][device] = action
+    action = action.upper()
+    if device in DEVICE_PINS and action in ["ON", "OFF"]:
+        applied = []
+        def apply(current):
+            if current.mode != "MANUAL":
+                return None
+            applied.append(True)
+            states = current.device_states()
+            states[device] = action
+            return {"devices": tuple(states.items())}
+        publish(apply)
+        if applied:
             # [수정] 실제 LED 제어 함수 호출
-            if device == 'aircon': control_led(LED_AIRCON_PIN, action)
-            elif device == 'heater': control_led(LED_HEATER_PIN, action)
-            elif device == 'dehumidifier': control_led(LED_DEHUMIDIFIER_PIN, action)
+            control_led(DEVICE_PINS[device], action)
             return jsonify({"success": True})
     return jsonify({"success": False, "message": "Only available in Manual mode."})
 
+@app.route('/dbstats')
+def db_stats():
+    # 연결 풀 사용량 (in_use, peak_in_use, waits, reconnects ...)과 배치 저장 큐, 디스크 스풀 상태
+    return jsonify({"pool": db_pool.stats(), "writer": reading_writer.stats(), "spool": spool.stats()})
+
 @app.route('/history/<sensor_type>')
 def history(sensor_type):
     if sensor_type not in ['temperature', 'humidity', 'distance']:
@@ -297,18 +458,38 @@ def history(sensor_type):
     
     readings = []
     chart_data = {'labels': [], 'values': []}
-    print(f"[DEBUG] sensor_type: {sensor_type}")
     
+    # ?range=24h 처럼 기간을 주면 HISTORY_MAX_POINTS 개 이하가 되는 해상도(원본/1분/1시간)를 골라서 조회
+    span = parse_range(request.args.get('range'))
+    resolution, bucket = (('raw', None) if span is None
+                          else choose_resolution(span, HISTORY_RAW_INTERVAL, HISTORY_MAX_POINTS))
     
     try:
-        conn = mariadb.connect(**DB_CONFIG)
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(
-            "SELECT timestamp, value FROM readings WHERE sensor_type = %s ORDER BY timestamp DESC LIMIT 50",
-            (sensor_type,)
-        )
-        readings = cursor.fetchall()
-        #print(f"[DEBUG] readings: {readings}")
+        with db_pool.connection() as conn:
+            if not load_sensor_ids_if_current(conn):
+                return "Database schema is not up to date yet (run: python migrate.py up)", 503
+            cursor = conn.cursor(dictionary=True)
+            if span is None:
+                # (sensor_id, timestamp) 인덱스를 역순으로 50개만 읽음
+                cursor.execute(
+                    "SELECT timestamp, value FROM readings WHERE sensor_id = %s ORDER BY timestamp DESC LIMIT 50",
+                    (sensor_ids[sensor_type],)
+                )
+            elif bucket is None:
+                cursor.execute(
+                    "SELECT timestamp, value FROM readings WHERE sensor_id = %s AND timestamp >= %s "
+                    "ORDER BY timestamp DESC",
+                    (sensor_ids[sensor_type], datetime.now() - timedelta(seconds=span))
+                )
+            else:
+                # 롤업 테이블은 (sensor, bucket) 기본 키 범위만 읽음
+                cursor.execute(
+                    "SELECT bucket AS timestamp, sum_value / samples AS value, min_value, max_value, samples "
+                    f"FROM {ROLLUP_TABLES[bucket]} WHERE sensor = %s AND bucket >= %s ORDER BY bucket DESC",
+                    (sensor_ids[sensor_type], datetime.now() - timedelta(seconds=span))
+                )
+            readings = cursor.fetchall()
+            cursor.close()
 
         # 그래프 데이터 준비 (시간 순으로 정렬)
         if readings:
@@ -328,9 +509,6 @@ def history(sensor_type):
                 'labels': [str(label) for label in labels],
                 'values': [float(value) for value in values]
             }
-        print(f"[DEBUG] chart_data: {chart_data}")
-        cursor.close()
-        conn.close()
     except mariadb.Error as e:
         print(f"DB Error on select: {e}")
         chart_data = {'labels': [], 'values': []}
@@ -374,6 +552,11 @@ def history(sensor_type):
         except (TypeError, ValueError) as e:
             print(f"Error calculating stats: {e}")
             # 에러 발생 시 기본값 유지
+        if bucket is not None:
+            # 집계 구간은 평균의 평균이 아니라 버킷의 최소/최대와 개수 가중 평균으로 계산
+            summary = summarize([(r['timestamp'], r['value'], r['min_value'], r['max_value'], r['samples'])
+                                 for r in readings])
+            stats.update(max=summary['max'], min=summary['min'], avg=summary['avg'])
 
     return render_template('history.html', 
                          sensor_type=sensor_type, 
@@ -381,18 +564,24 @@ def history(sensor_type):
                          chart_data=chart_data,
                          sensor_info=sensor_info[sensor_type],
                          stats=stats,
-                         has_data=has_data)
+                         has_data=has_data,
+                         ranges=HISTORY_RANGES,
+                         selected=request.args.get('range') if span is not None else None,
+                         resolution=resolution)
 
 # --- 메인 실행 부분 ---
 if __name__ == '__main__':
     try:
         init_db()
         setup_gpio() # GPIO 초기화
-        # 실제 하드웨어 데이터 수집 스레드 시작
-        data_thread = threading.Thread(target=update_hardware_data, daemon=True)
-        data_thread.start()
+        # 센서별 측정 스레드 시작 (각자 자기 주기로 읽음)
+        start_sensor_tasks()
+        threading.Thread(target=db_maintenance, daemon=True).start()
+        threading.Thread(target=db_spool_replay, daemon=True).start()
         app.run(debug=False, host='0.0.0.0', port=5001)
     finally:
+        # 저장 큐에 남은 기록을 모두 DB 에 씀
+        reading_writer.close()
         # 프로그램 종료 시 GPIO 리소스 정리
         if GPIO_AVAILABLE:
             print("Cleaning up GPIO.")
@@ -0,0 +1,124 @@
+# migrate.py
+# readings 스키마 마이그레이션 목록과 실행 명령입니다. 앱은 시작할 때(init_db) 자동으로 적용합니다.
+# 사용법: python migrate.py [up [버전] | status | check]
+#   up     적용되지 않은 마이그레이션을 적용 (기본)
+#   status 버전별 적용 여부 출력
+#   check  기록 조회 쿼리가 인덱스를 타는지 EXPLAIN 으로 확인 (실패하면 종료 코드 1)
+import sys
+
+import mariadb
+
+import shared_path  # noqa: F401 (iotcommon 패키지 경로)
+from iotcommon.migrator import Migration, Check, backfill, upgrade, status, run_checks
+from iotcommon.rollup import table_sql, backfill_sql
+from iotcommon.partitions import partition_by_range
+
+SENSOR_TYPES = ('temperature', 'humidity', 'distance')
+
+# 버킷 크기(초) -> 롤업 테이블
+ROLLUP_TABLES = {60: 'readings_1m', 3600: 'readings_1h'}
+# 파티션으로 나눈 테이블: (테이블, 시각 컬럼, 파티션 단위, 보관 정책 이름). 1시간 집계는 영구 보관이라 나누지 않음
+PARTITIONED_TABLES = (('readings', 'timestamp', 'day', 'raw'),
+                      ('readings_1m', 'bucket', 'month', 'minute'))
+
+MIGRATIONS = [
+    # 예전 init_db() 가 만들던 테이블 (이미 있으면 그대로 둠)
+    Migration(1, 'create readings', """
+        CREATE TABLE IF NOT EXISTS readings (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            sensor_type VARCHAR(50) NOT NULL,
+            value FLOAT NOT NULL,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """),
+    # 행마다 반복되던 센서 이름(VARCHAR)을 1바이트 id 로 바꾸기 위한 조회 테이블
+    Migration(2, 'create sensors lookup', """
+        CREATE TABLE IF NOT EXISTS sensors (
+            id TINYINT UNSIGNED AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(50) NOT NULL UNIQUE
+        )
+    """,
+        "INSERT IGNORE INTO sensors (name) VALUES " + ", ".join(f"('{name}')" for name in SENSOR_TYPES),
+        "INSERT IGNORE INTO sensors (name) SELECT DISTINCT sensor_type FROM readings",
+    ),
+    # 열 추가는 즉시(메타데이터만) 끝나고, 기존 행은 id 범위로 나눠서 채움
+    Migration(3, 'add readings.sensor_id', """
+        ALTER TABLE readings ADD COLUMN IF NOT EXISTS sensor_id TINYINT UNSIGNED NULL
+    """,
+        backfill('readings', "sensor_id = (SELECT s.id FROM sensors s WHERE s.name = readings.sensor_type)",
+                 "sensor_id IS NULL"),
+    ),
+    # WHERE sensor_id = ? ORDER BY timestamp DESC LIMIT n 을 인덱스 범위 역순 탐색으로 처리
+    Migration(4, 'index readings(sensor_id, timestamp)', """
+        ALTER TABLE readings ADD INDEX IF NOT EXISTS idx_sensor_time (sensor_id, timestamp),
+            ALGORITHM=INPLACE, LOCK=NONE
+    """),
+    Migration(5, 'drop readings.sensor_type',
+        "ALTER TABLE readings DROP COLUMN IF EXISTS sensor_type, ALGORITHM=INPLACE, LOCK=NONE",
+        "ALTER TABLE readings MODIFY sensor_id TINYINT UNSIGNED NOT NULL, ALGORITHM=INPLACE, LOCK=NONE",
+    ),
+    # 1분/1시간 집계 테이블. 이후 기록은 insert_readings() 가 같이 누적하고, 기존 기록은 여기서 채움
+    Migration(6, 'create readings rollups',
+        *[table_sql(table, 'TINYINT UNSIGNED') for table in ROLLUP_TABLES.values()],
+        *[backfill_sql(table, seconds, 'readings', 'sensor_id', 'value', 'timestamp')
+          for seconds, table in ROLLUP_TABLES.items()],
+    ),
+    # 날짜 범위 파티션: 파티션 컬럼이 모든 고유 키에 들어가야 하므로 timestamp 를 NOT NULL 로 바꾸고
+    # 기본 키를 (id, timestamp) 로 넓힘
+    Migration(7, 'partition readings tables',
+        "UPDATE readings SET timestamp = NOW() WHERE timestamp IS NULL",
+        "ALTER TABLE readings MODIFY timestamp DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP, "
+        "DROP PRIMARY KEY, ADD PRIMARY KEY (id, timestamp)",
+        *[partition_by_range(table, column, unit) for table, column, unit, _ in PARTITIONED_TABLES],
+    ),
+]
+
+def checks(sensor_ids):
+    """/history 가 쓰는 쿼리를 센서별로 EXPLAIN 할 Check 목록."""
+    return [Check(f"history {name}",
+                  "SELECT timestamp, value FROM readings WHERE sensor_id = ? ORDER BY timestamp DESC LIMIT 50",
+                  (sensor_id,), key='idx_sensor_time')
+            for name, sensor_id in sensor_ids.items()] + [
+        # 기간 조회(?range=)의 롤업 테이블 읽기는 기본 키 범위 탐색이어야 함
+        Check(f"rollup {table}",
+              f"SELECT bucket, sum_value / samples FROM {table} WHERE sensor = ? AND bucket >= ? ORDER BY bucket DESC",
+              (sensor_id, '2000-01-01'), key='PRIMARY')
+        for table in ROLLUP_TABLES.values() for sensor_id in sensor_ids.values()]
+
+
+def load_sensor_ids(conn):
+    """{센서 이름: id}"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT name, id FROM sensors")
+        return dict(cursor.fetchall())
+    finally:
+        cursor.close()
+
+
+def main(args):
+    from app import db_pool
+
+    command = args[0] if args else 'up'
+    with db_pool.connection() as conn:
+        if command == 'up':
+            target = int(args[1]) if len(args) > 1 else None
+            applied = upgrade(conn, MIGRATIONS, target)
+            print(f"적용한 마이그레이션: {applied or '없음'}")
+        elif command == 'status':
+            for version, name, done in status(conn, MIGRATIONS):
+                print(f"{version:>4}  {'적용됨' if done else '대기':<4}  {name}")
+        elif command == 'check':
+            return 0 if run_checks(conn, checks(load_sensor_ids(conn))) else 1
+        else:
+            print("사용법: python migrate.py [up [버전] | status | check]")
+            return 2
+    return 0
+
+
+if __name__ == '__main__':
+    try:
+        sys.exit(main(sys.argv[1:]))
+    except mariadb.Error as e:
+        print(f"마이그레이션 오류: {e}")
+        sys.exit(1)
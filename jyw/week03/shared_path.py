@@ -0,0 +1,10 @@
+# shared_path.py
+# camagui 와 함께 쓰는 iotcommon 패키지(camagui/camagui/system/iotcommon)를 import 할 수 있게 경로를 추가합니다.
+# 다른 모듈보다 먼저 import 합니다. 이 디렉터리의 모듈이 우선하도록 경로 목록 끝에 붙입니다.
+import os
+import sys
+
+SHARED_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                           '..', '..', 'camagui', 'camagui', 'system'))
+if SHARED_DIR not in sys.path:
+    sys.path.append(SHARED_DIR)
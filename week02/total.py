@@ -1,4 +1,5 @@
 import RPi.GPIO as GPIO
+import threading
 import time
 import board
 import adafruit_dht
@@ -25,21 +26,34 @@ GPIO.setup(echo_pin, GPIO.IN)
 # --- 온습도 센서 초기화 ---
 dht_device = adafruit_dht.DHT11(dht_pin)
 
+# --- 초음파 에코 엣지 감지 ---
+echo_edges = []
+echo_done = threading.Event()
+
+def on_echo_edge(channel):
+    """에코 핀의 상승/하강 엣지 시각을 기록하는 콜백"""
+    echo_edges.append(time.monotonic_ns())
+    if len(echo_edges) >= 2:
+        echo_done.set()
+
+GPIO.add_event_detect(echo_pin, GPIO.BOTH, callback=on_echo_edge)
+
 # --- 함수 정의 ---
 def get_distance():
     """초음파 센서로 거리를 측정하는 함수"""
     GPIO.output(trig_pin, False)
     time.sleep(0.2)
+    echo_edges.clear()
+    echo_done.clear()
     GPIO.output(trig_pin, True)
     time.sleep(0.00001)
     GPIO.output(trig_pin, False)
 
-    while GPIO.input(echo_pin) == 0:
-        pulse_start = time.time()
-    while GPIO.input(echo_pin) == 1:
-        pulse_end = time.time()
+    # 에코가 돌아오지 않으면 -1
+    if not echo_done.wait(0.1):
+        return -1
 
-    pulse_duration = pulse_end - pulse_start
+    pulse_duration = (echo_edges[1] - echo_edges[0]) / 1e9
     distance = round(pulse_duration * 17150, 1)
     return distance
 
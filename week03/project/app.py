@@ -1,6 +1,9 @@
 # app.py
-from flask import Flask, render_template, url_for, redirect, jsonify
+from flask import Flask, render_template, url_for, redirect, jsonify, request, Response
 import RPi.GPIO as GPIO
+import json
+from collections import OrderedDict
+import hashlib
 import threading
 import time
 import signal
@@ -9,6 +12,13 @@ import atexit
 import adafruit_dht
 import board
 
+# WebSocket 제어 채널(/ws)은 flask-sock 이 있을 때만 사용
+try:
+    from flask_sock import Sock
+    SOCK_AVAILABLE = True
+except ImportError:
+    SOCK_AVAILABLE = False
+
 # GPIO 설정
 GPIO.setmode(GPIO.BCM)
 leds = [17, 22, 27]  # 17 -> Y 22 -> R 27 -> G
@@ -29,9 +39,27 @@ GPIO.setup(TRIG, GPIO.OUT)
 GPIO.setup(ECHO, GPIO.IN)
 GPIO.setup(TOUCH_PIN, GPIO.IN)
 
-# 터치 센서 상태 관리
-last_touch_state = 0
-touch_detected = False
+# 터치 센서 상태 관리 (엣지 콜백만 갱신, 읽는 쪽은 핀을 건드리지 않음)
+TOUCH_DEBOUNCE = 0.05  # 이 시간(초) 안의 엣지는 채터링으로 무시
+touch_state = (GPIO.input(TOUCH_PIN), 0, None)  # (현재 레벨, 누적 터치 횟수, 마지막 터치 시각)
+last_touch_edge = 0.0
+
+def on_touch_edge(channel):
+    global touch_state, last_touch_edge
+    now = time.monotonic()
+    if now - last_touch_edge < TOUCH_DEBOUNCE:
+        return
+    level = GPIO.input(channel)
+    current, count, last_touch = touch_state
+    if level == current:
+        return
+    last_touch_edge = now
+    if level == 1:
+        count += 1
+        last_touch = time.time()
+    touch_state = (level, count, last_touch)
+
+GPIO.add_event_detect(TOUCH_PIN, GPIO.BOTH, callback=on_touch_edge)
 
 
 # 온습도 센서
@@ -56,6 +84,26 @@ def get_temperature():
         time.sleep(1)
         return None, None
 
+# 온습도 캐시: 백그라운드 스레드만 센서를 읽고, 라우트는 캐시된 값만 사용
+DHT_INTERVAL = 2.0  # DHT11 최소 샘플링 간격 (초)
+DHT_MAX_AGE = 10    # 이보다 오래된 값은 응답하지 않음 (초)
+temperature_cache = (None, None, None)  # (humidity, temperature, 읽은 시각)
+
+def TemperatureMonitorTask():
+    global temperature_cache
+    while True:
+        humidity, temperature = get_temperature()
+        if humidity is not None and temperature is not None:
+            # 튜플 하나를 통째로 교체하므로 읽는 쪽은 항상 같은 시점의 값을 봄
+            temperature_cache = (humidity, temperature, time.monotonic())
+        time.sleep(DHT_INTERVAL)
+
+def get_cached_temperature():
+    humidity, temperature, read_at = temperature_cache
+    if read_at is None or time.monotonic() - read_at > DHT_MAX_AGE:
+        return None, None
+    return humidity, temperature
+
 # GPIO 정리 함수
 def cleanup_gpio():
     """GPIO 설정을 안전하게 정리하는 함수"""
@@ -84,47 +132,41 @@ def signal_handler(sig, frame):
 atexit.register(cleanup_gpio)
 
 def get_touch():
-    global last_touch_state, touch_detected
-    try:
-        current_state = GPIO.input(TOUCH_PIN)
-        
-        # 상태 변화 감지 (rising edge detection)
-        if current_state == 1 and last_touch_state == 0:
-            touch_detected = True
-            last_touch_state = current_state
-            return True
-        elif current_state == 0 and last_touch_state == 1:
-            touch_detected = False
-            last_touch_state = current_state
-            return False
-        
-        last_touch_state = current_state
-        return touch_detected
-    except Exception as e:
-        print(f"터치 센서 읽기 오류: {e}")
-        return False
+    level, _, _ = touch_state
+    return level == 1
 
 
 distance_cm = -1 # 현재 거리 값 (초기값 -1)
 proximity_alert = False # 근접 알람 상태 (True: 알람, False: 정상)
 ALERT_THRESHOLD = 20 # 근접 알람 기준 거리 (cm)
 
+# 에코 핀의 엣지 이벤트 시각 (busy-wait 대신 콜백으로 기록)
+echo_edges = []
+echo_done = threading.Event()
+
+def on_echo_edge(channel):
+    echo_edges.append(time.monotonic_ns())
+    if len(echo_edges) >= 2:
+        echo_done.set()
+
+GPIO.add_event_detect(ECHO, GPIO.BOTH, callback=on_echo_edge)
+
 def get_distance():
     try:
         GPIO.output(TRIG, False)
         time.sleep(0.5)
 
+        echo_edges.clear()
+        echo_done.clear()
         GPIO.output(TRIG, True)
         time.sleep(0.00001)
         GPIO.output(TRIG, False)
 
-        while GPIO.input(ECHO) == 0:
-            pulse_start = time.time()
+        # 상승/하강 엣지가 모두 들어올 때까지 잠들어서 기다림 (CPU 사용 없음)
+        if not echo_done.wait(0.1):
+            return -1
 
-        while GPIO.input(ECHO) == 1:
-            pulse_end = time.time()
-
-        pulse_duration = pulse_end - pulse_start
+        pulse_duration = (echo_edges[1] - echo_edges[0]) / 1e9
         distance = pulse_duration * 17150
         distance = round(distance, 1)
 
@@ -154,14 +196,65 @@ def DistanceMonitorTask():
 # Flask 애플리케이션 초기화
 app = Flask(__name__, static_folder='static', static_url_path='/static')
 
-def updateLeds():
-    #print('Here is UpdateLEDs')
+def updateLeds(pins, values):
+    # RPi.GPIO 목록 형식으로 바뀐 핀만 한 번에 씀
     try:
-        for num, value in enumerate(ledStates):
-            GPIO.output(leds[num], value)
+        GPIO.output(pins, values)
     except Exception as e:
         print(f"LED 업데이트 오류: {e}")
 
+# LED 상태 변경은 이 Lock 안에서만 (HTTP 요청과 WebSocket 명령이 동시에 올 수 있음)
+led_lock = threading.Lock()
+led_version = 0
+
+def set_led_states(changes):
+    """{LED 번호: 0/1} 을 적용하고 (버전, LED 상태 목록) 을 반환합니다. 바뀐 핀만 씁니다."""
+    global led_version
+    with led_lock:
+        changed = [num for num, value in changes.items() if ledStates[num] != value]
+        if changed:
+            for num in changed:
+                ledStates[num] = changes[num]
+            updateLeds([leds[num] for num in changed], [changes[num] for num in changed])
+            led_version += 1
+        return led_version, list(ledStates)
+
+# 연결된 WebSocket 대시보드: ws -> 전송 Lock (여러 스레드가 같은 소켓에 동시에 쓰지 않도록)
+ws_clients = {}
+ws_clients_lock = threading.Lock()
+
+def ws_send(ws, send_lock, message):
+    with send_lock:
+        ws.send(json.dumps(message))
+
+def broadcast_leds(message, exclude=None):
+    with ws_clients_lock:
+        clients = [(ws, lock) for ws, lock in ws_clients.items() if ws is not exclude]
+    for ws, send_lock in clients:
+        try:
+            ws_send(ws, send_lock, message)
+        except Exception:
+            with ws_clients_lock:
+                ws_clients.pop(ws, None)
+
+def parse_led_command(cmd):
+    """{"leds": {"0": 1}} (일부) 또는 {"leds": [1, 0, 1]} (전체) 를 검사해서 {LED 번호: 상태} 로 바꿉니다."""
+    raw = cmd.get('leds') if isinstance(cmd, dict) else None
+    if isinstance(raw, list):
+        if len(raw) != len(leds):
+            raise ValueError(f"전체 상태는 LED {len(leds)}개 값이어야 합니다")
+        raw = {str(num): value for num, value in enumerate(raw)}
+    if not isinstance(raw, dict) or not raw:
+        raise ValueError("leds 는 비어 있지 않은 객체 또는 목록이어야 합니다")
+    changes = {}
+    for key, state in raw.items():
+        if not str(key).isdigit() or not 0 <= int(key) < len(leds):
+            raise ValueError(f"잘못된 LED 번호: {key}")
+        if not isinstance(state, int) or state not in (0, 1):
+            raise ValueError(f"잘못된 LED 상태: {state}")
+        changes[int(key)] = state
+    return changes
+
 counter = 0
 def MultiTask():
     global counter
@@ -169,26 +262,119 @@ def MultiTask():
         counter += 1
         time.sleep(1) # 1초마다 카운터 증가
 
+# --- 스트림 상태 ---
+# 각 센서 값은 백그라운드 스레드가 갱신하고, /stream 은 그 값이 바뀔 때만 버전을 올림
+STREAM_POLL_INTERVAL = 0.25  # 변경 확인 주기 (초)
+STREAM_KEEPALIVE = 15        # 변경이 없을 때 연결 유지용 주석 간격 (초)
+stream_lock = threading.Lock()
+stream_state = (0, {})  # (버전, 마지막 값)
+
+def current_stream_state():
+    """현재 센서 값을 모아 이전과 다르면 버전을 올리고 (버전, 값) 을 반환합니다."""
+    global stream_state
+    humidity, temperature = get_cached_temperature()
+    level, count, _ = touch_state
+    payload = {
+        'counter': counter,
+        'distance': distance_cm,
+        'alert': proximity_alert,
+        'touched': level == 1,
+        'touch_count': count,
+        'temperature': round(temperature, 1) if temperature is not None else None,
+        'humidity': round(humidity, 1) if humidity is not None else None,
+        'leds': list(ledStates),
+    }
+    with stream_lock:
+        version, last = stream_state
+        if payload != last:
+            stream_state = (version + 1, payload)
+        return stream_state
+
+# --- 대시보드 렌더 캐시 ---
+# 페이지에 보이는 값(표시 형식대로 반올림한 값)과 LED 상태가 같으면 이전에 만든 HTML 을 그대로 보냄
+INDEX_CACHE_SIZE = 32
+index_cache = OrderedDict()  # 화면 상태 튜플 -> (렌더된 HTML(bytes), ETag)
+index_cache_lock = threading.Lock()
+
 # --- 라우트 정의 ---
 @app.route('/')
 def index():
-    touch_status = get_touch()
-    humidity, temperature = get_temperature()
-    return render_template('index.html', 
-                         ledStates=ledStates, 
-                         distance=distance_cm, 
-                         alert=proximity_alert,
-                         touch_detected=touch_status,
-                         temperature=temperature,
-                         humidity=humidity)
+    # 센서를 읽지 않고 스트림과 같은 상태에서 화면 값을 만듦
+    _, state = current_stream_state()
+    distance = round(state['distance']) if state['distance'] != -1 else -1  # 템플릿은 정수 cm 로 표시
+    view = (tuple(state['leds']), distance, state['alert'], state['touched'],
+            state['temperature'], state['humidity'])
+    with index_cache_lock:
+        cached = index_cache.get(view)
+        if cached is not None:
+            index_cache.move_to_end(view)
+    if cached is None:
+        leds_view, distance, alert, touched, temperature, humidity = view
+        html = render_template('index.html',
+                               ledStates=list(leds_view),
+                               distance=distance,
+                               alert=alert,
+                               touch_detected=touched,
+                               temperature=temperature,
+                               humidity=humidity).encode()
+        cached = (html, hashlib.md5(html).hexdigest())
+        with index_cache_lock:
+            index_cache[view] = cached
+            if len(index_cache) > INDEX_CACHE_SIZE:
+                index_cache.popitem(last=False)
+    html, etag = cached
+    response = Response(html, mimetype='text/html')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    # 브라우저가 같은 페이지를 가지고 있으면 본문 없이 304
+    return response.make_conditional(request)
+
+@app.route('/api/v1/leds', methods=['POST'])
+def leds_api():
+    """여러 LED 를 한 번에 바꿉니다. {"leds": {"0": 1, "2": 0}} 또는 {"leds": [1, 0, 1]}."""
+    try:
+        version, states = set_led_states(parse_led_command(request.get_json(silent=True)))
+    except ValueError as e:
+        return jsonify(status="error", message=str(e)), 400
+    broadcast_leds({'type': 'state', 'seq': version, 'leds': states})
+    return jsonify(status="success", seq=version, leds=states)
 
 @app.route('/<int:LEDn>/<int:state>')
 def ledswitch(LEDn, state):
     if 0 <= LEDn < len(leds): # 유효한 LED 번호인지 확인
-        ledStates[LEDn] = state
-        updateLeds() # LED 상태 업데이트
+        version, states = set_led_states({LEDn: state}) # LED 상태 업데이트
+        broadcast_leds({'type': 'state', 'seq': version, 'leds': states})
     return redirect(url_for('index')) # 메인 페이지로 리다이렉트
 
+if SOCK_AVAILABLE:
+    sock = Sock(app)
+
+    @sock.route('/ws')
+    def ws_control(ws):
+        """LED 제어 명령을 받아 ack 를 보내고, 다른 대시보드에는 바뀐 상태를 알립니다."""
+        send_lock = threading.Lock()
+        with ws_clients_lock:
+            ws_clients[ws] = send_lock
+        try:
+            while True:
+                raw = ws.receive()
+                cmd_id = None
+                try:
+                    cmd = json.loads(raw)
+                    cmd_id = cmd.get('id') if isinstance(cmd, dict) else None
+                    version, states = set_led_states(parse_led_command(cmd))
+                except ValueError as e:
+                    ws_send(ws, send_lock, {'type': 'ack', 'id': cmd_id, 'ok': False, 'error': str(e)})
+                    continue
+                ws_send(ws, send_lock, {'type': 'ack', 'id': cmd_id, 'ok': True,
+                                        'seq': version, 'leds': states})
+                broadcast_leds({'type': 'state', 'seq': version, 'leds': states}, exclude=ws)
+        finally:
+            with ws_clients_lock:
+                ws_clients.pop(ws, None)
+else:
+    print("flask-sock 이 없어 WebSocket 제어 채널을 끕니다 (pip install flask-sock)")
+
 @app.route('/getcounter')
 def getcounter():
     return jsonify(value=counter)
@@ -203,17 +389,69 @@ def getdistance():
 @app.route('/gettouch')
 def gettouch():
     try:
-        touch_status = get_touch()
-        current_gpio_state = GPIO.input(TOUCH_PIN)
-        return jsonify(touched=touch_status, current_state=current_gpio_state)
+        level, count, last_touch = touch_state
+        return jsonify(touched=level == 1, current_state=level,
+                       count=count, last_touch=last_touch)
     except Exception as e:
         print(f"터치 상태 API 오류: {e}")
         return jsonify(touched=False, current_state=0, error="센서 읽기 오류")
 
+@app.route('/stream')
+def stream():
+    """Server-Sent Events: 바뀐 센서 값만 보냅니다. 이벤트 id 로 재접속 시 이어받습니다."""
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+
+    def events():
+        version, payload = current_stream_state()
+        # 브라우저가 이미 최신 버전을 받았으면 처음 전체 전송을 생략
+        sent = payload if last_event_id == version else {}
+        yield "retry: 3000\n\n"
+        last_sent_at = time.monotonic()
+        while True:
+            version, payload = current_stream_state()
+            changed = {key: value for key, value in payload.items() if sent.get(key, ...) != value}
+            now = time.monotonic()
+            if changed:
+                sent = payload
+                last_sent_at = now
+                yield f"id: {version}\nevent: reading\ndata: {json.dumps(changed)}\n\n"
+            elif now - last_sent_at >= STREAM_KEEPALIVE:
+                last_sent_at = now
+                yield ": keepalive\n\n"
+            time.sleep(STREAM_POLL_INTERVAL)
+
+    return Response(events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+BOOT_ID = format(int(time.time()), 'x')  # 재시작 후 같은 버전 번호와 구분하기 위한 ETag 접두사
+
+@app.route('/api/v1/snapshot')
+def snapshot_api():
+    """모든 센서 값과 LED 상태를 한 번에 반환합니다. 바뀐 게 없으면 본문 없이 304."""
+    version, payload = current_stream_state()
+    fields = request.args.get('fields')
+    if fields:
+        fields = sorted(set(fields.split(',')))
+        unknown = [name for name in fields if name not in payload and name != 'seq']
+        if unknown:
+            return jsonify(status="error", message=f"알 수 없는 필드: {', '.join(unknown)}"), 400
+
+    etag = f"{BOOT_ID}-{version}{'-' + '.'.join(fields) if fields else ''}"
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        document = dict(payload, seq=version)
+        if fields:
+            document = {name: document[name] for name in fields}
+        response = jsonify(document)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
 @app.route('/gettemperature')
 def gettemperature():
     try:
-        humidity, temperature = get_temperature()
+        humidity, temperature = get_cached_temperature()
         if humidity is not None and temperature is not None:
             return jsonify(
                 temperature=round(temperature, 1), 
@@ -246,6 +484,7 @@ if __name__ == '__main__':
         # 백그라운드 스레드 시작
         threading.Thread(target=MultiTask, daemon=True).start()
         threading.Thread(target=DistanceMonitorTask, daemon=True).start()
+        threading.Thread(target=TemperatureMonitorTask, daemon=True).start()
         
         print("IoT 시스템 시작됨...")
         print("종료하려면 Ctrl+C를 누르세요")
@@ -1,150 +1,186 @@
 // static/js/script.js
 
-async function updateCounter() {
-    try {
-        const res = await fetch("/getcounter");
-        const data = await res.json();
-        document.getElementById("counter").textContent = data.value;
-    } catch (error) {
-        console.error("Failed to fetch counter:", error);
-    }
-}
-
-async function updateDistance() {
-    try {
-        const res = await fetch("/getdistance");
-        const data = await res.json();
+// 서버에서 받은 최신 값 (/stream 은 바뀐 값만 보내므로 여기에 합쳐 둠)
+const sensorState = {};
 
-        const distanceValueElement = document.getElementById("current-distance-value");
-        const statusElement = document.getElementById("proximity-status");
+function renderCounter() {
+    document.getElementById("counter").textContent = sensorState.counter;
+}
 
-        if (data.value !== "Out of Range" && data.value !== -1) {
-            // cm 단위로 정수 표시
-            const distanceInCm = Math.round(data.value);
-            distanceValueElement.textContent = distanceInCm;
-        } else {
-            distanceValueElement.textContent = "측정 불가";
-        }
+function renderDistance() {
+    const distanceValueElement = document.getElementById("current-distance-value");
+    const statusElement = document.getElementById("proximity-status");
 
-        // 알람 상태에 따라 스타일 변경
-        if (data.alert) {
-            statusElement.textContent = "Status: PROXIMITY ALERT!";
-            statusElement.classList.remove("status-normal");
-            statusElement.classList.add("status-alert");
-        } else {
-            statusElement.textContent = "Status: Normal";
-            statusElement.classList.remove("status-alert");
-            statusElement.classList.add("status-normal");
-        }
+    if (sensorState.distance !== undefined && sensorState.distance !== -1) {
+        // cm 단위로 정수 표시
+        distanceValueElement.textContent = Math.round(sensorState.distance);
+    } else {
+        distanceValueElement.textContent = "측정 불가";
+    }
 
-    } catch (error) {
-        console.error("Failed to fetch distance:", error);
-        document.getElementById("current-distance-value").textContent = "연결 오류";
-        const statusElement = document.getElementById("proximity-status");
-        statusElement.textContent = "Status: Error";
+    // 알람 상태에 따라 스타일 변경
+    if (sensorState.alert) {
+        statusElement.textContent = "Status: PROXIMITY ALERT!";
+        statusElement.classList.remove("status-normal");
+        statusElement.classList.add("status-alert");
+    } else {
+        statusElement.textContent = "Status: Normal";
         statusElement.classList.remove("status-alert");
         statusElement.classList.add("status-normal");
     }
 }
 
-async function updateTouch() {
-    try {
-        const res = await fetch("/gettouch");
-        const data = await res.json();
-
-        const touchStatusElement = document.getElementById("touch-status");
-        const touchIndicatorElement = document.getElementById("touch-indicator");
+function renderTouch() {
+    const touchStatusElement = document.getElementById("touch-status");
+    const touchIndicatorElement = document.getElementById("touch-indicator");
+
+    // 터치 상태에 따라 텍스트와 스타일 변경
+    if (sensorState.touched) {
+        touchStatusElement.textContent = "터치 감지됨";
+        touchIndicatorElement.textContent = "Status: TOUCHED!";
+        touchIndicatorElement.classList.remove("touch-inactive");
+        touchIndicatorElement.classList.add("touch-active");
+    } else {
+        touchStatusElement.textContent = "터치 없음";
+        touchIndicatorElement.textContent = "Status: No Touch";
+        touchIndicatorElement.classList.remove("touch-active");
+        touchIndicatorElement.classList.add("touch-inactive");
+    }
+}
 
-        // 터치 상태 텍스트 업데이트
-        if (data.touched) {
-            touchStatusElement.textContent = "터치 감지됨";
-        } else {
-            touchStatusElement.textContent = "터치 없음";
+function renderTemperatureHumidity() {
+    const temperatureElement = document.getElementById("temperature-value");
+    const humidityElement = document.getElementById("humidity-value");
+    const climateStatusElement = document.getElementById("climate-status");
+    const climateStatusTextElement = document.getElementById("climate-status-text");
+
+    if (sensorState.temperature != null && sensorState.humidity != null) {
+        // 온도와 습도 업데이트
+        temperatureElement.textContent = sensorState.temperature.toFixed(1);
+        humidityElement.textContent = sensorState.humidity.toFixed(1);
+
+        // 온도에 따른 상태 분류
+        let statusText = "정상";
+        let statusClass = "climate-normal";
+
+        if (sensorState.temperature < 10) {
+            statusText = "추움";
+            statusClass = "climate-cold";
+        } else if (sensorState.temperature > 30) {
+            statusText = "더움";
+            statusClass = "climate-hot";
+        } else if (sensorState.humidity > 80) {
+            statusText = "습함";
+            statusClass = "climate-humid";
+        } else if (sensorState.humidity < 30) {
+            statusText = "건조함";
+            statusClass = "climate-dry";
         }
 
-        // 터치 상태에 따라 스타일 변경
-        if (data.touched) {
-            touchIndicatorElement.textContent = "Status: TOUCHED!";
-            touchIndicatorElement.classList.remove("touch-inactive");
-            touchIndicatorElement.classList.add("touch-active");
-        } else {
-            touchIndicatorElement.textContent = "Status: No Touch";
-            touchIndicatorElement.classList.remove("touch-active");
-            touchIndicatorElement.classList.add("touch-inactive");
-        }
+        climateStatusTextElement.textContent = statusText;
+        climateStatusElement.className = statusClass;
+
+    } else {
+        // 에러 처리
+        temperatureElement.textContent = "--";
+        humidityElement.textContent = "--";
+        climateStatusTextElement.textContent = "센서 오류";
+        climateStatusElement.className = "climate-error";
+    }
+}
+
+function renderAll() {
+    if (sensorState.counter !== undefined) renderCounter();
+    renderDistance();
+    renderTouch();
+    renderTemperatureHumidity();
+}
 
-    } catch (error) {
-        console.error("Failed to fetch touch:", error);
-        document.getElementById("touch-status").textContent = "연결 오류";
+// /stream (Server-Sent Events) 하나로 모든 값을 받음: 값이 바뀔 때만 서버가 보냄
+// 연결이 끊기면 브라우저가 Last-Event-ID 를 붙여 자동으로 재접속합니다.
+function connectStream() {
+    const source = new EventSource("/stream");
+
+    source.addEventListener("reading", event => {
+        const changed = JSON.parse(event.data);
+        Object.assign(sensorState, changed);
+        if ("counter" in changed) renderCounter();
+        if ("distance" in changed || "alert" in changed) renderDistance();
+        if ("touched" in changed) renderTouch();
+        if ("temperature" in changed || "humidity" in changed) renderTemperatureHumidity();
+    });
+
+    // 재접속되면 가지고 있던 값으로 화면 복구 (같은 버전이면 서버는 다시 보내지 않음)
+    source.addEventListener("open", renderAll);
+
+    source.addEventListener("error", () => {
+        console.error("센서 스트림 연결 오류, 재접속 대기 중");
+        const statusElement = document.getElementById("proximity-status");
+        statusElement.textContent = "Status: Error";
+        statusElement.classList.remove("status-alert");
+        statusElement.classList.add("status-normal");
         const touchIndicatorElement = document.getElementById("touch-indicator");
         touchIndicatorElement.textContent = "Status: Error";
         touchIndicatorElement.classList.remove("touch-active");
         touchIndicatorElement.classList.add("touch-inactive");
-    }
+        document.getElementById("climate-status-text").textContent = "연결 오류";
+        document.getElementById("climate-status").className = "climate-error";
+    });
 }
 
-async function updateTemperatureHumidity() {
-    try {
-        const res = await fetch("/gettemperature");
-        const data = await res.json();
-
-        const temperatureElement = document.getElementById("temperature-value");
-        const humidityElement = document.getElementById("humidity-value");
-        const climateStatusElement = document.getElementById("climate-status");
-        const climateStatusTextElement = document.getElementById("climate-status-text");
-
-        if (data.status === "success" && data.temperature !== null && data.humidity !== null) {
-            // 온도와 습도 업데이트
-            temperatureElement.textContent = data.temperature.toFixed(1);
-            humidityElement.textContent = data.humidity.toFixed(1);
-
-            // 온도에 따른 상태 분류
-            let statusText = "정상";
-            let statusClass = "climate-normal";
-
-            if (data.temperature < 10) {
-                statusText = "추움";
-                statusClass = "climate-cold";
-            } else if (data.temperature > 30) {
-                statusText = "더움";
-                statusClass = "climate-hot";
-            } else if (data.humidity > 80) {
-                statusText = "습함";
-                statusClass = "climate-humid";
-            } else if (data.humidity < 30) {
-                statusText = "건조함";
-                statusClass = "climate-dry";
-            }
-
-            climateStatusTextElement.textContent = statusText;
-            climateStatusElement.className = statusClass;
-
-        } else {
-            // 에러 처리
-            temperatureElement.textContent = "--";
-            humidityElement.textContent = "--";
-            climateStatusTextElement.textContent = "센서 오류";
-            climateStatusElement.className = "climate-error";
+// WebSocket 제어 채널: 연결되어 있으면 LED 버튼이 페이지를 다시 불러오지 않고 명령만 보냄
+let controlSocket = null;
+let controlRetryDelay = 1000;
+let nextCommandId = 1;
+
+function renderLeds(states) {
+    states.forEach((state, index) => {
+        const element = document.getElementById(`led-state-${index}`);
+        if (element) element.textContent = state === 1 ? " ON " : " OFF ";
+    });
+}
+
+function connectControl() {
+    const scheme = location.protocol === "https:" ? "wss" : "ws";
+    const socket = new WebSocket(`${scheme}://${location.host}/ws`);
+
+    socket.addEventListener("open", () => {
+        controlSocket = socket;
+        controlRetryDelay = 1000;
+    });
+
+    socket.addEventListener("message", event => {
+        const message = JSON.parse(event.data);
+        if (message.type === "ack" && !message.ok) {
+            console.error("LED 제어 실패:", message.error);
+            return;
         }
+        // 내 명령의 ack 와 다른 대시보드가 바꾼 state 모두 LED 상태를 담고 있음
+        if (Array.isArray(message.leds)) renderLeds(message.leds);
+    });
+
+    socket.addEventListener("close", () => {
+        controlSocket = null;
+        // 서버에 /ws 가 없거나 끊겼으면 점점 늦게 재시도 (그동안은 기존 링크로 동작)
+        setTimeout(connectControl, controlRetryDelay);
+        controlRetryDelay = Math.min(controlRetryDelay * 2, 30000);
+    });
+}
 
-    } catch (error) {
-        console.error("Failed to fetch temperature/humidity:", error);
-        document.getElementById("temperature-value").textContent = "--";
-        document.getElementById("humidity-value").textContent = "--";
-        document.getElementById("climate-status-text").textContent = "연결 오류";
-        document.getElementById("climate-status").className = "climate-error";
-    }
+function bindLedButtons() {
+    document.querySelectorAll(".led-section a[data-led]").forEach(button => {
+        button.addEventListener("click", event => {
+            if (!controlSocket || controlSocket.readyState !== WebSocket.OPEN) return;
+            event.preventDefault();
+            const command = { id: nextCommandId++, leds: { [button.dataset.led]: Number(button.dataset.state) } };
+            controlSocket.send(JSON.stringify(command));
+        });
+    });
 }
 
 
 document.addEventListener('DOMContentLoaded', () => {
-    updateCounter();
-    updateDistance();
-    updateTouch();
-    updateTemperatureHumidity();
-
-    setInterval(updateCounter, 1000);
-    setInterval(updateDistance, 1000);
-    setInterval(updateTouch, 500); // 터치는 더 빠른 업데이트로 반응성 향상
-    setInterval(updateTemperatureHumidity, 2000); // 온도/습도는 2초마다 업데이트
-});
\ No newline at end of file
+    connectStream();
+    connectControl();
+    bindLedButtons();
+});